@@ -1,32 +1,68 @@
-import pandas as pd
-
-def analyze_excel():
-    file_path = "Copy of 2025 Mar 29 - Apr 4.xlsx"
-    
-    # Read all sheets first
-    excel_data = pd.read_excel(file_path, sheet_name=None, engine='openpyxl')
-    print("\nSheets found in the Excel file:", list(excel_data.keys()))
-    
-    # Try to read the first sheet
-    sheet_name = list(excel_data.keys())[0]
-    df = excel_data[sheet_name]
-    
-    print(f"\nAnalyzing sheet: {sheet_name}")
-    print(f"Number of rows: {len(df)}")
-    print(f"Number of columns: {len(df.columns)}")
-    print("\nColumn names:")
-    for col in df.columns:
-        print(f"- {col}")
-    
-    print("\nFirst 5 rows of data:")
-    print(df.head())
-    
-    print("\nSample of non-empty values in each column:")
-    for column in df.columns:
-        non_empty = df[column].dropna().head(3)
-        if len(non_empty) > 0:
-            print(f"\n{column}:")
-            print(non_empty.values)
+"""Describe the sheets of a schedule workbook without loading it into memory.
+
+Usage:
+    python analyze_excel.py [workbook.xlsx] [sheet]
+
+Rows are streamed with openpyxl in read-only mode, and the header row, day
+columns and week are detected the same way as /api/upload-schedule does.
+"""
+
+import sys
+
+from openpyxl import load_workbook
+
+from schedule_import import _is_blank, _sheet_layout
+
+SAMPLES_PER_COLUMN = 3
+
+
+def analyze_excel(file_path="Copy of 2025 Mar 29 - Apr 4.xlsx", sheet_name=None):
+    wb = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        print("\nSheets found in the Excel file:", wb.sheetnames)
+
+        ws = wb[sheet_name] if sheet_name else wb.worksheets[0]
+        print(f"\nAnalyzing sheet: {ws.title}")
+        layout, rows = _sheet_layout(ws)
+        if layout is None:
+            print("No header row with a Name or Employee column was found")
+            return
+        print("\nColumn names:")
+        for label in layout.labels:
+            print(f"- {label}")
+        print(f"\nDay columns: {', '.join(day for day in layout.day_cols) or 'none'}")
+        print(f"Week starting: {layout.week_start or 'unknown'}")
+
+        row_count = 0
+        width = 0
+        first_rows = []
+        samples = {}
+        for row in rows:
+            row_count += 1
+            width = max(width, len(row))
+            if len(first_rows) < 5:
+                first_rows.append(row)
+            for idx, value in enumerate(row):
+                column = samples.setdefault(idx, [])
+                if len(column) < SAMPLES_PER_COLUMN and not _is_blank(value):
+                    column.append(value)
+
+        print(f"Number of rows: {row_count}")
+        print(f"Number of columns: {width}")
+
+        print("\nFirst 5 rows of data:")
+        for row in first_rows:
+            print(row)
+
+        print("\nSample of non-empty values in each column:")
+        for idx in sorted(samples):
+            if samples[idx]:
+                label = layout.labels[idx] if idx < len(layout.labels) and layout.labels[idx] else f"Column {idx}"
+                print(f"\n{label}:")
+                print(samples[idx])
+    finally:
+        wb.close()
+
 
 if __name__ == "__main__":
-    analyze_excel()
\ No newline at end of file
+    analyze_excel(*sys.argv[1:3])
@@ -0,0 +1,64 @@
+"""Read-only row types for list endpoints that select plain columns.
+
+Each type has the same fields as its model's ``to_dict()``. The list
+endpoints select those columns and wrap each row in one of these slotted
+dataclasses instead of building a dict. orjson (see json_provider.py) encodes
+dataclasses natively, so no per-row dict is built. Without orjson, Flask's
+provider falls back to ``dataclasses.asdict``.
+
+orjson writes dataclass fields in declaration order and ignores sort_keys for
+them. The fields are therefore declared alphabetically, which gives the same
+bytes as the sorted dicts these endpoints used to return. Queries must select
+the columns in that same order.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Type, TypeVar
+
+T = TypeVar('T')
+
+
+@dataclass(slots=True)
+class TaskRow:
+    day_of_week: str
+    employee_id: int
+    end_time: str
+    id: int
+    required_skill: Optional[str]
+    start_time: str
+    task_name: str
+
+
+@dataclass(slots=True)
+class TimeOffRow:
+    employee_id: int
+    employee_name: str
+    end_date: str
+    id: int
+    reason: Optional[str]
+    request_type: str
+    start_date: str
+    status: Optional[str]
+
+
+@dataclass(slots=True)
+class SuggestionRow:
+    created_at: str  # ISO 8601, as Suggestion.to_dict() gives it
+    day_key: Optional[str]
+    description: Optional[str]
+    employee_id: Optional[int]
+    employee_name: Optional[str]
+    end_time: Optional[str]
+    id: int
+    schedule_version: Optional[int]
+    start_time: Optional[str]
+    status: str
+    title: str
+    type: str
+
+
+def rows_as(cls: Type[T], rows: Iterable) -> List[T]:
+    """cls(*row) for each row; the query must select cls's fields in declaration order."""
+    return [cls(*row) for row in rows]
@@ -0,0 +1,60 @@
+"""Serve the fingerprinted, precompressed assets produced by build_assets.py.
+
+``asset_url('script.js')`` (a template global) resolves to the built file
+listed in static/dist/manifest.json, or to the plain /static URL when no build
+has been run, so development needs no build step. Built files are served from
+/assets/ with the brotli or gzip variant the client accepts and a one-year
+immutable Cache-Control, since a fingerprinted URL never changes content.
+"""
+
+from __future__ import annotations
+
+import json
+import mimetypes
+import os
+
+from flask import abort, request, send_from_directory, url_for
+
+ASSET_MAX_AGE = 365 * 24 * 3600
+IMMUTABLE_CACHE_CONTROL = f'public, max-age={ASSET_MAX_AGE}, immutable'
+
+
+def _load_manifest(dist_dir: str) -> dict:
+    try:
+        with open(os.path.join(dist_dir, 'manifest.json'), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def init_assets(app) -> None:
+    dist_dir = os.path.join(app.static_folder, 'dist')
+    manifest = _load_manifest(dist_dir)
+    if manifest:
+        print(f"Serving {len(manifest)} built assets from {dist_dir}")
+
+    @app.template_global()
+    def asset_url(filename: str) -> str:
+        built = manifest.get(filename)
+        if built is None:
+            return url_for('static', filename=filename)
+        return url_for('assets', filename=built)
+
+    def serve_asset(filename):
+        if filename not in manifest.values():
+            abort(404)
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        encoding = None
+        for enc, suffix in (('br', '.br'), ('gzip', '.gz')):
+            if request.accept_encodings[enc] > 0 and os.path.isfile(os.path.join(dist_dir, filename + suffix)):
+                encoding = enc
+                break
+        stored = filename + ('.br' if encoding == 'br' else '.gz' if encoding == 'gzip' else '')
+        response = send_from_directory(dist_dir, stored, mimetype=mimetype, max_age=ASSET_MAX_AGE)
+        response.vary.add('Accept-Encoding')
+        if encoding is not None:
+            response.headers['Content-Encoding'] = encoding
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        return response
+
+    app.add_url_rule('/assets/<path:filename>', 'assets', serve_asset)
@@ -0,0 +1,299 @@
+"""Offload work from async views: a bounded DB thread pool, a CPU process pool,
+deadlines, and cancellation when the client goes away.
+
+The heavy endpoints are Flask async views (Flask's ``async`` extra, asgiref).
+Under WSGI a request still holds its server thread, but that thread only waits
+on an event loop. The work itself runs:
+
+* ``run_db(fn, *args)``: in a DB thread pool of ASYNC_DB_THREADS threads, each
+  call in its own app context and session. The pool caps how many requests
+  touch SQLite at once; extra calls queue instead of piling onto the lock.
+* ``cpu_map(fn, jobs)``: in a process pool of ASYNC_CPU_PROCESSES spawned
+  workers. fn must be a module-level function of picklable arguments. With
+  the pool disabled (0) the jobs run inline.
+
+``guarded`` wraps a view with a deadline (504 after ASYNC_TIMEOUT_SECONDS) and
+watches the client socket. A timeout or a disconnect cancels the view. Its
+pending ``run_db`` calls are cancelled too. The SQLite statement in flight is
+interrupted, and any later statement in that worker raises WorkCancelled, so
+an abandoned dashboard load stops using a DB thread within one statement.
+Queued CPU jobs are dropped; a job already running in a process finishes.
+
+A coalesced computation (see services._coalesced) may be shared with other
+requests. If the request that runs it is cancelled, the callers waiting on it
+get the cancellation and run it again themselves.
+
+Configuration (environment):
+    ASYNC_DB_THREADS      - DB worker threads (default 4)
+    ASYNC_CPU_PROCESSES   - CPU worker processes; 0 runs CPU jobs inline (default min(4, CPUs))
+    ASYNC_TIMEOUT_SECONDS - deadline for guarded views (default 30)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+import os
+import select
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Any, Callable, Iterable, List, Optional, Sequence
+
+from flask import current_app, jsonify, request
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+
+from extensions import db
+
+DB_THREADS = int(os.getenv('ASYNC_DB_THREADS', '4') or '4')
+CPU_PROCESSES = int(os.getenv('ASYNC_CPU_PROCESSES', str(min(4, os.cpu_count() or 1))) or '0')
+TIMEOUT_SECONDS = float(os.getenv('ASYNC_TIMEOUT_SECONDS', '30') or '30')
+# How often a guarded view checks whether its client is still connected
+DISCONNECT_POLL_SECONDS = 0.25
+# How often a worker waiting on the CPU pool checks for cancellation
+CPU_POLL_SECONDS = 0.1
+
+
+class WorkCancelled(Exception):
+    """Raised inside a worker whose request timed out or disconnected."""
+
+
+class ClientDisconnected(Exception):
+    pass
+
+
+class _Work:
+    """Cancellation state of one run_db call, shared with its worker thread."""
+    __slots__ = ('cancelled', 'lock', 'connection')
+
+    def __init__(self):
+        self.cancelled = threading.Event()
+        self.lock = threading.Lock()
+        # Raw sqlite3 connection the worker is currently using, for interrupt()
+        self.connection = None
+
+    def cancel(self) -> None:
+        self.cancelled.set()
+        with self.lock:
+            if self.connection is not None:
+                self.connection.interrupt()
+
+
+_local = threading.local()
+_pool_lock = threading.Lock()
+_db_pool: Optional[ThreadPoolExecutor] = None
+_cpu_pool = None
+_listening = set()
+
+
+def _db_executor() -> ThreadPoolExecutor:
+    global _db_pool
+    with _pool_lock:
+        if _db_pool is None:
+            _db_pool = ThreadPoolExecutor(max_workers=max(1, DB_THREADS), thread_name_prefix='db-work')
+        return _db_pool
+
+
+def _cpu_executor():
+    global _cpu_pool
+    with _pool_lock:
+        if _cpu_pool is None:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            # Spawned, not forked: the server process has threads (scheduler, DB pool)
+            _cpu_pool = ProcessPoolExecutor(max_workers=CPU_PROCESSES, mp_context=multiprocessing.get_context('spawn'))
+        return _cpu_pool
+
+
+def cpu_workers() -> int:
+    """How many parallel jobs cpu_map can run; 1 when CPU jobs run inline."""
+    return max(1, CPU_PROCESSES)
+
+
+def check_cancelled() -> None:
+    """Raise WorkCancelled if the run_db call on this thread has been cancelled."""
+    work = getattr(_local, 'work', None)
+    if work is not None and work.cancelled.is_set():
+        raise WorkCancelled('Request cancelled')
+
+
+def is_cancellation(ex: BaseException) -> bool:
+    return isinstance(ex, WorkCancelled) or (isinstance(ex, OperationalError) and 'interrupted' in str(ex.orig))
+
+
+# --- DB thread pool ---
+
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    work = getattr(_local, 'work', None)
+    if work is None:
+        return
+    if work.cancelled.is_set():
+        raise WorkCancelled('Request cancelled')
+    with work.lock:
+        work.connection = conn.connection.dbapi_connection
+
+
+def _on_checkin(dbapi_connection, connection_record):
+    work = getattr(_local, 'work', None)
+    if work is not None and work.connection is dbapi_connection:
+        with work.lock:
+            work.connection = None
+
+
+def _listen(engine) -> None:
+    with _pool_lock:
+        if id(engine) in _listening:
+            return
+        event.listen(engine, 'before_cursor_execute', _before_execute)
+        event.listen(engine, 'checkin', _on_checkin)
+        _listening.add(id(engine))
+
+
+async def run_db(fn: Callable[..., Any], *args) -> Any:
+    """Await fn(*args) run in the DB thread pool, in an app context with its own session and the caller's site.
+
+    Return plain data rather than ORM objects; the session is removed when fn returns.
+    Cancelling the awaiting task cancels the work (see the module docstring).
+    """
+    app = current_app._get_current_object()
+    work = _Work()
+
+    def call():
+        if work.cancelled.is_set():
+            raise WorkCancelled('Request cancelled')
+        with app.app_context():
+            _listen(db.engine)
+            _local.work = work
+            try:
+                try:
+                    return fn(*args)
+                except Exception as ex:
+                    if work.cancelled.is_set() or not is_cancellation(ex):
+                        raise
+                    # A coalesced run shared with a cancelled request; this request still wants the result
+                    db.session.rollback()
+                    return fn(*args)
+            finally:
+                _local.work = None
+                db.session.remove()
+
+    # The worker inherits the request's context variables, including its site (see sites.py)
+    future = asyncio.get_running_loop().run_in_executor(_db_executor(), contextvars.copy_context().run, call)
+    try:
+        return await future
+    except asyncio.CancelledError:
+        work.cancel()
+        raise
+
+
+# --- CPU process pool ---
+
+def cpu_map(fn: Callable[..., Any], jobs: Iterable[Sequence]) -> List[Any]:
+    """[fn(*job) for job in jobs], run in the CPU process pool; results in job order.
+
+    Blocking: call it from a run_db worker (or any sync code). While it waits it
+    checks for cancellation and drops jobs that have not started.
+    """
+    global _cpu_pool
+    jobs = list(jobs)
+    if CPU_PROCESSES <= 0 or len(jobs) < 2:
+        return [fn(*job) for job in jobs]
+    from concurrent.futures.process import BrokenProcessPool
+
+    futures = [_cpu_executor().submit(fn, *job) for job in jobs]
+    results = []
+    try:
+        for future in futures:
+            while True:
+                check_cancelled()
+                try:
+                    results.append(future.result(timeout=CPU_POLL_SECONDS))
+                    break
+                except FutureTimeout:
+                    continue
+    except BrokenProcessPool as ex:
+        print(f"CPU pool failed ({ex}); running {len(jobs)} jobs inline")
+        with _pool_lock:
+            _cpu_pool = None
+        return [fn(*job) for job in jobs]
+    finally:
+        for future in futures:
+            future.cancel()
+    return results
+
+
+def shutdown() -> None:
+    """Stop both pools (for scripts and tests; the server keeps them for its lifetime)."""
+    global _db_pool, _cpu_pool
+    with _pool_lock:
+        if _db_pool is not None:
+            _db_pool.shutdown(wait=True)
+        if _cpu_pool is not None:
+            _cpu_pool.shutdown(wait=True, cancel_futures=True)
+        _db_pool = _cpu_pool = None
+
+
+# --- Guarded views ---
+
+def _client_socket(environ):
+    return environ.get('gunicorn.socket') or environ.get('werkzeug.socket')
+
+
+def client_gone(sock) -> bool:
+    """True when the peer has closed the connection (EOF or a dead socket)."""
+    try:
+        if sock.fileno() < 0:
+            return True
+        readable, _, _ = select.select([sock], [], [], 0)
+        if not readable:
+            return False
+        # Readable with no data pending means EOF; pipelined request bytes are left in place
+        return sock.recv(1, socket.MSG_PEEK | socket.MSG_DONTWAIT) == b''
+    except BlockingIOError:
+        return False
+    except (OSError, ValueError):
+        return True
+
+
+async def _watch(task: asyncio.Task, timeout: float, sock) -> Any:
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    try:
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise asyncio.TimeoutError()
+            done, _ = await asyncio.wait({task}, timeout=min(DISCONNECT_POLL_SECONDS, remaining))
+            if done:
+                return task.result()
+            if sock is not None and client_gone(sock):
+                raise ClientDisconnected()
+    finally:
+        if not task.done():
+            task.cancel()
+            try:
+                await task
+            except BaseException:
+                pass
+
+
+def guarded(view=None, *, timeout: Optional[float] = None):
+    """Decorate an async view with a deadline (default ASYNC_TIMEOUT_SECONDS) and cancellation on disconnect."""
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(*args, **kwargs):
+            limit = timeout if timeout is not None else TIMEOUT_SECONDS
+            task = asyncio.ensure_future(view(*args, **kwargs))
+            try:
+                return await _watch(task, limit, _client_socket(request.environ))
+            except asyncio.TimeoutError:
+                print(f"{request.method} {request.path} cancelled after {limit:g} s")
+                return jsonify({'error': f'Request timed out after {limit:g} seconds'}), 504
+            except ClientDisconnected:
+                print(f"{request.method} {request.path} cancelled: client disconnected")
+                # Nginx's "client closed request"; nobody is left to read it
+                return '', 499
+        return wrapper
+    return decorator(view) if view is not None else decorator
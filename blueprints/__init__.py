@@ -0,0 +1,12 @@
+from blueprints.admin import bp as admin_bp
+from blueprints.insights import bp as insights_bp
+from blueprints.schedule import bp as schedule_bp
+from blueprints.suggestions import bp as suggestions_bp
+from blueprints.timeoff import bp as timeoff_bp
+
+BLUEPRINTS = (schedule_bp, timeoff_bp, insights_bp, suggestions_bp, admin_bp)
+
+
+def register_blueprints(app):
+    for bp in BLUEPRINTS:
+        app.register_blueprint(bp)
@@ -0,0 +1,219 @@
+"""Admin login check, announcements, scheduler status, database snapshots and sites."""
+
+import traceback
+from datetime import datetime
+
+from flask import Blueprint, jsonify, request
+
+from extensions import db
+from models import Announcement, SchedulerLease, Site
+from services import _publish_change, flights
+from sites import DEFAULT_SITE, SiteError, save_site, site_codes, site_settings, using_site
+from snapshots import SnapshotError, create_snapshot, delete_snapshot, list_snapshots, restore_snapshot
+
+bp = Blueprint('admin', __name__)
+
+@bp.route('/api/announcements', methods=['GET'])
+def get_announcements():
+    # Fetch all announcements from the database
+    announcements = Announcement.query.order_by(Announcement.date.desc()).all()
+    return jsonify([announcement.to_dict() for announcement in announcements])
+
+@bp.route('/api/announcements', methods=['POST'])
+def create_announcement():
+    data = request.json or {}
+    required_fields = ['title', 'content', 'type']
+    for field in required_fields:
+        if field not in data:
+            return jsonify({'error': f'Missing required field: {field}'}), 400
+    announcement = Announcement()
+    announcement.title = data['title']
+    announcement.content = data['content']
+    announcement.type = data['type']
+    announcement.date = datetime.now().date()
+    db.session.add(announcement)
+    db.session.commit()
+    return jsonify({'message': 'Announcement created successfully', 'announcement': announcement.to_dict()})
+
+@bp.route('/api/announcements/<int:announcement_id>', methods=['DELETE'])
+def delete_announcement(announcement_id):
+    announcement = Announcement.query.get_or_404(announcement_id)
+    db.session.delete(announcement)
+    db.session.commit()
+    return jsonify({'message': 'Announcement deleted successfully'})
+
+def _parse_announcement_date(value):
+    try:
+        if value:
+            if '-' in value:
+                return datetime.strptime(value, '%Y-%m-%d').date()
+            elif '/' in value:
+                return datetime.strptime(value, '%m/%d/%Y').date()
+    except Exception as e:
+        print(f"Error parsing date: {e}. Using current date instead.")
+    return datetime.now().date()
+
+@bp.route('/api/announcements/update', methods=['POST'])
+def update_announcements():
+    """Replace the announcement list with the submitted one, writing only what changed.
+    Items whose id matches a stored row update it if a field differs, other items are inserted,
+    and stored rows missing from the list are deleted in one statement.
+    """
+    data = request.json or {}
+    announcements_data = data.get('announcements', [])
+    try:
+        ids = set()
+        for announcement in announcements_data:
+            try:
+                ids.add(int(announcement.get('id')))
+            except (TypeError, ValueError):
+                pass
+        existing = {a.id: a for a in Announcement.query.filter(Announcement.id.in_(ids))} if ids else {}
+        kept = set()
+        inserts = []
+        for announcement in announcements_data:
+            fields = {
+                'title': announcement['title'],
+                'content': announcement['content'],
+                'type': announcement['type'],
+                'date': _parse_announcement_date(announcement.get('date')),
+            }
+            try:
+                row = existing.get(int(announcement.get('id')))
+            except (TypeError, ValueError):
+                row = None
+            if row is None or row.id in kept:
+                # New item (client-side ids for new rows are placeholders, possibly duplicated)
+                inserts.append(Announcement(**fields))
+                continue
+            for name, value in fields.items():
+                if getattr(row, name) != value:
+                    setattr(row, name, value)
+            kept.add(row.id)
+        stale = Announcement.query
+        if kept:
+            stale = stale.filter(~Announcement.id.in_(kept))
+        stale.delete(synchronize_session=False)
+        db.session.add_all(inserts)
+        db.session.commit()
+        all_announcements = Announcement.query.all()
+        return jsonify({
+            'message': 'Announcements updated successfully',
+            'announcements': [announcement.to_dict() for announcement in all_announcements]
+        })
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error updating announcements: {str(e)}")
+        print(traceback.format_exc())
+        return jsonify({'error': f'Error updating announcements: {str(e)}'}), 500
+
+@bp.route('/api/admin/verify', methods=['POST'])
+def verify_admin():
+    data = request.json or {}
+    password = data.get('password')
+    if password == 'admin123':
+        return jsonify({'authenticated': True})
+    else:
+        return jsonify({'authenticated': False}), 401
+
+@bp.route('/api/admin/coalescing', methods=['GET'])
+def coalescing_stats():
+    """Per-computation counts of executions vs. callers that shared an in-flight result."""
+    return jsonify({'in_flight': flights.in_flight(), 'computations': flights.stats()})
+
+@bp.route('/api/admin/scheduler', methods=['GET'])
+def scheduler_status():
+    """Who holds the scheduler lease, and whether this worker is running the jobs."""
+    from scheduler_runtime import LEASE_NAME, current_runtime
+    lease = db.session.get(SchedulerLease, LEASE_NAME)
+    runtime = current_runtime()
+    return jsonify({
+        'lease': lease.to_dict() if lease else None,
+        'this_worker': runtime.status() if runtime else None,
+    })
+
+@bp.route('/api/admin/snapshots', methods=['GET'])
+def get_snapshots():
+    return jsonify({'snapshots': list_snapshots()})
+
+@bp.route('/api/admin/snapshots', methods=['POST'])
+def post_snapshot():
+    data = request.get_json(silent=True) or {}
+    try:
+        return jsonify({'message': 'Snapshot created', 'snapshot': create_snapshot(data.get('reason') or 'manual')}), 201
+    except SnapshotError as e:
+        return jsonify({'error': str(e)}), 400
+
+@bp.route('/api/admin/snapshots/<name>/restore', methods=['POST'])
+def restore_snapshot_route(name):
+    """Replace the database with a snapshot; the response names the pre-restore snapshot that undoes it.
+
+    A snapshot holds every site, so the restore rolls back all of them, not just the
+    requesting one. The body must say so: {"all_sites": true}.
+    """
+    data = request.get_json(silent=True) or {}
+    if data.get('all_sites') is not True:
+        return jsonify({'error': 'Restoring a snapshot replaces the data of every site; '
+                                 'send {"all_sites": true} to confirm',
+                        'sites': site_codes()}), 400
+    try:
+        result = restore_snapshot(name)
+    except FileNotFoundError:
+        return jsonify({'error': 'Snapshot not found'}), 404
+    except SnapshotError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error restoring snapshot {name}: {str(e)}")
+        print(traceback.format_exc())
+        return jsonify({'error': f'Error restoring snapshot: {str(e)}'}), 500
+    sites = site_codes()
+    for code in sites:
+        with using_site(code):
+            _publish_change('roster', 'reload')
+    return jsonify({'message': 'Snapshot restored for all sites', 'all_sites': True, 'sites': sites, **result})
+
+@bp.route('/api/admin/snapshots/<name>', methods=['DELETE'])
+def delete_snapshot_route(name):
+    try:
+        delete_snapshot(name)
+    except FileNotFoundError:
+        return jsonify({'error': 'Snapshot not found'}), 404
+    except SnapshotError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'message': 'Snapshot deleted'})
+
+# --- Sites (see sites.py) ---
+@bp.route('/api/admin/sites', methods=['GET'])
+def get_sites():
+    return jsonify({'default': DEFAULT_SITE, 'sites': [site_settings(code) for code in site_codes()]})
+
+@bp.route('/api/admin/sites', methods=['POST'])
+def post_site():
+    """Add a site. Body: {code, name?, departments?, crisis_department?}; departments default to the built-in list."""
+    data = request.get_json(silent=True) or {}
+    code = str(data.get('code') or '').strip().lower()
+    if db.session.get(Site, code) is not None:
+        return jsonify({'error': f'Site {code} already exists'}), 409
+    try:
+        site = save_site(code, data.get('name'), data.get('departments'), data.get('crisis_department'))
+    except SiteError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    db.session.commit()
+    return jsonify({'message': 'Site created', 'site': site}), 201
+
+@bp.route('/api/admin/sites/<code>', methods=['PATCH'])
+def patch_site(code):
+    if db.session.get(Site, code) is None:
+        return jsonify({'error': 'Site not found'}), 404
+    data = request.get_json(silent=True) or {}
+    try:
+        site = save_site(code, data.get('name'), data.get('departments'), data.get('crisis_department'))
+    except SiteError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    db.session.commit()
+    with using_site(code):
+        _publish_change('roster', 'reload')
+    return jsonify({'message': 'Site updated', 'site': site})
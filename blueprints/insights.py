@@ -0,0 +1,73 @@
+"""Predictive insights snapshots and the insights email."""
+
+import json
+import os
+
+from flask import Blueprint, current_app, jsonify, request
+
+from async_work import guarded, run_db
+from models import InsightsSnapshot
+from services import (_aggregate_query_args, _current_insights_payload, _insights_email_body, _refresh_stale_coverage_suggestions,
+                      _select_insights, _store_insights_snapshot, send_email)
+from simulation import SIMULATION_MAX_EDITS, SimulationError, simulate
+
+bp = Blueprint('insights', __name__)
+
+@bp.route('/api/email/insights', methods=['POST'])
+def email_insights_now():
+    recipients_param = request.json.get('recipients') if request.is_json else None
+    to_list = recipients_param or os.getenv('ADMIN_REPORT_EMAILS', 'Freeranger77@gmail.com')
+    recipients = [e.strip() for e in to_list.split(',') if e.strip()]
+    _refresh_stale_coverage_suggestions()
+    body = _insights_email_body('Daily ShiftLine Insights (manual send)')
+    send_email(recipients, 'ShiftLine Insights', body)
+    return jsonify({'sent_to': recipients, 'count': len(recipients)})
+
+# --- Predictive Insights ---
+def _insights_payload(fresh: bool) -> str:
+    if fresh:
+        return _store_insights_snapshot(source='on_demand').payload
+    return _current_insights_payload()
+
+@bp.route('/api/predictive-insights', methods=['GET'])
+@guarded
+async def get_predictive_insights():
+    """Serve the latest persisted insights snapshot, recomputing it first if the schedule or time off
+    has changed, or the week has turned, since it was taken. Query: fresh=1 forces a recompute;
+    sort= and min_hours= (and department=) select and order employees as /api/employees does,
+    by the snapshot's own figures.
+    DB work runs in the async_work pools and is cancelled if the client disconnects.
+    """
+    sort, min_hours, error = _aggregate_query_args(request.args)
+    if error:
+        return jsonify({'error': error}), 400
+    fresh = str(request.args.get('fresh', '0')).lower() in ['1','true','yes']
+    payload = await run_db(_insights_payload, fresh)
+    if sort or min_hours is not None:
+        data = json.loads(payload)
+        data['employees'] = _select_insights(data.get('employees', []), sort, min_hours, request.args.get('department'))
+        return jsonify(data)
+    # Payload is stored pre-serialized, so serving it needs no recompute or re-encode
+    return current_app.response_class(payload, mimetype='application/json')
+
+@bp.route('/api/predictive-insights/snapshots', methods=['GET'])
+def list_insights_snapshots():
+    snaps = InsightsSnapshot.query.order_by(InsightsSnapshot.id.desc()).all()
+    return jsonify([s.to_dict() for s in snaps])
+
+@bp.route('/api/simulate', methods=['POST'])
+@guarded
+async def simulate_schedule():
+    """What-if: apply hypothetical edits in memory and return coverage, gap and risk deltas.
+    Body: {"edits": [...]} (see simulation.py for the edit shapes). Nothing is written.
+    """
+    data = request.get_json(silent=True) or {}
+    edits = data.get('edits')
+    if not isinstance(edits, list) or not edits:
+        return jsonify({'error': 'edits must be a non-empty list'}), 400
+    if len(edits) > SIMULATION_MAX_EDITS:
+        return jsonify({'error': f'At most {SIMULATION_MAX_EDITS} edits per request'}), 400
+    try:
+        return jsonify(await run_db(simulate, edits))
+    except SimulationError as ex:
+        return jsonify({'error': 'Invalid edits', 'errors': ex.errors}), 400
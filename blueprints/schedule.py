@@ -0,0 +1,944 @@
+"""Roster, schedule grid, tasks, coverage, export and the change event stream."""
+
+import json
+import queue
+import traceback
+from datetime import datetime
+
+from flask import Blueprint, Response, current_app, jsonify, render_template, request
+from sqlalchemy import select, update
+
+from api_rows import TaskRow, rows_as
+from async_work import run_db
+from event_bus import EventBus
+from export import EXPORT_DATASETS, EXPORT_FORMATS, _export_columns, _export_rows, _export_source, _export_week_starts, _stream_arrow, _stream_csv
+from extensions import SSE_HEARTBEAT_SECONDS, db, event_bus
+from models import (Employee, NameMatchReview, Schedule, ScheduleColumnMeta, StaffingRequirement, Task, _bump_schedule_version,
+                    _refresh_employee_aggregates, _schedule_version)
+from name_matching import NameIndex, merge_employee
+from schedule_import import EXCEL_EXTENSIONS, ScheduleImportError, import_csv, import_workbook, list_sheets
+from services import (_aggregate_query_args, _aggregate_rows, _break_minutes_for_shift, _build_coverage, _coverage_delta_runs,
+                      _default_requirements, _ensure_schedule_column_meta, _format_slot_time, _is_free, _publish_change, _roster,
+                      _staffing_gaps, _staffing_grids)
+from shift_parser import ShiftStatus, clean_shift_text, parse_shift, parse_time, parse_time_range
+from sites import crisis_department, current_site
+from snapshots import auto_snapshot
+from task_intervals import TASK_DAYS, TaskIntervals, conflict_dict, normalize_task_day, shift_overlap, task_conflict
+
+bp = Blueprint('schedule', __name__)
+
+SCHEDULE_DAYS = ['saturday', 'sunday', 'monday', 'tuesday', 'wednesday', 'thursday', 'friday']
+BULK_EDIT_MAX_CHANGES = 1000
+BULK_TASK_MAX = 1000
+SCHEDULE_CHUNK_MAX = 1000
+
+def _roster_json_response(roster, key, entries):
+    """Serve roster entries as a JSON list, encoding it once per roster snapshot."""
+    body = roster.memo(('json',) + key, lambda: current_app.json.dumps([e.to_dict() for e in entries]).encode('utf-8'))
+    return current_app.response_class(body, mimetype='application/json')
+
+def _filtered_roster_rows(roster, sort, min_hours, department=None):
+    """Roster rows chosen and ordered by the employee_aggregate query, each with its aggregates."""
+    rows = []
+    for agg in _aggregate_rows(sort, min_hours, department):
+        entry = roster.get(agg.employee_id)
+        if entry is not None:
+            rows.append({**entry.to_dict(), 'aggregates': agg.to_dict()})
+    return rows
+
+@bp.route('/')
+def index():
+    return render_template('index.html')
+
+def _import_upload(csv: bool, stream, sheet):
+    """Snapshot, import and commit an uploaded schedule; returns the import summary."""
+    # Lets a bad upload be rolled back with /api/admin/snapshots/<name>/restore
+    snapshot = auto_snapshot('pre-import')
+    # Rows stream straight from the upload; neither format is loaded whole
+    result = import_csv(stream) if csv else import_workbook(stream, sheet=sheet)
+    db.session.commit()
+    return {**result, 'snapshot': snapshot['name'] if snapshot else None}
+
+@bp.route('/api/upload-schedule', methods=['POST'])
+async def upload_schedule():
+    """Import runs in the async_work DB pool. It has no deadline and is not cancelled
+    on disconnect: the client may give up, but a started import commits or rolls back whole.
+    """
+    if 'file' not in request.files:
+        return jsonify({'error': 'No file uploaded'}), 400
+
+    file = request.files['file']
+    filename = (getattr(file, 'filename', '') or '').lower()
+    if not file or not (filename.endswith('.csv') or filename.endswith(EXCEL_EXTENSIONS)):
+        return jsonify({'error': 'Invalid file format. Please upload a CSV or Excel (.xlsx) file'}), 400
+
+    try:
+        result = await run_db(_import_upload, filename.endswith('.csv'), file.stream,
+                              (request.form.get('sheet') or '').strip() or None)
+        print(f"Imported {result['employees']} employees; departments: {', '.join(result['departments'])}")
+        _publish_change('roster', 'reload')
+        return jsonify({'message': 'Schedule imported successfully', **result})
+
+    except ScheduleImportError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error processing file: {str(e)}")
+        print(traceback.format_exc())  # Print full exception traceback
+        return jsonify({'error': f'Error processing file: {str(e)}'}), 500
+
+@bp.route('/api/upload-schedule/sheets', methods=['POST'])
+def upload_schedule_sheets():
+    """List a workbook's sheets so the uploader can pick one before importing."""
+    file = request.files.get('file')
+    if not file or not (file.filename or '').lower().endswith(EXCEL_EXTENSIONS):
+        return jsonify({'error': 'Please upload an Excel (.xlsx) file'}), 400
+    try:
+        return jsonify({'sheets': list_sheets(file.stream)})
+    except ScheduleImportError as e:
+        return jsonify({'error': str(e)}), 400
+
+@bp.route('/api/name-matches', methods=['GET'])
+def get_name_matches():
+    """Review queue of imported names that may duplicate an existing employee (status=pending by default)."""
+    status = request.args.get('status', 'pending')
+    query = NameMatchReview.query
+    if status != 'all':
+        query = query.filter_by(status=status)
+    reviews = query.order_by(NameMatchReview.created_at.desc()).limit(500).all()
+    return jsonify([r.to_dict() for r in reviews])
+
+@bp.route('/api/name-matches/search', methods=['GET'])
+def search_name_matches():
+    """Ranked existing employees for a name, with confidence; department narrows the search."""
+    name = (request.args.get('name') or '').strip()
+    if not name:
+        return jsonify({'error': 'name is required'}), 400
+    try:
+        min_confidence = float(request.args.get('min_confidence', 0.5))
+        limit = min(int(request.args.get('limit', 10)), 50)
+    except ValueError:
+        return jsonify({'error': 'min_confidence and limit must be numbers'}), 400
+    department = (request.args.get('department') or '').strip() or None
+    matches = NameIndex.from_roster().match(name, department, limit=limit, min_confidence=min_confidence)
+    return jsonify({'name': name, 'matches': [m.to_dict() for m in matches]})
+
+@bp.route('/api/name-matches/<int:review_id>', methods=['POST'])
+def resolve_name_match(review_id):
+    """Resolve a review: action 'merge' folds the imported employee into candidate_id
+    (the best match unless given), 'distinct' keeps both.
+    """
+    review = NameMatchReview.query.get_or_404(review_id)
+    if review.status != 'pending':
+        return jsonify({'error': f'Review already {review.status}'}), 409
+    data = request.json or {}
+    action = data.get('action')
+    if action not in ('merge', 'distinct'):
+        return jsonify({'error': "action must be 'merge' or 'distinct'"}), 400
+    if action == 'merge':
+        source = review.employee
+        target = db.session.get(Employee, data.get('candidate_id') or review.candidate_id)
+        if source is None or target is None:
+            return jsonify({'error': 'Employee not found'}), 404
+        if source.id == target.id:
+            return jsonify({'error': 'Cannot merge an employee into itself'}), 400
+        merge_employee(source, target)
+        review.candidate_id = target.id
+        review.status = 'merged'
+    else:
+        review.status = 'distinct'
+    review.resolved_at = datetime.utcnow()
+    db.session.commit()
+    if action == 'merge':
+        _publish_change('roster', 'reload')
+    return jsonify({'message': f'Review {review.status}', 'review': review.to_dict()})
+
+@bp.route('/api/positions', methods=['GET'])
+def get_positions():
+    employees = Employee.query.all()
+    positions = []
+    
+    # Names to exclude - these should not appear in positions list
+    excluded_names = [
+        'Alex', 'Ashley', 'Brenda Martinez', 'Brianna', 'Drizzban', 
+        'Jasmine', 'Jocy', 'Kimberley', 'Kristen', 'Lisandro', 
+        'Miranda', 'Naomi', 'Ronda', 'rachael', 'Sara', 'Taila'
+    ]
+    
+    # Also create patterns to match variations of these names
+    excluded_patterns = [name.lower() for name in excluded_names]
+    
+    for emp in employees:
+        if emp.position and emp.position.strip() and emp.position.strip() != 'nan':
+            position = emp.position.strip()
+            
+            # Skip if position matches an excluded name
+            if any(position.lower() == pattern for pattern in excluded_patterns):
+                continue
+                
+            # Skip if position contains common name patterns
+            if position.count(' ') <= 1 and len(position) <= 20:
+                # This is likely a name (first name or first+last) rather than a position
+                # Most legitimate positions would have more words or be longer
+                if position.split()[0].lower() in [name.lower().split()[0] for name in excluded_names]:
+                    continue
+            
+            positions.append(position)
+    
+    # Debug log
+    print(f"Positions returned (after filtering out names): {positions}")
+    
+    # Remove duplicates and sort
+    positions = sorted(list(set(positions)))
+    return jsonify(positions)
+
+@bp.route('/api/departments', methods=['GET'])
+def get_departments():
+    employees = Employee.query.all()
+    departments = []
+    for emp in employees:
+        if emp.department and emp.department.strip() and emp.department.strip() != 'nan':
+            departments.append(emp.department.strip())
+    
+    # Debug log
+    print(f"Departments returned: {departments}")
+    
+    # Remove duplicates and sort
+    departments = sorted(list(set(departments)))
+    return jsonify(departments)
+
+@bp.route('/api/employees', methods=['GET', 'POST'])
+def employees_collection():
+    if request.method == 'POST':
+        data = request.json or {}
+        name = (data.get('name') or '').strip()
+        position = (data.get('position') or '').strip()
+        department = (data.get('department') or '').strip()
+        supervisor = (data.get('supervisor') or '').strip() or None
+        if not name:
+            return jsonify({'error': 'Name is required'}), 400
+        employee = Employee()
+        employee.name = name
+        employee.position = position
+        employee.department = department
+        employee.supervisor = supervisor
+        db.session.add(employee)
+        db.session.flush()
+
+        schedule = Schedule.query.filter_by(employee_id=employee.id).first()
+        if not schedule:
+            schedule = Schedule()
+            schedule.employee_id = employee.id
+            db.session.add(schedule)
+        schedule_data = data.get('schedule') or {}
+        valid_days = ['saturday','sunday','monday','tuesday','wednesday','thursday','friday']
+        for day in valid_days:
+            value = schedule_data.get(day)
+            setattr(schedule, day, value or '')
+        db.session.commit()
+        _publish_change('employee', 'created', employee=employee.to_dict())
+        return jsonify({'message': 'Employee created', 'employee': employee.to_dict()}), 201
+
+    roster = _roster()
+    # sort= / min_hours= are answered from employee_aggregate, e.g. ?min_hours=40&sort=-weekly_minutes
+    sort, min_hours, error = _aggregate_query_args(request.args)
+    if error:
+        return jsonify({'error': error}), 400
+    if sort or min_hours is not None:
+        return jsonify(_filtered_roster_rows(roster, sort, min_hours, request.args.get('department')))
+    return _roster_json_response(roster, ('employees',), roster.entries)
+
+@bp.route('/api/employees/by-position/<position>', methods=['GET'])
+def get_employees_by_position(position):
+    roster = _roster()
+    # A generator: the roster is only scanned when this position's response is not memoized yet
+    return _roster_json_response(roster, ('position', position), (e for e in roster.entries if e.position == position))
+
+@bp.route('/api/employees/by-department/<department>', methods=['GET'])
+def get_employees_by_department(department):
+    roster = _roster()
+    return _roster_json_response(roster, ('department', department), roster.department(department))
+
+@bp.route('/api/employees/<int:employee_id>', methods=['DELETE', 'PATCH'])
+def employee_detail(employee_id):
+    employee = Employee.query.get_or_404(employee_id)
+    if request.method == 'DELETE':
+        # Remove schedule first to maintain integrity
+        if employee.schedule:
+            db.session.delete(employee.schedule)
+        db.session.delete(employee)
+        db.session.commit()
+        _publish_change('employee', 'deleted', employee_id=employee_id)
+        return jsonify({'message': 'Employee deleted'})
+
+    data = request.json or {}
+    if 'name' in data:
+        employee.name = (data['name'] or '').strip()
+    if 'position' in data:
+        employee.position = (data['position'] or '').strip()
+    if 'department' in data:
+        employee.department = (data['department'] or '').strip()
+    if 'supervisor' in data:
+        employee.supervisor = (data['supervisor'] or '').strip() or None
+
+    schedule_data = data.get('schedule')
+    if schedule_data is not None:
+        schedule = employee.schedule
+        if not schedule:
+            schedule = Schedule()
+            schedule.employee_id = employee.id
+            db.session.add(schedule)
+        valid_days = ['saturday','sunday','monday','tuesday','wednesday','thursday','friday']
+        for day in valid_days:
+            if day in schedule_data:
+                setattr(schedule, day, schedule_data.get(day) or '')
+
+    db.session.commit()
+    _publish_change('employee', 'updated', employee=employee.to_dict())
+    return jsonify({'message': 'Employee updated', 'employee': employee.to_dict()})
+
+@bp.route('/api/employees/available', methods=['GET'])
+def get_available_employees():
+    day = request.args.get('day')
+    start_time = request.args.get('start_time')
+    end_time = request.args.get('end_time')
+    position = request.args.get('position')
+    include_all = str(request.args.get('include_all', '0')).lower() in ['1','true','yes']
+    
+    # Basic validation
+    if not all([day, start_time, end_time]):
+        return jsonify({'error': 'Missing required parameters'}), 400
+        
+    day_key = day.lower()
+    if day_key not in SCHEDULE_DAYS:
+        return jsonify({'error': f'Invalid day. Must be one of: {", ".join(SCHEDULE_DAYS)}'}), 400
+
+    # Find employees with matching position and availability
+    results = []
+    
+    employees = _roster().entries
+    if position:
+        employees = [e for e in employees if e.position == position]
+    
+    # Parse requested window
+    r_sm = parse_time(str(start_time))
+    r_em = parse_time(str(end_time))
+    if r_sm is None or r_em is None:
+        return jsonify({'error': 'Invalid time format for start_time/end_time'}), 400
+    if r_em <= r_sm:
+        r_em += 24*60
+
+    off_statuses = (ShiftStatus.OFF, ShiftStatus.VACATION, ShiftStatus.TRAINING, ShiftStatus.BLANK)
+
+    for employee in employees:
+        shift_val = employee.shift(day_key)
+        parsed = employee.parsed_shift(day_key)
+        is_off = parsed.status in off_statuses
+        overlap_minutes = 0
+        available = True
+        if parsed.intervals:
+            overlap_minutes = sum(max(0, min(r_em, e2) - max(r_sm, s2)) for s2, e2 in parsed.intervals)
+            available = overlap_minutes == 0
+        elif is_off:
+            # No shift means available, but mark off explicitly
+            available = True
+        emp_obj = {
+            'id': employee.id,
+            'employee_name': employee.name,
+            'position': employee.position,
+            'department': employee.department,
+            'day': day_key,
+            'requested_start': str(start_time),
+            'requested_end': str(end_time),
+            'requested_minutes': r_em - r_sm,
+            'day_shift': shift_val or '',
+            'is_off': is_off,
+            'overlap_minutes': overlap_minutes,
+            'status': 'off' if is_off else ('available' if available else 'overlap')
+        }
+        if include_all:
+            results.append(emp_obj)
+        else:
+            if available:
+                results.append(emp_obj)
+    
+    return jsonify(results)
+
+@bp.route('/api/schedule', methods=['GET'])
+def get_schedules():
+    department = request.args.get('department')
+    roster = _roster()
+    employees = roster.department(department) if department else roster.entries
+    
+    # Debug log
+    for emp in employees[:5]:  # Just log first 5 for brevity
+        print(f"Schedule for {emp.name}: Position={emp.position}, Dept={emp.department}")
+        if emp.has_schedule:
+            print(f"  Monday: {emp.shift('monday')}")
+    
+    sort, min_hours, error = _aggregate_query_args(request.args)
+    if error:
+        return jsonify({'error': error}), 400
+    if sort or min_hours is not None:
+        return jsonify(_filtered_roster_rows(roster, sort, min_hours, department))
+
+    limit = request.args.get('limit', type=int)
+    if limit is None:
+        return _roster_json_response(roster, ('department', department) if department else ('employees',), employees)
+
+    # Chunked mode: one page of rows plus the version they were read at. A client
+    # paging through passes that version back and restarts on 409 when it moved.
+    version = request.args.get('version', type=int)
+    if version is not None and version != roster.version:
+        return jsonify({'error': 'Schedule changed while loading', 'version': roster.version}), 409
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    limit = min(max(limit, 1), SCHEDULE_CHUNK_MAX)
+    rows = employees[offset:offset + limit]
+    end = offset + len(rows)
+    return jsonify({
+        'version': roster.version,
+        'total': len(employees),
+        'offset': offset,
+        'next_offset': end if end < len(employees) else None,
+        'rows': [e.to_dict() for e in rows],
+    })
+
+@bp.route('/api/schedule/meta', methods=['GET', 'PATCH'])
+def schedule_metadata():
+    _ensure_schedule_column_meta()
+    if request.method == 'GET':
+        columns = ScheduleColumnMeta.query.order_by(ScheduleColumnMeta.sort_order).all()
+        return jsonify([c.to_dict() for c in columns])
+
+    data = request.json or {}
+    updates = data if isinstance(data, list) else [data]
+    valid_keys = {c.day_key: c for c in ScheduleColumnMeta.query.all()}
+    changed = False
+    for item in updates:
+        day_key = (item.get('day_key') or '').lower()
+        meta = valid_keys.get(day_key)
+        if not meta:
+            continue
+        if 'display_name' in item and item['display_name']:
+            meta.display_name = item['display_name'][:40]
+            changed = True
+        if 'subtitle' in item:
+            meta.subtitle = (item['subtitle'] or '')[:40]
+            changed = True
+        if 'is_visible' in item:
+            meta.is_visible = bool(item['is_visible'])
+            changed = True
+        if 'sort_order' in item and isinstance(item['sort_order'], int):
+            meta.sort_order = item['sort_order']
+            changed = True
+    if changed:
+        db.session.commit()
+        _publish_change('columns', 'updated')
+    return jsonify({'message': 'Columns updated successfully'})
+
+@bp.route('/api/schedule/columns/<day_key>', methods=['DELETE', 'POST'])
+def manage_schedule_column(day_key):
+    _ensure_schedule_column_meta()
+    day_key = (day_key or '').lower()
+    meta = ScheduleColumnMeta.query.filter_by(day_key=day_key).first()
+    if not meta:
+        return jsonify({'error': 'Invalid column'}), 404
+    valid_days = ['saturday','sunday','monday','tuesday','wednesday','thursday','friday']
+    if day_key not in valid_days:
+        return jsonify({'error': 'Unsupported column'}), 400
+
+    if request.method == 'DELETE':
+        meta.is_visible = False
+        # Clear all schedule values for that day in one statement; rows already blank are left alone
+        column = getattr(Schedule, day_key)
+        cleared = db.session.execute(update(Schedule).where(column != '').values({column: ''})
+                                     .returning(Schedule.employee_id)).scalars().all()
+        if cleared:
+            # Bulk UPDATE bypasses the ORM flush hooks, so bump the version and refresh the cleared employees' aggregates
+            _bump_schedule_version()
+            _refresh_employee_aggregates(db.session.connection(), cleared)
+        db.session.commit()
+        _publish_change('columns', 'cleared', day=day_key)
+        return jsonify({'message': f'{day_key.capitalize()} column hidden and cleared'})
+    else:
+        meta.is_visible = True
+        db.session.commit()
+        _publish_change('columns', 'restored', day=day_key)
+        return jsonify({'message': f'{day_key.capitalize()} column restored'})
+
+@bp.route('/api/tasks', methods=['GET'])
+def get_tasks():
+    # Plain rows, no ORM identity map, encoded without per-row dicts (see api_rows.py)
+    rows = db.session.execute(select(Task.day_of_week, Task.employee_id, Task.end_time, Task.id,
+                                     Task.required_skill, Task.start_time, Task.task_name))
+    return jsonify(rows_as(TaskRow, rows))
+
+def _task_fields(data):
+    """Validate a task payload; returns (fields, start_min, end_min, error)."""
+    required_fields = ['employee_id', 'task_name', 'day_of_week', 'start_time', 'end_time']
+    for field in required_fields:
+        if field not in data or data[field] in (None, ''):
+            return None, None, None, f'Missing required field: {field}'
+    try:
+        employee_id = int(data['employee_id'])
+    except (TypeError, ValueError):
+        return None, None, None, 'employee_id must be an integer'
+    day = normalize_task_day(data['day_of_week'])
+    if day is None:
+        return None, None, None, f'day_of_week must be one of: {", ".join(TASK_DAYS)}'
+    bounds = parse_time_range(str(data['start_time']), str(data['end_time']))
+    if bounds is None:
+        return None, None, None, f'Unrecognized time range: {data["start_time"]}-{data["end_time"]}'
+    fields = {
+        'employee_id': employee_id,
+        'task_name': data['task_name'],
+        'day_of_week': day,
+        'start_time': str(data['start_time']).strip(),
+        'end_time': str(data['end_time']).strip(),
+        'required_skill': data.get('required_skill'),
+    }
+    return fields, bounds[0], bounds[1], None
+
+@bp.route('/api/tasks', methods=['POST'])
+def create_task():
+    """Create a task. 409 when it overlaps another of the employee's tasks that day, or their
+    shift when require_off_shift is set.
+    """
+    data = request.json or {}
+    fields, start_min, end_min, error = _task_fields(data)
+    if error:
+        return jsonify({'error': error}), 400
+    entry = _roster().get(fields['employee_id'])
+    if entry is None:
+        return jsonify({'error': 'Employee not found'}), 404
+    other = task_conflict(fields['employee_id'], fields['day_of_week'], start_min, end_min)
+    if other is not None:
+        return jsonify({'error': f'Overlaps task "{other.task_name}" ({other.start_time}-{other.end_time})',
+                        'conflicts': [conflict_dict(other)]}), 409
+    if data.get('require_off_shift'):
+        shift = shift_overlap(entry, fields['day_of_week'], start_min, end_min)
+        if shift:
+            return jsonify({'error': f'Overlaps the employee\'s shift ({shift})',
+                            'conflicts': [{'type': 'shift', 'shift': shift}]}), 409
+    task = Task(**fields)
+    db.session.add(task)
+    db.session.commit()
+    _publish_change('task', 'created', task=task.to_dict())
+    return jsonify({'message': 'Task created successfully', 'task': task.to_dict()})
+
+@bp.route('/api/tasks/bulk', methods=['POST'])
+def bulk_assign_tasks():
+    """Create many tasks at once: {"tasks": [{employee_id, task_name, day_of_week, start_time, end_time,
+    required_skill?, require_off_shift?}, ...]}. The whole batch is validated in one pass against stored
+    tasks and against earlier items of the batch; if any item fails nothing is written and the errors
+    are returned by index.
+    """
+    data = request.get_json(silent=True) or {}
+    items = data.get('tasks')
+    if not isinstance(items, list) or not items:
+        return jsonify({'error': 'tasks must be a non-empty list'}), 400
+    if len(items) > BULK_TASK_MAX:
+        return jsonify({'error': f'At most {BULK_TASK_MAX} tasks per request'}), 400
+
+    roster = _roster()
+    errors = []
+    parsed = []
+    for idx, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors.append({'index': idx, 'error': 'Task must be an object'})
+            continue
+        fields, start_min, end_min, error = _task_fields(item)
+        if error:
+            errors.append({'index': idx, 'error': error})
+            continue
+        entry = roster.get(fields['employee_id'])
+        if entry is None:
+            errors.append({'index': idx, 'error': 'Employee not found'})
+            continue
+        parsed.append((idx, item, fields, start_min, end_min, entry))
+
+    intervals = TaskIntervals.load((f['employee_id'], f['day_of_week']) for _, _, f, _, _, _ in parsed)
+    for idx, item, fields, start_min, end_min, entry in parsed:
+        key = (fields['employee_id'], fields['day_of_week'])
+        other = intervals.conflict(key, start_min, end_min)
+        if other is not None:
+            errors.append({'index': idx, 'error': 'Overlaps another task', 'conflicts': [other]})
+            continue
+        if item.get('require_off_shift'):
+            shift = shift_overlap(entry, fields['day_of_week'], start_min, end_min)
+            if shift:
+                errors.append({'index': idx, 'error': 'Overlaps the employee\'s shift',
+                               'conflicts': [{'type': 'shift', 'shift': shift}]})
+                continue
+        # Later items in the batch are checked against this one too
+        intervals.add(key, start_min, end_min, {'type': 'batch', 'index': idx, 'task_name': fields['task_name'],
+                                                'start_time': fields['start_time'], 'end_time': fields['end_time']})
+    if errors:
+        errors.sort(key=lambda e: e['index'])
+        return jsonify({'error': 'No tasks created', 'errors': errors}), 400
+
+    tasks = [Task(**fields) for _, _, fields, _, _, _ in parsed]
+    db.session.add_all(tasks)
+    db.session.commit()
+    created = [t.to_dict() for t in tasks]
+    _publish_change('task', 'bulk_created', tasks=created)
+    return jsonify({'message': f'{len(created)} tasks created', 'tasks': created}), 201
+
+@bp.route('/api/tasks/<int:task_id>', methods=['DELETE'])
+def delete_task(task_id):
+    task = Task.query.get_or_404(task_id)
+    employee_id = task.employee_id
+    db.session.delete(task)
+    db.session.commit()
+    _publish_change('task', 'deleted', task_id=task_id, employee_id=employee_id)
+    return jsonify({'message': 'Task deleted successfully'})
+
+@bp.route('/api/employee/<int:employee_id>/schedule/<day>', methods=['PATCH'])
+def update_employee_schedule(employee_id, day):
+    data = request.json or {}
+    shift_time = data.get('shift_time')
+    
+    # Validate day parameter
+    valid_days = ['saturday', 'sunday', 'monday', 'tuesday', 'wednesday', 'thursday', 'friday']
+    if day.lower() not in valid_days:
+        return jsonify({'error': f'Invalid day. Must be one of: {", ".join(valid_days)}'}), 400
+    
+    # Find the employee schedule
+    schedule = Schedule.query.filter_by(employee_id=employee_id).first()
+    if not schedule:
+        return jsonify({'error': 'Employee schedule not found'}), 404
+    
+    # Update the schedule day
+    setattr(schedule, day.lower(), shift_time)
+    
+    try:
+        db.session.commit()
+        _publish_change('schedule', 'updated', employee_id=employee_id, day=day.lower(), shift=shift_time or '')
+        return jsonify({'message': 'Schedule updated successfully', 'shift': shift_time or '', 'version': _schedule_version()})
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Error updating schedule: {str(e)}'}), 500
+
+@bp.route('/api/schedule/bulk', methods=['POST'])
+def bulk_update_schedule():
+    """Apply many shift edits in one transaction with a single schedule version bump.
+    Body: {changes: [{employee_id, day, shift}, ...]}. Every edit is validated through the shift
+    parser first; if any is invalid nothing is written and the errors are returned by index.
+    Later edits to the same cell win. Returns the normalized changes, the new version and the
+    coverage deltas for each affected department and day.
+    """
+    data = request.get_json(silent=True) or {}
+    changes = data.get('changes')
+    if not isinstance(changes, list) or not changes:
+        return jsonify({'error': 'changes must be a non-empty list'}), 400
+    if len(changes) > BULK_EDIT_MAX_CHANGES:
+        return jsonify({'error': f'At most {BULK_EDIT_MAX_CHANGES} changes per request'}), 400
+
+    errors = []
+    edits = {}
+    for idx, item in enumerate(changes):
+        if not isinstance(item, dict):
+            errors.append({'index': idx, 'error': 'Change must be an object'})
+            continue
+        try:
+            employee_id = int(item.get('employee_id'))
+        except (TypeError, ValueError):
+            errors.append({'index': idx, 'error': 'employee_id must be an integer'})
+            continue
+        day = str(item.get('day') or '').lower()
+        if day not in SCHEDULE_DAYS:
+            errors.append({'index': idx, 'error': f'Invalid day. Must be one of: {", ".join(SCHEDULE_DAYS)}'})
+            continue
+        shift = clean_shift_text(item.get('shift'))
+        if parse_shift(shift).status == ShiftStatus.INVALID:
+            errors.append({'index': idx, 'error': f'Unrecognized shift: {shift!r}'})
+            continue
+        edits.pop((employee_id, day), None)
+        edits[(employee_id, day)] = (idx, shift)
+
+    employee_ids = {emp_id for emp_id, _ in edits}
+    schedules = {}
+    departments = {}
+    if employee_ids:
+        schedules = {s.employee_id: s for s in Schedule.query.filter(Schedule.employee_id.in_(employee_ids))}
+        departments = dict(db.session.execute(select(Employee.id, Employee.department).where(Employee.id.in_(employee_ids))).all())
+    for (emp_id, _), (idx, _) in edits.items():
+        if emp_id not in schedules:
+            errors.append({'index': idx, 'error': 'Employee schedule not found'})
+    if errors:
+        errors.sort(key=lambda e: e['index'])
+        return jsonify({'error': 'No changes applied', 'errors': errors}), 400
+
+    affected = {}
+    for emp_id, day in edits:
+        if departments.get(emp_id):
+            affected.setdefault(departments[emp_id], set()).add(day)
+    before = {dept: _build_coverage(dept) for dept in affected}
+
+    applied = 0
+    for (emp_id, day), (_, shift) in edits.items():
+        schedule = schedules[emp_id]
+        if (getattr(schedule, day) or '') != shift:
+            setattr(schedule, day, shift)
+            applied += 1
+    try:
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Error updating schedule: {str(e)}'}), 500
+
+    normalized = [{'employee_id': emp_id, 'day': day, 'shift': shift} for (emp_id, day), (_, shift) in edits.items()]
+    coverage = []
+    for dept in sorted(affected):
+        after = _build_coverage(dept)
+        for day in SCHEDULE_DAYS:
+            if day in affected[dept]:
+                coverage.append({'department': dept, 'day': day, 'changes': _coverage_delta_runs(before[dept][day], after[day])})
+    if applied:
+        _publish_change('schedule', 'bulk_updated', changes=normalized)
+    return jsonify({'message': f'{applied} shifts updated', 'applied': applied, 'changes': normalized,
+                    'version': _schedule_version(), 'coverage': coverage})
+
+@bp.route('/api/coverage/988/detailed', methods=['GET'])
+def api_coverage_988_detailed():
+    """Return under-covered intervals and suggested backfills for the site's crisis department (988/CRISIS).
+    critical: below the slot's minimum, warn: below its preferred headcount (see /api/staffing-requirements).
+    Suggestions: employees in 988 free in that interval.
+    """
+    result = {day: [] for day in SCHEDULE_DAYS}
+    department = crisis_department()
+    staff = _roster().department(department)
+    for gap in _staffing_gaps(department):
+        # Suggest up to 3 free employees
+        sm = gap.start_slot * 30
+        em = gap.end_slot * 30
+        free = []
+        for emp in staff:
+            if _is_free(emp, gap.day_key, sm, em):
+                free.append({'id': emp.id, 'name': emp.name})
+            if len(free) >= 3:
+                break
+        result[gap.day_key].append({'severity': gap.severity, 'from': _format_slot_time(gap.start_slot),
+                                    'to': _format_slot_time(gap.end_slot), 'needed': gap.needed,
+                                    'coverage': gap.coverage, 'suggested_backfill': free})
+    return jsonify(result)
+
+@bp.route('/api/break-allowance', methods=['GET'])
+def api_break_allowance():
+    """Compute break minutes allowed for an employee per day this week, optional filter by day.
+    Query: employee_id (required), day (optional: saturday..friday)
+    """
+    emp_id = request.args.get('employee_id', type=int)
+    day = request.args.get('day')
+    if not emp_id:
+        return jsonify({'error': 'employee_id is required'}), 400
+    emp = _roster().get(emp_id)
+    if not emp or not emp.has_schedule:
+        return jsonify({'employee_id': emp_id, 'days': {}, 'total_break_minutes': 0})
+    valid_days = ['saturday','sunday','monday','tuesday','wednesday','thursday','friday']
+    if day and day.lower() not in valid_days:
+        return jsonify({'error': f'day must be one of {", ".join(valid_days)}'}), 400
+    days = {}
+    for d in valid_days:
+        shift = emp.shift(d)
+        days[d] = {
+            'shift': shift or '',
+            'minutes': _break_minutes_for_shift(shift)
+        }
+    if day:
+        d = day.lower()
+        return jsonify({'employee_id': emp_id, 'day': d, 'minutes': days[d]['minutes'], 'shift': days[d]['shift']})
+    total = sum(v['minutes'] for v in days.values())
+    return jsonify({'employee_id': emp_id, 'days': days, 'total_break_minutes': total})
+
+@bp.route('/api/coverage/988', methods=['GET'])
+def api_coverage_988():
+    """Simple coverage counts for the site's crisis department ('988/CRISIS') per day (ignores time overlaps).
+    Each day is compared with the highest minimum and preferred headcount set for any of its slots.
+    """
+    department = crisis_department()
+    staff = _roster().department(department)
+    counts = {d: 0 for d in SCHEDULE_DAYS}
+    for emp in staff:
+        if not emp.has_schedule:
+            continue
+        for d in counts.keys():
+            if emp.parsed_shift(d).is_scheduled:
+                counts[d] += 1
+    grid = _staffing_grids().get(department)
+    targets = {d: {'min': int(grid[0][i].max()) if grid else 0, 'preferred': int(grid[1][i].max()) if grid else 0}
+               for i, d in enumerate(SCHEDULE_DAYS)}
+    status = {k: ('critical' if v < targets[k]['min'] else 'ok') for k, v in counts.items()}
+    # prefer3 predates configurable targets; it means "meets the preferred headcount"
+    prefer = {k: (v >= targets[k]['preferred']) for k, v in counts.items()}
+    return jsonify({'department': department, 'counts': counts, 'status': status, 'prefer3': prefer, 'targets': targets})
+
+# --- Staffing requirements ---
+def _requirement_fields(data, current=None):
+    """Validate a staffing requirement payload; returns (fields, error). Times may be given as
+    start_slot/end_slot (0..48) or start_time/end_time ('9a', '17:30'; an end of '12a' means midnight).
+    """
+    fields = {}
+    department = data.get('department', current.department if current else None)
+    if not department or not str(department).strip():
+        return None, 'department is required'
+    fields['department'] = str(department).strip()
+    day_key = data.get('day_key', current.day_key if current else None)
+    if day_key in ('', 'all'):
+        day_key = None
+    if day_key is not None:
+        day_key = str(day_key).lower()
+        if day_key not in SCHEDULE_DAYS:
+            return None, f'day_key must be one of {", ".join(SCHEDULE_DAYS)} (or null for every day)'
+    fields['day_key'] = day_key
+    for bound, default in (('start', 0), ('end', 48)):
+        slot = data.get(f'{bound}_slot')
+        text = data.get(f'{bound}_time')
+        if slot is None and text:
+            minutes = parse_time(str(text).strip().lower())
+            if minutes is None:
+                return None, f'Invalid {bound}_time: {text}'
+            if bound == 'end' and minutes == 0:
+                minutes = 24 * 60
+            slot = -(-minutes // 30) if bound == 'end' else minutes // 30
+        if slot is None:
+            slot = getattr(current, f'{bound}_slot') if current else default
+        try:
+            fields[f'{bound}_slot'] = int(slot)
+        except (TypeError, ValueError):
+            return None, f'{bound}_slot must be an integer'
+    if not 0 <= fields['start_slot'] < fields['end_slot'] <= 48:
+        return None, 'Slots must satisfy 0 <= start_slot < end_slot <= 48'
+    for key in ('min_staff', 'preferred_staff'):
+        value = data.get(key, getattr(current, key) if current else None)
+        try:
+            fields[key] = int(value)
+        except (TypeError, ValueError):
+            return None, f'{key} must be an integer'
+        if fields[key] < 0:
+            return None, f'{key} must not be negative'
+    if fields['preferred_staff'] < fields['min_staff']:
+        return None, 'preferred_staff must be at least min_staff'
+    return fields, None
+
+@bp.route('/api/staffing-requirements', methods=['GET'])
+def list_staffing_requirements():
+    """Requirement rows (optionally for one department) plus the built-in defaults still in effect."""
+    department = request.args.get('department')
+    q = StaffingRequirement.query
+    if department:
+        q = q.filter_by(department=department)
+    rows = q.order_by(StaffingRequirement.department, StaffingRequirement.id).all()
+    configured = {d for (d,) in db.session.execute(select(StaffingRequirement.department).distinct())}
+    defaults = [{'department': d, 'min_staff': lo, 'preferred_staff': hi}
+                for d, (lo, hi) in _default_requirements().items()
+                if d not in configured and (not department or d == department)]
+    return jsonify({'requirements': [r.to_dict() for r in rows], 'defaults': defaults})
+
+@bp.route('/api/staffing-requirements', methods=['POST'])
+def create_staffing_requirement():
+    fields, error = _requirement_fields(request.json or {})
+    if error:
+        return jsonify({'error': error}), 400
+    requirement = StaffingRequirement(**fields)
+    db.session.add(requirement)
+    db.session.commit()
+    _publish_change('staffing', 'created', requirement=requirement.to_dict())
+    return jsonify({'message': 'Staffing requirement created', 'requirement': requirement.to_dict()}), 201
+
+@bp.route('/api/staffing-requirements/<int:requirement_id>', methods=['PUT', 'PATCH'])
+def update_staffing_requirement(requirement_id):
+    requirement = StaffingRequirement.query.get_or_404(requirement_id)
+    fields, error = _requirement_fields(request.json or {}, current=requirement)
+    if error:
+        return jsonify({'error': error}), 400
+    for key, value in fields.items():
+        setattr(requirement, key, value)
+    db.session.commit()
+    _publish_change('staffing', 'updated', requirement=requirement.to_dict())
+    return jsonify({'message': 'Staffing requirement updated', 'requirement': requirement.to_dict()})
+
+@bp.route('/api/staffing-requirements/<int:requirement_id>', methods=['DELETE'])
+def delete_staffing_requirement(requirement_id):
+    requirement = StaffingRequirement.query.get_or_404(requirement_id)
+    db.session.delete(requirement)
+    db.session.commit()
+    _publish_change('staffing', 'deleted', requirement_id=requirement_id)
+    return jsonify({'message': 'Staffing requirement deleted'})
+
+@bp.route('/api/staffing-gaps', methods=['GET'])
+def api_staffing_gaps():
+    """Every slot run below its minimum (critical) or preferred (warn) headcount.
+    Query: department (repeatable; default every department with targets), severity (critical|warn).
+    """
+    departments = tuple(request.args.getlist('department'))
+    severity = request.args.get('severity')
+    if severity and severity not in ('critical', 'warn'):
+        return jsonify({'error': 'severity must be critical or warn'}), 400
+    gaps = [g for g in _staffing_gaps(*departments) if not severity or g.severity == severity]
+    out = []
+    for g in gaps:
+        item = g.to_dict()
+        item['from'] = _format_slot_time(g.start_slot)
+        item['to'] = _format_slot_time(g.end_slot)
+        out.append(item)
+    return jsonify({'version': _schedule_version(), 'gaps': out})
+
+@bp.route('/api/export/<dataset>', methods=['GET'])
+def export_dataset(dataset):
+    """Stream roster, parsed shift windows or per-slot coverage as csv, arrow (IPC stream) or parquet.
+    Query: format (csv|arrow|parquet), start/end (YYYY-MM-DD week range), department (optional).
+    """
+    if dataset not in EXPORT_DATASETS:
+        return jsonify({'error': f'dataset must be one of {", ".join(EXPORT_DATASETS)}'}), 404
+    fmt = (request.args.get('format') or 'csv').lower()
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'error': f'format must be one of {", ".join(EXPORT_FORMATS)}'}), 400
+    if fmt != 'csv':
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            return jsonify({'error': 'pyarrow is not installed; use format=csv'}), 501
+    try:
+        week_starts = _export_week_starts(request.args.get('start'), request.args.get('end'))
+    except ValueError as ex:
+        return jsonify({'error': f'Invalid week range: {ex}'}), 400
+    roster, windows, time_off = _export_source(request.args.get('department'))
+    columns = _export_columns(dataset)
+    rows = _export_rows(dataset, week_starts, roster, windows, time_off)
+    body = _stream_csv(columns, rows) if fmt == 'csv' else _stream_arrow(columns, rows, fmt)
+    filename = f"shiftline_{dataset}_{week_starts[0].isoformat()}_{week_starts[-1].isoformat()}.{fmt}"
+    headers = {'Content-Disposition': f'attachment; filename={filename}'}
+    return Response(body, mimetype=EXPORT_FORMATS[fmt], headers=headers)
+
+# --- Change event stream ---
+@bp.route('/api/events', methods=['GET'])
+def stream_events():
+    """Server-sent events stream of the site's compact change deltas. Honors Last-Event-ID for replay.
+    EventSource cannot send headers, so the site comes from the site= query parameter.
+    """
+    last_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    sub, replay = event_bus.subscribe(last_id, site=current_site())
+
+    def generate():
+        try:
+            yield f"retry: 3000\nevent: hello\ndata: {json.dumps({'subscribers': event_bus.subscriber_count})}\n\n"
+            if replay is None:
+                yield "event: resync\ndata: {}\n\n"
+            else:
+                for ev in replay:
+                    yield EventBus.format_sse(ev)
+            while True:
+                if sub.overflowed:
+                    yield "event: resync\ndata: {}\n\n"
+                    return
+                try:
+                    ev = sub.queue.get(timeout=SSE_HEARTBEAT_SECONDS)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                yield EventBus.format_sse(ev)
+        finally:
+            event_bus.unsubscribe(sub)
+
+    headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    return Response(generate(), mimetype='text/event-stream', headers=headers)
@@ -0,0 +1,92 @@
+"""Coverage and burnout suggestions: generation, listing and approval."""
+
+from datetime import datetime
+
+from flask import Blueprint, jsonify, request
+from sqlalchemy import select
+
+from api_rows import SuggestionRow
+from extensions import db
+from models import Employee, Suggestion, Task
+from services import (_archive_suggestions, _day_key_to_title, _generate_burnout_suggestions, _generate_coverage_suggestions, _publish_change,
+                      _refresh_stale_coverage_suggestions, _roster)
+from shift_parser import parse_time_range
+from sites import crisis_department
+from task_intervals import conflict_dict, shift_overlap, task_conflict
+
+bp = Blueprint('suggestions', __name__)
+
+# --- Suggestions APIs ---
+@bp.route('/api/suggestions/generate', methods=['POST'])
+def api_generate_suggestions():
+    scope = request.args.get('scope', 'all')
+    created = []
+    if scope in ['all','coverage']:
+        created += _generate_coverage_suggestions()
+    if scope in ['all','burnout']:
+        created += _generate_burnout_suggestions()
+    _archive_suggestions()
+    _publish_change('suggestion', 'generated', created=[s.id for s in created])
+    return jsonify({'created': [s.to_dict() for s in created]})
+
+@bp.route('/api/suggestions', methods=['GET'])
+def api_list_suggestions():
+    status = request.args.get('status')
+    if status in [None, '', 'pending']:
+        _refresh_stale_coverage_suggestions()
+    # Plain rows joined to the employee name (no per-row relationship load), encoded without per-row dicts
+    q = (select(Suggestion.created_at, Suggestion.day_key, Suggestion.description, Suggestion.employee_id,
+                Employee.name.label('employee_name'), Suggestion.end_time, Suggestion.id, Suggestion.schedule_version,
+                Suggestion.start_time, Suggestion.status, Suggestion.title, Suggestion.type)
+         .outerjoin(Employee, Employee.id == Suggestion.employee_id))
+    if status:
+        q = q.where(Suggestion.status == status)
+    rows = db.session.execute(q.order_by(Suggestion.created_at.desc(), Suggestion.id.desc()))
+    return jsonify([SuggestionRow(created_at.isoformat(), *rest) for created_at, *rest in rows])
+
+@bp.route('/api/suggestions/<int:sug_id>', methods=['PATCH'])
+def api_update_suggestion(sug_id):
+    data = request.get_json() or {}
+    sug = Suggestion.query.get(sug_id)
+    if not sug:
+        return jsonify({'error':'Suggestion not found'}), 404
+    status = data.get('status')
+    if status not in ['pending','approved','denied']:
+        return jsonify({'error':'Invalid status'}), 400
+    task = None
+    if status == 'approved' and sug.type == 'coverage_backfill' and sug.employee_id and sug.day_key and sug.start_time and sug.end_time:
+        emp = Employee.query.get(sug.employee_id)
+        if emp:
+            day = _day_key_to_title(sug.day_key)
+            bounds = parse_time_range(sug.start_time, sug.end_time)
+            if bounds is None:
+                return jsonify({'error': f'Unrecognized time range: {sug.start_time}-{sug.end_time}'}), 400
+            # The schedule may have changed since the suggestion was made: the employee must still be
+            # off shift then, and free of other tasks
+            other = task_conflict(emp.id, day, *bounds)
+            if other is not None:
+                return jsonify({'error': f'{emp.name} already has "{other.task_name}" ({other.start_time}-{other.end_time})',
+                                'conflicts': [conflict_dict(other)]}), 409
+            shift = shift_overlap(_roster().get(emp.id), day, *bounds)
+            if shift:
+                return jsonify({'error': f'{emp.name} is now on shift then ({shift})',
+                                'conflicts': [{'type': 'shift', 'shift': shift}]}), 409
+            task = Task(
+                employee_id=emp.id,
+                task_name='988 Coverage Backfill',
+                day_of_week=day,
+                start_time=sug.start_time,
+                end_time=sug.end_time,
+                required_skill=crisis_department()
+            )
+            db.session.add(task)
+    sug.status = status
+    sug.updated_at = datetime.utcnow()
+    # The status change and its task commit together
+    db.session.commit()
+    executed = None
+    if task is not None:
+        executed = {'task_id': task.id}
+        _publish_change('task', 'created', task=task.to_dict())
+    _publish_change('suggestion', 'updated', suggestion=sug.to_dict())
+    return jsonify({'message':'Updated', 'suggestion': sug.to_dict(), 'executed': executed})
@@ -0,0 +1,111 @@
+"""Time off requests and schedule conflict checks."""
+
+from datetime import datetime
+
+from flask import Blueprint, jsonify, request
+from sqlalchemy import func, select
+
+from api_rows import TimeOffRow, rows_as
+from extensions import db
+from models import Employee, TimeOffRequest
+from services import _publish_change, _roster, send_email
+
+bp = Blueprint('timeoff', __name__)
+
+# --- Time Off APIs ---
+@bp.route('/api/timeoff', methods=['POST'])
+def submit_timeoff():
+    data = request.get_json() or {}
+    required = ['employee_id','request_type','start_date','end_date']
+    for f in required:
+        if f not in data:
+            return jsonify({'error': f'Missing {f}'}), 400
+    req = TimeOffRequest(
+        employee_id=data['employee_id'],
+        request_type=data['request_type'],
+        start_date=data['start_date'],
+        end_date=data['end_date'],
+        reason=data.get('reason','')
+    )
+    db.session.add(req)
+    db.session.commit()
+    _publish_change('timeoff', 'created', request=req.to_dict())
+    return jsonify({'message':'Request submitted', 'request': req.to_dict()}), 201
+
+@bp.route('/api/timeoff', methods=['GET'])
+def get_all_timeoff():
+    include_expired = str(request.args.get('include_expired', '0')).lower() in ['1','true','yes']
+    # Plain rows joined to the employee name (no per-row relationship load), encoded without per-row dicts
+    items = db.session.execute(
+        select(TimeOffRequest.employee_id, func.coalesce(Employee.name, '').label('employee_name'),
+               TimeOffRequest.end_date, TimeOffRequest.id, TimeOffRequest.reason, TimeOffRequest.request_type,
+               TimeOffRequest.start_date, TimeOffRequest.status)
+        .outerjoin(Employee, Employee.id == TimeOffRequest.employee_id)).all()
+    if not include_expired:
+        today = datetime.now().date()
+        def _parse(d: str):
+            try:
+                return datetime.strptime(d, '%Y-%m-%d').date()
+            except Exception:
+                try:
+                    return datetime.strptime(d, '%m/%d/%Y').date()
+                except Exception:
+                    return None
+        filtered = []
+        for it in items:
+            end = _parse(it.end_date) if it.end_date else None
+            # Hide only if we can parse and it's strictly in the past
+            if end and end < today:
+                continue
+            filtered.append(it)
+        items = filtered
+    return jsonify(rows_as(TimeOffRow, items))
+
+@bp.route('/api/timeoff/<int:req_id>', methods=['PATCH'])
+def update_timeoff_status(req_id):
+    data = request.get_json() or {}
+    req = TimeOffRequest.query.get(req_id)
+    if not req:
+        return jsonify({'error':'Request not found'}), 404
+    status = data.get('status')
+    if status not in ['pending','approved','denied']:
+        return jsonify({'error':'Invalid status'}), 400
+    req.status = status
+    db.session.commit()
+    _publish_change('timeoff', 'updated', request=req.to_dict())
+    # notify placeholder
+    emp = Employee.query.get(req.employee_id)
+    to_addr = f"employee{emp.id}@example.com" if emp else "unknown@example.com"
+    subject = f"Time Off Request {req.status.title()}"
+    body = (
+        f"Hello {emp.name if emp else ''},\n\n"
+        f"Your {req.request_type.upper()} request from {req.start_date} to {req.end_date} has been {req.status.upper()}."
+    )
+    send_email(to_addr, subject, body)
+    return jsonify({'message':'Status updated', 'request': req.to_dict()})
+
+@bp.route('/api/timeoff/conflicts', methods=['GET'])
+def check_timeoff_conflicts():
+    employee_id = request.args.get('employee_id', type=int)
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+    if not all([employee_id, start_date, end_date]):
+        return jsonify({'error': 'Missing required parameters'}), 400
+    emp = _roster().get(employee_id)
+    if not emp or not emp.has_schedule:
+        return jsonify({'conflicts': []})
+    try:
+        s = datetime.strptime(start_date, '%Y-%m-%d').date()
+        e = datetime.strptime(end_date, '%Y-%m-%d').date()
+    except Exception:
+        return jsonify({'error': 'Dates must be YYYY-MM-DD'}), 400
+    day_names = ['monday','tuesday','wednesday','thursday','friday','saturday','sunday']
+    conflicts = []
+    d = s
+    while d <= e:
+        day = day_names[d.weekday()]
+        val = emp.shift(day)
+        if emp.parsed_shift(day).is_scheduled:
+            conflicts.append({'date': d.isoformat(), 'day': day, 'shift': val})
+        d = d.fromordinal(d.toordinal()+1)
+    return jsonify({'conflicts': conflicts})
@@ -0,0 +1,236 @@
+"""Build fingerprinted, precompressed static assets for deployment.
+
+Minifies static/script.js and static/style.css, writes each to
+``static/dist/<name>.<hash>.<ext>`` (the hash is taken from the minified
+bytes, so a URL never changes content), precompresses every file with gzip
+and, when the optional ``brotli`` package is installed, brotli, and records
+the original-to-built names in ``static/dist/manifest.json``. Templates refer
+to assets through ``asset_url('script.js')``, which resolves through the
+manifest at render time (see assets.py).
+
+rjsmin/rcssmin are used when installed; otherwise a conservative built-in
+minifier removes comments and indentation but keeps line breaks, so automatic
+semicolon insertion behaves exactly as in the source.
+
+Usage:
+    python build_assets.py [--clean]
+
+--clean removes built files that the new manifest no longer references.
+Without it, the previous build stays in place so pages rendered before a
+deploy can still fetch their assets.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+import re
+import sys
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import rjsmin
+except ImportError:
+    rjsmin = None
+
+try:
+    import rcssmin
+except ImportError:
+    rcssmin = None
+
+STATIC_DIR = Path(__file__).resolve().parent / 'static'
+DIST_DIR = STATIC_DIR / 'dist'
+MANIFEST_NAME = 'manifest.json'
+ASSETS = ['script.js', 'style.css']
+HASH_LENGTH = 12
+
+# A '/' after one of these starts a regex literal rather than a division
+_REGEX_PRECEDERS = set('(,=:[!&|?{};+-*%<>~^\n')
+_REGEX_KEYWORDS = ('return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'new', 'delete', 'void', 'throw')
+
+
+def _regex_allowed(out: list) -> bool:
+    text = ''.join(out[-12:]).rstrip(' \t')
+    if not text:
+        return True
+    if text[-1] in _REGEX_PRECEDERS:
+        return True
+    word = re.search(r'([A-Za-z_$][\w$]*)$', text)
+    return bool(word) and word.group(1) in _REGEX_KEYWORDS
+
+
+def _minify_js_builtin(src: str) -> str:
+    """Strip comments, indentation, trailing spaces and blank lines.
+
+    Strings, template literals (including nested ``${...}`` expressions) and
+    regex literals are copied verbatim.
+    """
+    out: list = []
+    i, n = 0, len(src)
+    # Brace depth at which each open ${...} expression returns to its template literal
+    templates: list = []
+    braces = 0
+    at_line_start = True
+
+    def newline():
+        while out and out[-1] in (' ', '\t'):
+            out.pop()
+        if out and out[-1] != '\n':
+            out.append('\n')
+
+    while i < n:
+        c = src[i]
+        if at_line_start and c in ' \t':
+            i += 1
+            continue
+        at_line_start = False
+        if c == '\n' or c == '\r':
+            newline()
+            at_line_start = True
+            i += 1
+        elif c in ' \t':
+            if out and out[-1] not in (' ', '\n'):
+                out.append(' ')
+            i += 1
+        elif c == '/' and src.startswith('//', i):
+            end = src.find('\n', i)
+            i = n if end == -1 else end
+        elif c == '/' and src.startswith('/*', i):
+            end = src.find('*/', i + 2)
+            comment = src[i:] if end == -1 else src[i:end + 2]
+            i += len(comment)
+            # Keep the comment's line break so statements on either side stay apart
+            if '\n' in comment:
+                newline()
+                at_line_start = True
+            elif out and out[-1] not in (' ', '\n'):
+                out.append(' ')
+        elif c == '/' and _regex_allowed(out):
+            j = i + 1
+            in_class = False
+            while j < n:
+                ch = src[j]
+                if ch == '\\':
+                    j += 2
+                    continue
+                if ch == '\n':
+                    break
+                if in_class:
+                    in_class = ch != ']'
+                elif ch == '[':
+                    in_class = True
+                elif ch == '/':
+                    break
+                j += 1
+            out.append(src[i:j + 1])
+            i = j + 1
+        elif c in ('"', "'"):
+            j = i + 1
+            while j < n and src[j] != c and src[j] != '\n':
+                j += 2 if src[j] == '\\' else 1
+            out.append(src[i:j + 1])
+            i = j + 1
+        elif c == '`' or (c == '}' and templates and templates[-1] == braces):
+            # Copy template text up to the closing backtick or the next ${
+            if c == '}':
+                templates.pop()
+                braces -= 1
+            j = i + 1
+            while j < n:
+                if src[j] == '\\':
+                    j += 2
+                    continue
+                if src[j] == '`' or src.startswith('${', j):
+                    break
+                j += 1
+            if j < n and src[j] == '`':
+                out.append(src[i:j + 1])
+                i = j + 1
+            else:
+                out.append(src[i:j + 2])
+                braces += 1
+                templates.append(braces)
+                i = j + 2
+        else:
+            if c == '{':
+                braces += 1
+            elif c == '}':
+                braces -= 1
+            out.append(c)
+            i += 1
+    newline()
+    return ''.join(out)
+
+
+_CSS_STRING = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')')
+
+
+def _minify_css_builtin(src: str) -> str:
+    src = re.sub(r'/\*.*?\*/', '', src, flags=re.S)
+    parts = _CSS_STRING.split(src)
+    for idx in range(0, len(parts), 2):
+        text = re.sub(r'\s+', ' ', parts[idx])
+        text = re.sub(r'\s*([{};,>])\s*', r'\1', text)
+        text = re.sub(r':\s+', ':', text)
+        parts[idx] = text.replace(';}', '}')
+    return ''.join(parts).strip() + '\n'
+
+
+def minify(name: str, src: str) -> str:
+    if name.endswith('.js'):
+        return rjsmin.jsmin(src) if rjsmin is not None else _minify_js_builtin(src)
+    if name.endswith('.css'):
+        return rcssmin.cssmin(src) if rcssmin is not None else _minify_css_builtin(src)
+    return src
+
+
+def fingerprint(name: str, data: bytes) -> str:
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:HASH_LENGTH]}{ext}"
+
+
+def _write(path: Path, data: bytes) -> None:
+    tmp = path.with_name(path.name + '.tmp')
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def build(clean: bool = False) -> dict:
+    DIST_DIR.mkdir(parents=True, exist_ok=True)
+    manifest = {}
+    for name in ASSETS:
+        source = (STATIC_DIR / name).read_text(encoding='utf-8')
+        data = minify(name, source).encode('utf-8')
+        built = fingerprint(name, data)
+        target = DIST_DIR / built
+        _write(target, data)
+        gz = gzip.compress(data, compresslevel=9, mtime=0)
+        _write(target.with_name(built + '.gz'), gz)
+        sizes = [f"{len(source.encode('utf-8'))} -> {len(data)} bytes", f"gzip {len(gz)}"]
+        if brotli is not None:
+            br = brotli.compress(data, quality=11)
+            _write(target.with_name(built + '.br'), br)
+            sizes.append(f"br {len(br)}")
+        manifest[name] = built
+        print(f"{name} -> dist/{built} ({', '.join(sizes)})")
+    # Written last so a running app never sees a manifest pointing at missing files
+    _write(DIST_DIR / MANIFEST_NAME, json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    if clean:
+        keep = set(manifest.values())
+        for path in DIST_DIR.iterdir():
+            base = path.name[:-3] if path.suffix in ('.gz', '.br') else path.name
+            if path.name != MANIFEST_NAME and base not in keep:
+                path.unlink()
+                print(f"removed dist/{path.name}")
+    return manifest
+
+
+if __name__ == '__main__':
+    build(clean='--clean' in sys.argv[1:])
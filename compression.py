@@ -0,0 +1,78 @@
+"""Compress large text responses (JSON, HTML, CSV, ...) with brotli or gzip.
+
+Brotli is used when the optional ``brotli`` package is installed and the
+client accepts it, gzip otherwise. Bodies below the size threshold, streamed
+responses (SSE, exports), file responses and already-encoded bodies are left
+untouched.
+
+Configuration (environment):
+    COMPRESS_MIN_BYTES   - smallest body worth compressing (default 1024)
+    COMPRESS_GZIP_LEVEL  - gzip level 1-9 (default 6)
+    COMPRESS_BR_QUALITY  - brotli quality 0-11 (default 5)
+"""
+
+from __future__ import annotations
+
+import gzip
+import os
+from typing import Optional
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/javascript',
+    'text/javascript',
+    'text/html',
+    'text/css',
+    'text/csv',
+    'text/plain',
+    'image/svg+xml',
+}
+
+
+def choose_encoding(accept_encodings) -> Optional[str]:
+    """Pick 'br' or 'gzip' from a werkzeug Accept object, or None."""
+    if brotli is not None and accept_encodings['br'] > 0:
+        return 'br'
+    if accept_encodings['gzip'] > 0:
+        return 'gzip'
+    return None
+
+
+def compress_body(data: bytes, encoding: str, gzip_level: int = 6, brotli_quality: int = 5) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(data, quality=brotli_quality)
+    return gzip.compress(data, compresslevel=gzip_level, mtime=0)
+
+
+def init_compression(app) -> None:
+    min_bytes = int(os.getenv('COMPRESS_MIN_BYTES', '1024') or '1024')
+    gzip_level = int(os.getenv('COMPRESS_GZIP_LEVEL', '6') or '6')
+    brotli_quality = int(os.getenv('COMPRESS_BR_QUALITY', '5') or '5')
+
+    @app.after_request
+    def _compress_response(response):
+        if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = choose_encoding(request.accept_encodings)
+        if encoding is None:
+            return response
+        data = response.get_data()
+        if len(data) < min_bytes:
+            return response
+        response.set_data(compress_body(data, encoding, gzip_level, brotli_quality))
+        response.headers['Content-Encoding'] = encoding
+        if response.get_etag()[0]:
+            # The encoded body differs byte-for-byte from the identity one
+            etag, _ = response.get_etag()
+            response.set_etag(etag, weak=True)
+        return response
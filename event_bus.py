@@ -0,0 +1,101 @@
+"""In-process pub/sub fan-out for server-sent change events.
+
+Write paths publish compact change events; each connected ``/api/events``
+stream holds a bounded subscriber queue. Recent events are kept in a ring
+buffer so a reconnecting client (EventSource ``Last-Event-ID``) is replayed
+what it missed. A client that fell too far behind, or whose queue overflowed,
+is sent a single ``resync`` event and should reload its view.
+
+Events and subscribers carry a site (see sites.py); a subscriber only receives
+its own site's events. Event ids are shared across sites, so replay checks
+for gaps before filtering.
+
+Event ids are ``<epoch>-<seq>``, where the epoch is picked when the bus is
+created. An id from another process (a restart, or another worker) can never
+be replayed from this one's history, so it always gets ``resync``.
+"""
+
+from __future__ import annotations
+
+import json
+import queue
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set
+
+
+class Subscriber:
+    __slots__ = ('queue', 'overflowed', 'site')
+
+    def __init__(self, maxsize: int, site: Optional[str] = None):
+        self.queue: 'queue.Queue[dict]' = queue.Queue(maxsize=maxsize)
+        self.overflowed = False
+        self.site = site
+
+
+class EventBus:
+    def __init__(self, history: int = 500, queue_size: int = 1000):
+        self._lock = threading.Lock()
+        self._subscribers: Set[Subscriber] = set()
+        self._history: Deque[dict] = deque(maxlen=history)
+        self._seq = 0
+        self._queue_size = queue_size
+        self.epoch = format(time.time_ns() // 1000, 'x')
+
+    def publish(self, kind: str, data: Dict, site: Optional[str] = None) -> dict:
+        """Fan an event out to the site's subscribers. kind: employee, schedule, task, timeoff, suggestion, roster, columns."""
+        with self._lock:
+            self._seq += 1
+            event = {'id': f'{self.epoch}-{self._seq}', 'seq': self._seq, 'kind': kind, 'data': data, 'site': site}
+            self._history.append(event)
+            subscribers = list(self._subscribers)
+        for sub in subscribers:
+            if sub.overflowed or sub.site != site:
+                continue
+            try:
+                sub.queue.put_nowait(event)
+            except queue.Full:
+                sub.overflowed = True
+        return event
+
+    def _last_seq(self, last_event_id: Optional[str]) -> Optional[int]:
+        """Sequence number of an id this bus issued; -1 for any other id (another process, or malformed)."""
+        epoch, _, seq = (last_event_id or '').partition('-')
+        if epoch != self.epoch or not seq.isdigit():
+            return -1
+        return int(seq)
+
+    def subscribe(self, last_event_id: Optional[str] = None, site: Optional[str] = None):
+        """Register a subscriber for site's events. Returns (subscriber, replay) where replay lists
+        missed events, or is None when they cannot be replayed: the requested id has left the history
+        buffer or was not issued by this bus.
+        """
+        sub = Subscriber(self._queue_size, site)
+        with self._lock:
+            self._subscribers.add(sub)
+            replay: Optional[List[dict]] = []
+            if last_event_id:
+                last_seq = self._last_seq(last_event_id)
+                if last_seq < 0 or last_seq > self._seq:
+                    replay = None
+                elif last_seq < self._seq:
+                    missed = [e for e in self._history if e['seq'] > last_seq]
+                    if not missed or missed[0]['seq'] != last_seq + 1:
+                        replay = None
+                    else:
+                        replay = [e for e in missed if e['site'] == site]
+        return sub, replay
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    @property
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+    @staticmethod
+    def format_sse(event: dict) -> str:
+        return f"id: {event['id']}\nevent: {event['kind']}\ndata: {json.dumps(event['data'], separators=(',', ':'))}\n\n"
@@ -0,0 +1,184 @@
+"""Streaming roster, shift and coverage exports (csv, Arrow IPC, Parquet)."""
+
+import csv
+import io
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from extensions import db
+from models import Employee, Schedule, TimeOffRequest
+from services import _week_start_saturday, _window_slot_range
+from shift_parser import parse_shift
+
+# --- Columnar export ---
+EXPORT_DATASETS = ['roster', 'shifts', 'coverage']
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'arrow': 'application/vnd.apache.arrow.stream',
+    'parquet': 'application/vnd.apache.parquet',
+}
+EXPORT_MAX_WEEKS = 106
+EXPORT_CHUNK_ROWS = 5000
+EXPORT_DAY_KEYS = ['saturday','sunday','monday','tuesday','wednesday','thursday','friday']
+
+def _export_columns(dataset: str):
+    """Return [(name, arrow_type_name)] for a dataset. Types map to pyarrow factories."""
+    if dataset == 'roster':
+        return [('employee_id', 'int32'), ('name', 'string'), ('position', 'string'),
+                ('supervisor', 'string'), ('department', 'string')]
+    if dataset == 'shifts':
+        return [('employee_id', 'int32'), ('week_start', 'date32'), ('date', 'date32'), ('day_index', 'int8'),
+                ('shift', 'string'), ('start_min', 'int16'), ('end_min', 'int16'), ('minutes', 'int16'),
+                ('time_off', 'bool_')]
+    return ([('department', 'string'), ('week_start', 'date32'), ('date', 'date32'), ('day_index', 'int8')]
+            + [(f's{i:02d}', 'int16') for i in range(48)])
+
+def _export_week_starts(start_arg, end_arg):
+    """Saturday week starts covering [start, end] (YYYY-MM-DD). Defaults to the current week."""
+    today = datetime.now().date()
+    start = datetime.strptime(start_arg, '%Y-%m-%d').date() if start_arg else today
+    end = datetime.strptime(end_arg, '%Y-%m-%d').date() if end_arg else start
+    first = _week_start_saturday(start)
+    last = _week_start_saturday(end)
+    if last < first:
+        raise ValueError('end must not be before start')
+    weeks = (last - first).days // 7 + 1
+    if weeks > EXPORT_MAX_WEEKS:
+        raise ValueError(f'range exceeds {EXPORT_MAX_WEEKS} weeks')
+    return [first + timedelta(days=7 * i) for i in range(weeks)]
+
+def _export_source(department=None):
+    """Load roster tuples, parsed weekly windows and approved time-off dates in three flat queries."""
+    day_cols = [getattr(Schedule, d) for d in EXPORT_DAY_KEYS]
+    q = (select(Employee.id, Employee.name, Employee.position, Employee.supervisor, Employee.department, *day_cols)
+         .outerjoin(Schedule, Schedule.employee_id == Employee.id)
+         .order_by(Employee.id))
+    if department:
+        q = q.where(Employee.department == department)
+    roster = []
+    windows = {}
+    for row in db.session.execute(q):
+        emp_id = row[0]
+        roster.append(tuple(row[:5]))
+        shifts = row[5:]
+        windows[emp_id] = [(sh or '', parse_shift(sh)) for sh in shifts]
+    time_off = {}
+    approved = db.session.execute(
+        select(TimeOffRequest.employee_id, TimeOffRequest.start_date, TimeOffRequest.end_date)
+        .where(TimeOffRequest.status == 'approved'))
+    for emp_id, start_s, end_s in approved:
+        if emp_id not in windows:
+            continue
+        try:
+            rs = datetime.strptime(start_s, '%Y-%m-%d').date()
+            re_ = datetime.strptime(end_s, '%Y-%m-%d').date()
+        except Exception:
+            continue
+        time_off.setdefault(emp_id, []).append((rs, re_))
+    return roster, windows, time_off
+
+def _is_on_time_off(ranges, d) -> bool:
+    return any(rs <= d <= re_ for rs, re_ in ranges)
+
+def _export_rows(dataset: str, week_starts, roster, windows, time_off):
+    """Yield plain tuples in _export_columns order; the weekly template is expanded per dated week."""
+    if dataset == 'roster':
+        yield from roster
+        return
+    if dataset == 'shifts':
+        for week_start in week_starts:
+            for emp_id, *_ in roster:
+                ranges = time_off.get(emp_id, ())
+                for idx, (shift, parsed) in enumerate(windows[emp_id]):
+                    d = week_start + timedelta(days=idx)
+                    sm, em = parsed.window or (None, None)
+                    yield (emp_id, week_start, d, idx, shift, sm, em, parsed.minutes, _is_on_time_off(ranges, d))
+        return
+    departments = {}
+    for emp_id, _, _, _, dept in roster:
+        departments.setdefault(dept or '', []).append(emp_id)
+    for week_start in week_starts:
+        for dept in sorted(departments):
+            for idx in range(7):
+                d = week_start + timedelta(days=idx)
+                slots = [0] * 48
+                for emp_id in departments[dept]:
+                    parsed = windows[emp_id][idx][1]
+                    if not parsed.intervals or _is_on_time_off(time_off.get(emp_id, ()), d):
+                        continue
+                    for win in parsed.intervals:
+                        start_slot, end_slot = _window_slot_range(win)
+                        for s in range(start_slot, end_slot):
+                            slots[s] += 1
+                yield (dept, week_start, d, idx, *slots)
+
+def _chunked(rows, size: int):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _stream_csv(columns, rows):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow([name for name, _ in columns])
+    for chunk in _chunked(rows, EXPORT_CHUNK_ROWS):
+        writer.writerows(('' if v is None else (int(v) if isinstance(v, bool) else v) for v in row) for row in chunk)
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate(0)
+    tail = buf.getvalue()
+    if tail:
+        yield tail
+
+class _ChunkSink:
+    """Write-only file object that hands written bytes back to a streaming generator."""
+    def __init__(self):
+        self._parts = []
+        self._pos = 0
+        self.closed = False
+
+    def write(self, data):
+        data = bytes(data)
+        self._parts.append(data)
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._pos
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        out = b''.join(self._parts)
+        self._parts = []
+        return out
+
+def _stream_arrow(columns, rows, fmt: str):
+    import pyarrow as pa
+    schema = pa.schema([(name, getattr(pa, type_name)()) for name, type_name in columns])
+    sink = _ChunkSink()
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        writer = pq.ParquetWriter(sink, schema, compression='zstd')
+        write = writer.write_batch
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+        write = writer.write_batch
+    for chunk in _chunked(rows, EXPORT_CHUNK_ROWS):
+        arrays = [pa.array(list(col), type=field.type) for col, field in zip(zip(*chunk), schema)]
+        write(pa.RecordBatch.from_arrays(arrays, schema=schema))
+        data = sink.drain()
+        if data:
+            yield data
+    writer.close()
+    yield sink.drain()
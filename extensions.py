@@ -0,0 +1,18 @@
+"""Process-wide singletons shared by the app factory, models, services and blueprints.
+
+Kept free of Flask app state so scripts can import models without building the app.
+"""
+
+from flask_sqlalchemy import SQLAlchemy
+
+from event_bus import EventBus
+from mailer import Mailer
+
+db = SQLAlchemy()
+
+# Outbound email is queued and delivered by a background sender (see mailer.py)
+mailer = Mailer.from_env()
+
+# Change events pushed to connected clients over /api/events (see event_bus.py)
+event_bus = EventBus()
+SSE_HEARTBEAT_SECONDS = 15
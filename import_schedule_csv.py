@@ -5,10 +5,13 @@ Usage:
 
 Notes:
 - Treats every row as an independent assignment.
-- Employees are matched by (name, position, group) in insertion order. Duplicate
-  rows for the same combination will create additional employee entries as
-  needed.
+- Employees are matched by (name, position, group). Names match fuzzily
+  (nicknames, spelling, parenthesized alternates; see name_matching.py);
+  uncertain matches create the employee and are queued for review.
 - Any existing employee schedules not touched by the import are cleared.
+- A pre-import snapshot is taken first (see snapshot_db.py to roll back).
+- Imports into the default site; set DEFAULT_SITE to import into another
+  (see sites.py).
 """
 
 from __future__ import annotations
@@ -21,7 +24,10 @@ from typing import Dict, Tuple
 
 import pandas as pd
 
-from app import app, db, Employee, Schedule
+from app import app, db, Employee, Schedule, _ensure_schema
+from name_matching import AUTO_MATCH_CONFIDENCE, NameIndex, queue_review
+from shift_parser import ShiftStatus, clean_shift_text, parse_shift
+from snapshots import auto_snapshot
 
 DAY_MAPPING = {
     'sat dec 6': 'saturday',
@@ -38,17 +44,7 @@ SHIFT_SANITIZE_RE = re.compile(r"\s+")
 
 def _clean_text(value: str | float | int | None) -> str:
     """Normalize whitespace, strip NBSP characters, and coalesce to plain ASCII."""
-    if value is None:
-        return ''
-    text = str(value)
-    if text.lower() == 'nan':
-        return ''
-    text = text.replace('\xa0', ' ')
-    text = text.replace('\u2013', '-')  # en dash
-    text = text.replace('\u2014', '-')  # em dash
-    text = text.replace('\u2012', '-')  # figure dash
-    text = SHIFT_SANITIZE_RE.sub(' ', text)
-    return text.strip()
+    return clean_shift_text(value)
 
 
 def _clean_shift(value: str) -> str:
@@ -56,9 +52,11 @@ def _clean_shift(value: str) -> str:
     cleaned = _clean_text(value)
     if not cleaned:
         return ''
-    lower = cleaned.lower()
-    if lower in {'off', 'vacation', 'training'}:
-        return cleaned.upper()  # Standardize capitalization
+    parsed = parse_shift(cleaned)
+    if parsed.status in (ShiftStatus.OFF, ShiftStatus.VACATION, ShiftStatus.TRAINING):
+        return parsed.status.value.upper()  # Standardize capitalization
+    if parsed.status == ShiftStatus.INVALID:
+        print(f"Warning: unrecognized shift value {cleaned!r}")
     return cleaned
 
 
@@ -78,10 +76,14 @@ def load_schedule(path: Path) -> None:
     df = pd.read_csv(path, dtype=str).fillna('')
 
     with app.app_context():
-    usage_tracker: Dict[Tuple[str, str, str], Employee] = {}
+        _ensure_schema()
+        auto_snapshot('pre-import')
+        index = NameIndex.from_roster()
+        usage_tracker: Dict[Tuple[str, str, str], Employee] = {}
         touched_ids = set()
         created = 0
         updated = 0
+        queued = 0
         skipped_rows = []
         current_group = 'HELPLINE LEADERSHIP'
 
@@ -107,22 +109,24 @@ def load_schedule(path: Path) -> None:
 
             employee = usage_tracker.get(key)
             if employee is None:
-                candidates = (Employee.query
-                              .filter_by(department=group)
-                              .order_by(Employee.id)
-                              .all())
+                matches = index.match(name, group)
                 employee = None
-                for candidate in candidates:
-                    if _normalize_identity(candidate.name) == normalized_name:
-                        if not normalized_position or (candidate.position or '').strip().lower() == normalized_position:
-                            employee = candidate
-                            break
+                for match in matches:
+                    if match.confidence < AUTO_MATCH_CONFIDENCE:
+                        break
+                    candidate = db.session.get(Employee, match.employee_id)
+                    if not normalized_position or (candidate.position or '').strip().lower() == normalized_position:
+                        employee = candidate
+                        break
                 if employee is None:
                     employee = Employee()
                     employee.name = name
                     employee.position = position
                     employee.department = group
                     db.session.add(employee)
+                    if matches:
+                        queue_review(name, group, employee, matches, 'csv_script')
+                        queued += 1
                     db.session.flush()
                     schedule = Schedule()
                     schedule.employee_id = employee.id
@@ -171,6 +175,8 @@ def load_schedule(path: Path) -> None:
         db.session.commit()
 
         print(f"Import complete: created {created} employees, updated {updated}.")
+        if queued:
+            print(f"{queued} possible duplicate names queued for review (/api/name-matches).")
         if skipped_rows:
             print("Skipped rows:")
             for idx, name, reason in skipped_rows:
@@ -0,0 +1,62 @@
+"""Import-time budget check for web workers and scripts.
+
+Imports the app in a fresh interpreter under ``python -X importtime`` and fails
+when the cumulative import of ``app`` exceeds the budget, or when a heavy
+dependency that should load lazily (pandas, APScheduler, pyarrow, ...) is
+imported at startup.
+
+Usage:
+    python importtime_budget.py [budget_ms]
+
+The budget defaults to IMPORT_TIME_BUDGET_MS (or 800 ms when unset).
+"""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+DEFAULT_BUDGET_MS = 800
+LAZY_MODULES = ['pandas', 'numpy', 'apscheduler', 'pyarrow', 'openpyxl', 'smtplib']
+
+
+def measure(module: str = 'app'):
+    """Return ({module_name: cumulative_us}, stderr) for a cold import of module."""
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=Path(__file__).resolve().parent, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f'import {module} failed:\n{proc.stderr}')
+    cumulative = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or '[us]' in line:
+            continue
+        _, cum, name = line[len('import time:'):].split('|')
+        cumulative.setdefault(name.strip(), int(cum))
+    return cumulative, proc.stderr
+
+
+def main(argv: list[str]) -> int:
+    budget_ms = float(argv[1]) if len(argv) > 1 else float(os.getenv('IMPORT_TIME_BUDGET_MS', DEFAULT_BUDGET_MS))
+    cumulative, _ = measure('app')
+    total_ms = cumulative.get('app', 0) / 1000.0
+    eager = [m for m in LAZY_MODULES if m in cumulative]
+    print(f"import app: {total_ms:.0f} ms (budget {budget_ms:.0f} ms)")
+    failed = False
+    if eager:
+        print(f"FAIL: imported at startup but should load lazily: {', '.join(eager)}")
+        failed = True
+    if total_ms > budget_ms:
+        slowest = sorted(cumulative.items(), key=lambda kv: kv[1], reverse=True)[1:11]
+        print('FAIL: over budget; slowest imports:')
+        for name, us in slowest:
+            print(f"  {us / 1000.0:8.1f} ms  {name}")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
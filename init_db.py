@@ -1,8 +1,11 @@
 from app import app, db, Employee, Schedule
+from snapshots import auto_snapshot
 from datetime import datetime, time
 
 def init_db():
     with app.app_context():
+        # Keep a way back: python snapshot_db.py restore <name>
+        auto_snapshot('pre-reset')
         # Drop all existing tables and recreate them
         db.drop_all()
         db.create_all()
@@ -0,0 +1,54 @@
+"""JSON provider that uses orjson when it is installed.
+
+orjson is optional: without it the app keeps Flask's stdlib-based provider.
+Output matches the stdlib provider's conventions (sorted keys, compact
+separators, dates through Flask's ``default``), so clients cannot tell which
+encoder produced a response. Pretty-printed output (debug mode) always goes
+through the stdlib encoder.
+"""
+
+from __future__ import annotations
+
+import typing as t
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    def _options(self, sort_keys: bool) -> int:
+        # Dates are passed through to Flask's default so they serialize exactly as before
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return option
+
+    def dumps_bytes(self, obj: t.Any, sort_keys: t.Optional[bool] = None) -> bytes:
+        option = self._options(self.sort_keys if sort_keys is None else sort_keys)
+        return orjson.dumps(obj, default=self.default, option=option)
+
+    def dumps(self, obj: t.Any, **kwargs: t.Any) -> str:
+        if kwargs.get('indent') is not None or kwargs.get('cls') is not None:
+            return super().dumps(obj, **kwargs)
+        return self.dumps_bytes(obj, kwargs.get('sort_keys')).decode('utf-8')
+
+    def loads(self, s: t.Union[str, bytes], **kwargs: t.Any) -> t.Any:
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args: t.Any, **kwargs: t.Any):
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        # Bytes go straight into the response body without a str round trip
+        return self._app.response_class(self.dumps_bytes(obj) + b'\n', mimetype=self.mimetype)
+
+
+def json_provider_class():
+    """Return the fastest available provider class."""
+    return OrjsonProvider if orjson is not None else DefaultJSONProvider
@@ -0,0 +1,519 @@
+"""Load test: replay the front-end's call patterns against a local app and report latency per route.
+
+By default the harness copies the seeded database (instance/schedule.db) to a
+temporary directory and starts the app on a free port against that copy.
+Writes made during the run never touch the real database. ``--scale N``
+multiplies the roster first to emulate a larger site. ``--url`` targets an
+already running server instead.
+
+Virtual users (``--concurrency``) loop over weighted scenarios that issue the
+same requests as static/script.js, with the browser's parallel fan-out:
+
+    page_load    schedule meta, departments, positions, employees, announcements
+    schedule     tasks + time off, then every /api/schedule page
+    insights     predictive insights + 988 coverage burst, then one
+                 break-allowance call per listed employee
+    timeoff      time-off list, then a conflict check per request
+    cell_edit    shift edits through /api/schedule/bulk and the per-cell PATCH
+
+``--replay FILE`` replays a log recorded with REQUEST_LOG_PATH (see
+request_log.py) instead, spread across the virtual users. It keeps the
+recorded pacing scaled by ``--speed``; 0 replays as fast as possible.
+
+The report lists count, errors, p50/p95/p99, max and mean per route (ids and
+day names collapsed). ``--json`` writes it for comparison between builds.
+``--max-p95-ms`` and ``--max-error-rate`` make the run exit non-zero, like
+importtime_budget.py.
+
+Usage:
+    python loadtest.py run [--concurrency 10] [--duration 30] [--warmup 5] [--mix insights=3,cell_edit=1]
+                           [--scale 1] [--db instance/schedule.db] [--url http://host:port] [--read-only]
+                           [--replay requests.log] [--speed 1.0] [--json report.json]
+                           [--max-p95-ms 500] [--max-error-rate 0.01]
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import http.client
+import json
+import os
+import random
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote, urlsplit
+
+ROOT = Path(__file__).resolve().parent
+DEFAULT_DB = ROOT / 'instance' / 'schedule.db'
+DAY_KEYS = ('saturday', 'sunday', 'monday', 'tuesday', 'wednesday', 'thursday', 'friday')
+# Parallel requests a browser makes to one host
+BROWSER_CONNECTIONS = 6
+SCHEDULE_CHUNK_SIZE = 500
+BREAK_FANOUT_MAX = 100
+REQUEST_TIMEOUT = 60
+SERVER_START_TIMEOUT = 60
+DEFAULT_MIX = {'page_load': 1, 'schedule': 4, 'insights': 2, 'timeoff': 2, 'cell_edit': 3}
+WRITE_SCENARIOS = ('cell_edit',)
+EDIT_SHIFTS = ('9a-5p', '8a-4:30p', '11a-7:30p', '3p-11:30p', '7a-3:30p', '11p-7:30a', '12p-8:30p', '')
+
+# Numeric path segments are ids, except the 988 in the coverage routes
+_ID_RE = re.compile(r'/(?!988(?:/|$))\d+(?=/|$)')
+_DAY_RE = re.compile(r'/(?:%s)(?=/|$)' % '|'.join(DAY_KEYS), re.IGNORECASE)
+
+
+def route_key(method: str, path: str) -> str:
+    """'GET /api/employee/12/schedule/monday?x=1' -> 'GET /api/employee/<id>/schedule/<day>'."""
+    path = path.split('?', 1)[0]
+    return f"{method} {_DAY_RE.sub('/<day>', _ID_RE.sub('/<id>', path))}"
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(-(-pct * len(sorted_values) // 100)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+# --- Measuring ---
+
+class Stats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, Counter] = defaultdict(Counter)
+        self.recording = False
+
+    def record(self, route: str, elapsed_ms: float, error: Optional[str]) -> None:
+        if not self.recording:
+            return
+        with self._lock:
+            self.latencies[route].append(elapsed_ms)
+            if error:
+                self.errors[route][error] += 1
+
+    def report(self, elapsed_s: float) -> dict:
+        routes = []
+        total = errors = 0
+        for route in sorted(self.latencies):
+            values = sorted(self.latencies[route])
+            route_errors = sum(self.errors[route].values())
+            total += len(values)
+            errors += route_errors
+            routes.append({
+                'route': route,
+                'count': len(values),
+                'errors': route_errors,
+                'error_kinds': dict(self.errors[route]),
+                'p50_ms': round(percentile(values, 50), 1),
+                'p95_ms': round(percentile(values, 95), 1),
+                'p99_ms': round(percentile(values, 99), 1),
+                'max_ms': round(values[-1], 1),
+                'mean_ms': round(sum(values) / len(values), 1),
+            })
+        all_values = sorted(v for values in self.latencies.values() for v in values)
+        return {
+            'duration_s': round(elapsed_s, 1),
+            'requests': total,
+            'errors': errors,
+            'error_rate': round(errors / total, 4) if total else 0.0,
+            'throughput_rps': round(total / elapsed_s, 1) if elapsed_s else 0.0,
+            'p50_ms': round(percentile(all_values, 50), 1),
+            'p95_ms': round(percentile(all_values, 95), 1),
+            'p99_ms': round(percentile(all_values, 99), 1),
+            'routes': routes,
+        }
+
+
+class Client:
+    """Keep-alive HTTP client; one connection per calling thread."""
+
+    def __init__(self, base_url: str, stats: Stats):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.stats = stats
+        self._local = threading.local()
+
+    def _connection(self) -> http.client.HTTPConnection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=REQUEST_TIMEOUT)
+            self._local.conn = conn
+        return conn
+
+    def call(self, method: str, path: str, body=None, expected=(200, 201)) -> Tuple[int, Optional[object]]:
+        """Issue one request and record it; returns (status, parsed JSON or None). Status 0 means no response."""
+        # Browsers accept compressed bodies, so the server pays for compression as in production
+        headers = {'Accept': 'application/json', 'Accept-Encoding': 'gzip'}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+        started = time.perf_counter()
+        status, data, error = 0, None, None
+        try:
+            conn = self._connection()
+            conn.request(method, path, body=payload, headers=headers)
+            response = conn.getresponse()
+            raw = response.read()
+            status = response.status
+            if response.getheader('Content-Encoding') == 'gzip':
+                raw = gzip.decompress(raw)
+            if status not in expected:
+                error = str(status)
+            if raw and 'json' in (response.getheader('Content-Type') or ''):
+                data = json.loads(raw)
+        except (OSError, http.client.HTTPException, ValueError) as e:
+            error = type(e).__name__
+            conn = getattr(self._local, 'conn', None)
+            if conn is not None:
+                conn.close()
+            self._local.conn = None
+        self.stats.record(route_key(method, path), (time.perf_counter() - started) * 1000, error)
+        return status, data
+
+
+# --- Scenarios (mirroring static/script.js) ---
+
+class Roster:
+    """Employee ids, departments and shifts, fetched once and shared by the virtual users."""
+
+    def __init__(self, client: Client):
+        _, employees = client.call('GET', '/api/employees')
+        self.employees = [e for e in (employees or []) if isinstance(e, dict) and e.get('id')]
+        self.departments = sorted({e['department'] for e in self.employees if e.get('department')})
+        if not self.employees:
+            raise SystemExit('The target app has no employees to test against')
+
+
+class VirtualUser:
+    def __init__(self, client: Client, roster: Roster, rng: random.Random, read_only: bool):
+        self.client = client
+        self.roster = roster
+        self.rng = rng
+        self.read_only = read_only
+        self.pool = ThreadPoolExecutor(BROWSER_CONNECTIONS)
+
+    def parallel(self, calls) -> list:
+        """Run (method, path[, body]) calls the way a browser would, at most BROWSER_CONNECTIONS at once."""
+        futures = [self.pool.submit(self.client.call, *call) for call in calls]
+        return [f.result() for f in futures]
+
+    def page_load(self):
+        self.parallel([('GET', '/api/schedule/meta'), ('GET', '/api/departments'), ('GET', '/api/positions'),
+                       ('GET', '/api/employees'), ('GET', '/api/announcements')])
+        self.schedule()
+
+    def schedule(self):
+        self.parallel([('GET', '/api/tasks'), ('GET', '/api/timeoff')])
+        department = self.rng.choice([''] * 3 + self.roster.departments)
+        base = f'/api/schedule?department={quote(department)}&limit={SCHEDULE_CHUNK_SIZE}'
+        offset, version = 0, None
+        for _ in range(1000):
+            path = f'{base}&offset={offset}' + ('' if version is None else f'&version={version}')
+            status, page = self.client.call('GET', path, expected=(200, 409))
+            if status == 409:
+                offset, version = 0, None
+                continue
+            if status != 200 or not isinstance(page, dict) or page.get('next_offset') is None:
+                return
+            offset, version = page['next_offset'], page.get('version')
+
+    def insights(self):
+        (_, insights), _, _ = self.parallel([('GET', '/api/predictive-insights'), ('GET', '/api/coverage/988'),
+                                             ('GET', '/api/coverage/988/detailed')])
+        employees = insights.get('employees', []) if isinstance(insights, dict) else []
+        today = DAY_KEYS[(date.today().weekday() + 2) % 7]
+        self.parallel([('GET', f"/api/break-allowance?employee_id={e['employee_id']}&day={today}")
+                       for e in employees[:BREAK_FANOUT_MAX] if e.get('employee_id')])
+        self.client.call('GET', '/api/suggestions?status=pending')
+
+    def timeoff(self):
+        _, requests = self.client.call('GET', '/api/timeoff')
+        calls = [('GET', f"/api/timeoff/conflicts?employee_id={r['employee_id']}&start_date={r['start_date']}"
+                         f"&end_date={r['end_date']}") for r in (requests or [])[:20] if isinstance(r, dict)]
+        # The request form checks the picked range before submitting
+        emp = self.rng.choice(self.roster.employees)
+        start = date.today() + timedelta(days=self.rng.randint(1, 30))
+        end = start + timedelta(days=self.rng.randint(0, 6))
+        calls.append(('GET', f"/api/timeoff/conflicts?employee_id={emp['id']}&start_date={start}&end_date={end}"))
+        self.parallel(calls)
+
+    def cell_edit(self):
+        if self.read_only:
+            return self.schedule()
+        emp = self.rng.choice(self.roster.employees)
+        day = self.rng.choice(DAY_KEYS)
+        if self.rng.random() < 0.3:
+            # Single-cell PATCH (older clients); 404 when the employee has no schedule row
+            self.client.call('PATCH', f"/api/employee/{emp['id']}/schedule/{day}",
+                             {'shift_time': self.rng.choice(EDIT_SHIFTS)}, expected=(200, 404))
+            return
+        # The grid batches edits made within a short window into one bulk request
+        changes = [{'employee_id': self.rng.choice(self.roster.employees)['id'], 'day': self.rng.choice(DAY_KEYS),
+                    'shift': self.rng.choice(EDIT_SHIFTS)} for _ in range(self.rng.randint(1, 3))]
+        self.client.call('POST', '/api/schedule/bulk', {'changes': changes})
+
+
+def run_mix(client: Client, roster: Roster, mix: Dict[str, int], concurrency: int, duration: float,
+            think_ms: float, read_only: bool, seed: int) -> None:
+    scenarios = [name for name, weight in mix.items() if weight > 0]
+    weights = [mix[name] for name in scenarios]
+    deadline = time.monotonic() + duration
+
+    def user_loop(index: int):
+        rng = random.Random(seed + index)
+        user = VirtualUser(client, roster, rng, read_only)
+        try:
+            while time.monotonic() < deadline:
+                getattr(user, rng.choices(scenarios, weights)[0])()
+                if think_ms:
+                    time.sleep(rng.uniform(0.5, 1.5) * think_ms / 1000)
+        finally:
+            user.pool.shutdown(wait=False)
+
+    threads = [threading.Thread(target=user_loop, args=(i,), daemon=True) for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+def load_replay(path: str, read_only: bool) -> List[dict]:
+    entries = []
+    with open(path, encoding='utf-8') as fh:
+        for line in fh:
+            line = line.strip()
+            if not line:
+                continue
+            entry = json.loads(line)
+            if read_only and entry.get('method', 'GET') != 'GET':
+                continue
+            entries.append(entry)
+    return entries
+
+
+def run_replay(client: Client, entries: List[dict], concurrency: int, speed: float) -> None:
+    """Send recorded requests in order, each at its recorded offset / speed, over concurrency workers."""
+    started = time.monotonic()
+
+    def send(entry):
+        if speed > 0:
+            delay = started + entry.get('t', 0) / speed - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        method = entry.get('method', 'GET')
+        expected = (entry['status'],) if entry.get('status') else (200, 201)
+        if method == 'GET':
+            # Schedule paging restarts (409) depend on how replayed writes interleave
+            expected += (409,)
+        client.call(method, entry['path'], entry.get('body'), expected=expected)
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(send, entries))
+
+
+# --- Local server ---
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def scale_roster(factor: int) -> int:
+    """Copy every employee and schedule factor - 1 times (names suffixed #2, #3, ...); returns the roster size."""
+    from extensions import db
+    from models import Employee, Schedule, _bump_schedule_version, _refresh_employee_aggregates
+
+    conn = db.session.connection()
+    emp_t, sched_t = Employee.__table__, Schedule.__table__
+    employees = conn.execute(emp_t.select()).mappings().all()
+    schedules = {r['employee_id']: r for r in conn.execute(sched_t.select()).mappings()}
+    next_id = (max((e['id'] for e in employees), default=0)) + 1
+    for copy in range(2, factor + 1):
+        emp_rows, sched_rows = [], []
+        for e in employees:
+            emp_rows.append({**e, 'id': next_id, 'name': f"{e['name']} #{copy}"})
+            s = schedules.get(e['id'])
+            if s is not None:
+                sched_rows.append({**{k: v for k, v in s.items() if k != 'id'}, 'employee_id': next_id})
+            next_id += 1
+        conn.execute(emp_t.insert(), emp_rows)
+        if sched_rows:
+            conn.execute(sched_t.insert(), sched_rows)
+    _refresh_employee_aggregates(conn)
+    _bump_schedule_version(conn)
+    db.session.commit()
+    return len(employees) * factor
+
+
+def serve(db_path: str, port: int, scale: int) -> None:
+    """Run the app threaded on 127.0.0.1:port against db_path (used by `run`)."""
+    sys.path.insert(0, str(ROOT))
+    import logging
+
+    from werkzeug.serving import make_server
+
+    from app import create_app
+    from models import _ensure_schema
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}'})
+    with app.app_context():
+        _ensure_schema()
+        if scale > 1:
+            print(f"Scaled roster to {scale_roster(scale)} employees", flush=True)
+    # Per-request access lines would drown the report
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    server = make_server('127.0.0.1', port, app, threaded=True)
+    print(f"Serving {db_path} on port {port}", flush=True)
+    server.serve_forever()
+
+
+def start_server(db: str, scale: int, workdir: str) -> Tuple[subprocess.Popen, str]:
+    db_copy = os.path.join(workdir, 'schedule.db')
+    shutil.copyfile(db, db_copy)
+    port = _free_port()
+    # The app prints debug lines per request; LOADTEST_SERVER_LOG=1 shows them
+    proc = subprocess.Popen([sys.executable, str(Path(__file__).resolve()), 'serve', '--db', db_copy,
+                             '--port', str(port), '--scale', str(scale)], cwd=ROOT,
+                            stdout=None if os.getenv('LOADTEST_SERVER_LOG') else subprocess.DEVNULL)
+    url = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit(f'The app exited during startup (code {proc.returncode})')
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            conn.request('GET', '/api/schedule/meta')
+            if conn.getresponse().status == 200:
+                return proc, url
+        except OSError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise SystemExit('The app did not start in time')
+
+
+# --- Reporting ---
+
+def print_report(report: dict) -> None:
+    width = max([len(r['route']) for r in report['routes']] + [5])
+    print(f"\n{'route':<{width}}  {'count':>7}  {'errors':>6}  {'p50':>8}  {'p95':>8}  {'p99':>8}  {'max':>8}")
+    for r in report['routes']:
+        print(f"{r['route']:<{width}}  {r['count']:>7}  {r['errors']:>6}  {r['p50_ms']:>8.1f}  {r['p95_ms']:>8.1f}  "
+              f"{r['p99_ms']:>8.1f}  {r['max_ms']:>8.1f}")
+        if r['error_kinds']:
+            print(f"{'':<{width}}  errors: {', '.join(f'{k} x{v}' for k, v in r['error_kinds'].items())}")
+    print(f"\n{report['requests']} requests in {report['duration_s']} s ({report['throughput_rps']} req/s), "
+          f"{report['errors']} errors ({report['error_rate']:.2%}); "
+          f"p50 {report['p50_ms']} ms, p95 {report['p95_ms']} ms, p99 {report['p99_ms']} ms")
+
+
+def parse_mix(text: Optional[str]) -> Dict[str, int]:
+    if not text:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise SystemExit(f"Unknown scenario {name!r}; choose from {', '.join(DEFAULT_MIX)}")
+        mix[name] = int(weight or 1)
+    return mix
+
+
+def run(args) -> int:
+    stats = Stats()
+    proc = None
+    workdir = tempfile.mkdtemp(prefix='shiftline-load-')
+    try:
+        if args.url:
+            url = args.url.rstrip('/')
+        else:
+            proc, url = start_server(args.db, args.scale, workdir)
+            print(f"Started app on {url} with a copy of {args.db}")
+        client = Client(url, stats)
+        if args.replay:
+            entries = load_replay(args.replay, args.read_only)
+            print(f"Replaying {len(entries)} requests with {args.concurrency} workers")
+            stats.recording = True
+            started = time.monotonic()
+            run_replay(client, entries, args.concurrency, args.speed)
+        else:
+            roster = Roster(client)
+            mix = parse_mix(args.mix)
+            if args.read_only:
+                mix = {k: v for k, v in mix.items() if k not in WRITE_SCENARIOS}
+            print(f"{args.concurrency} users, mix {mix}, {len(roster.employees)} employees")
+            if args.warmup:
+                run_mix(client, roster, mix, args.concurrency, args.warmup, args.think_ms, args.read_only, args.seed)
+            stats.recording = True
+            started = time.monotonic()
+            run_mix(client, roster, mix, args.concurrency, args.duration, args.think_ms, args.read_only, args.seed)
+        stats.recording = False
+        report = stats.report(time.monotonic() - started)
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=10)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as fh:
+            json.dump(report, fh, indent=2)
+    failed = False
+    if args.max_p95_ms is not None and report['p95_ms'] > args.max_p95_ms:
+        print(f"FAIL: p95 {report['p95_ms']} ms is over {args.max_p95_ms} ms")
+        failed = True
+    if args.max_error_rate is not None and report['error_rate'] > args.max_error_rate:
+        print(f"FAIL: error rate {report['error_rate']:.2%} is over {args.max_error_rate:.2%}")
+        failed = True
+    return 1 if failed else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Replay front-end load against the app')
+    sub = parser.add_subparsers(dest='command', required=True)
+    r = sub.add_parser('run')
+    r.add_argument('--url', help='test a running server instead of starting one')
+    r.add_argument('--db', default=str(DEFAULT_DB), help='seed database, copied before the run')
+    r.add_argument('--scale', type=int, default=1, help='multiply the seeded roster')
+    r.add_argument('--concurrency', type=int, default=10)
+    r.add_argument('--duration', type=float, default=30, help='seconds measured')
+    r.add_argument('--warmup', type=float, default=5, help='seconds run before measuring')
+    r.add_argument('--think-ms', type=float, default=250, help='mean pause between a user\'s scenarios')
+    r.add_argument('--mix', help='scenario weights, e.g. schedule=4,insights=2,cell_edit=1')
+    r.add_argument('--read-only', action='store_true', help='skip writes (use with --url against shared servers)')
+    r.add_argument('--replay', help='JSONL request log recorded with REQUEST_LOG_PATH')
+    r.add_argument('--speed', type=float, default=1.0, help='replay pacing multiplier; 0 = as fast as possible')
+    r.add_argument('--seed', type=int, default=1)
+    r.add_argument('--json', help='write the report here')
+    r.add_argument('--max-p95-ms', type=float)
+    r.add_argument('--max-error-rate', type=float)
+    s = sub.add_parser('serve')
+    s.add_argument('--db', required=True)
+    s.add_argument('--port', type=int, required=True)
+    s.add_argument('--scale', type=int, default=1)
+    args = parser.parse_args(argv)
+    if args.command == 'serve':
+        serve(args.db, args.port, args.scale)
+        return 0
+    return run(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
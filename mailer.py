@@ -0,0 +1,215 @@
+"""Outbound mail queue with a pooled background sender.
+
+Messages are queued by ``send`` and delivered by a daemon thread, so request
+handlers never wait on SMTP. The sender keeps one authenticated connection open
+across messages, folds queued messages that share a subject and body into a
+single multi-recipient transaction, and retries failures with exponential
+backoff before falling back to the console log. A folded message lists its
+recipients only in the SMTP envelope (Bcc-style), so nobody sees the other
+addresses.
+
+Configuration (environment):
+    SMTP_HOST, SMTP_PORT      - mail host; unset means console-only delivery
+    SMTP_USER, SMTP_PASSWORD  - optional; login is skipped when either is missing
+    SMTP_USE_TLS              - STARTTLS before login (default 1)
+    FROM_EMAIL                - envelope/header sender
+    SMTP_MAX_RETRIES          - delivery attempts per batch (default 3)
+    SMTP_IDLE_SECONDS         - close the pooled connection after this idle time (default 30)
+
+For local runs and tests point the sender at a debugging server, e.g.::
+
+    python -m aiosmtpd -n -l localhost:1025
+    SMTP_HOST=localhost SMTP_PORT=1025 SMTP_USE_TLS=0
+"""
+
+from __future__ import annotations
+
+import os
+import queue
+import threading
+import time
+from typing import TYPE_CHECKING, Iterable, List, Optional, Union
+
+if TYPE_CHECKING:
+    import smtplib
+
+Recipients = Union[str, Iterable[str]]
+
+
+class OutboundMessage:
+    __slots__ = ('recipients', 'subject', 'body', 'attempts')
+
+    def __init__(self, recipients: List[str], subject: str, body: str):
+        self.recipients = recipients
+        self.subject = subject
+        self.body = body
+        self.attempts = 0
+
+
+class Mailer:
+    """Queue-backed SMTP sender that reuses one connection across messages."""
+
+    def __init__(self, host: Optional[str] = None, port: int = 0, user: Optional[str] = None,
+                 password: Optional[str] = None, use_tls: bool = True, from_addr: Optional[str] = None,
+                 max_retries: int = 3, backoff_seconds: float = 1.0, idle_seconds: float = 30.0,
+                 batch_size: int = 50, timeout: float = 10.0):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.use_tls = use_tls
+        self.from_addr = from_addr or user or 'no-reply@shiftline.local'
+        self.max_retries = max(1, max_retries)
+        self.backoff_seconds = backoff_seconds
+        self.idle_seconds = idle_seconds
+        self.batch_size = max(1, batch_size)
+        self.timeout = timeout
+        self._queue: 'queue.Queue[OutboundMessage]' = queue.Queue()
+        self._conn: Optional[smtplib.SMTP] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.sent_count = 0
+        self.failed_count = 0
+
+    @classmethod
+    def from_env(cls) -> 'Mailer':
+        user = os.getenv('SMTP_USER')
+        return cls(
+            host=os.getenv('SMTP_HOST'),
+            port=int(os.getenv('SMTP_PORT', '0') or '0'),
+            user=user,
+            password=os.getenv('SMTP_PASSWORD'),
+            use_tls=os.getenv('SMTP_USE_TLS', '1').lower() in ['1', 'true', 'yes'],
+            from_addr=os.getenv('FROM_EMAIL', user or 'no-reply@shiftline.local'),
+            max_retries=int(os.getenv('SMTP_MAX_RETRIES', '3') or '3'),
+            idle_seconds=float(os.getenv('SMTP_IDLE_SECONDS', '30') or '30'),
+        )
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.host and self.port)
+
+    # --- Public API ---
+    def send(self, recipients: Recipients, subject: str, body: str) -> None:
+        """Queue a message for background delivery. Returns immediately."""
+        if isinstance(recipients, str):
+            recipients = [recipients]
+        to_list = [r.strip() for r in recipients if r and r.strip()]
+        if not to_list:
+            return
+        self._ensure_worker()
+        self._queue.put(OutboundMessage(to_list, subject, body))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until every queued message has been handled. Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    # --- Worker ---
+    def _ensure_worker(self) -> None:
+        # Started lazily so forked web workers each get their own live thread
+        if self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='shiftline-mailer', daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                first = self._queue.get(timeout=self.idle_seconds)
+            except queue.Empty:
+                self._close()
+                continue
+            batch = [first]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                for msg in self._coalesce(batch):
+                    self._deliver(msg)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    @staticmethod
+    def _coalesce(batch: List[OutboundMessage]) -> List[OutboundMessage]:
+        """Merge queued messages with identical subject and body into one multi-recipient message."""
+        merged = {}
+        for msg in batch:
+            key = (msg.subject, msg.body)
+            if key in merged:
+                for r in msg.recipients:
+                    if r not in merged[key].recipients:
+                        merged[key].recipients.append(r)
+            else:
+                merged[key] = OutboundMessage(list(msg.recipients), msg.subject, msg.body)
+        return list(merged.values())
+
+    def _deliver(self, msg: OutboundMessage) -> None:
+        if not self.configured:
+            self._log_to_console(msg)
+            return
+        # smtplib/email are imported on first delivery so importing the app stays cheap
+        from email.mime.text import MIMEText
+        while True:
+            msg.attempts += 1
+            try:
+                conn = self._connection()
+                mime = MIMEText(msg.body)
+                mime['Subject'] = msg.subject
+                mime['From'] = self.from_addr
+                # Recipients of a folded message go in the envelope only; the header would expose them to each other
+                mime['To'] = msg.recipients[0] if len(msg.recipients) == 1 else 'undisclosed-recipients:;'
+                conn.sendmail(self.from_addr, msg.recipients, mime.as_string())
+                self.sent_count += 1
+                return
+            except Exception as ex:
+                self._close()
+                if msg.attempts >= self.max_retries:
+                    self.failed_count += 1
+                    print(f"[Email fallback] SMTP failed after {msg.attempts} attempts: {ex}")
+                    self._log_to_console(msg)
+                    return
+                time.sleep(self.backoff_seconds * (2 ** (msg.attempts - 1)))
+
+    def _connection(self) -> smtplib.SMTP:
+        import smtplib
+        if self._conn is not None:
+            try:
+                self._conn.noop()
+                return self._conn
+            except (smtplib.SMTPException, OSError):
+                self._close()
+        conn = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.use_tls:
+            conn.starttls()
+        if self.user and self.password:
+            conn.login(self.user, self.password)
+        self._conn = conn
+        return conn
+
+    def _close(self) -> None:
+        if self._conn is None:
+            return
+        try:
+            self._conn.quit()
+        except Exception:
+            pass
+        self._conn = None
+
+    @staticmethod
+    def _log_to_console(msg: OutboundMessage) -> None:
+        print("=== EMAIL NOTIFICATION ===")
+        print(f"To: {', '.join(msg.recipients)}")
+        print(f"Subject: {msg.subject}")
+        print(msg.body)
+        print("==========================")
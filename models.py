@@ -0,0 +1,540 @@
+"""SQLAlchemy models, the schedule version counter and in-place schema upgrades."""
+
+import json
+from datetime import datetime
+
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.orm import with_loader_criteria
+
+from extensions import db
+from schedule_metrics import week_metrics
+from shift_parser import ShiftStatus, parse_shift, parse_time, parse_time_range
+from sites import DEFAULT_CRISIS_DEPARTMENT, DEFAULT_DEPARTMENTS, DEFAULT_SITE, current_site
+
+class SiteScoped:
+    """Rows that belong to one site (see sites.py). New rows get the current site; ORM queries
+    are filtered to it by _scope_to_site.
+    """
+    site = db.Column(db.String(40), nullable=False, default=current_site)
+
+class Site(db.Model):
+    """A call center served by this instance; see sites.py."""
+    code = db.Column(db.String(40), primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    departments = db.Column(db.Text, nullable=False, default='[]')  # JSON list of department header names
+    crisis_department = db.Column(db.String(100), nullable=False, default=DEFAULT_CRISIS_DEPARTMENT)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'code': self.code,
+            'name': self.name,
+            'departments': json.loads(self.departments or '[]'),
+            'crisis_department': self.crisis_department,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+class Employee(SiteScoped, db.Model):
+    __table_args__ = (db.Index('ix_employee_site_department', 'site', 'department'),)
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    position = db.Column(db.String(100))
+    supervisor = db.Column(db.String(100))
+    department = db.Column(db.String(100))
+    schedule = db.relationship('Schedule', backref='employee', uselist=False)
+    tasks = db.relationship('Task', backref='employee', lazy=True)
+    # Time off relationship for requests
+    time_off_requests = db.relationship('TimeOffRequest', backref='employee', lazy=True)
+
+    def to_dict(self):
+        schedule_data = self.schedule.to_dict() if self.schedule else {}
+        return {
+            'id': self.id,
+            'employee_name': self.name,
+            'position': self.position,
+            'supervisor': self.supervisor,
+            'department': self.department,
+            **schedule_data
+        }
+
+class Schedule(SiteScoped, db.Model):
+    __table_args__ = (db.Index('ix_schedule_site_employee', 'site', 'employee_id'),)
+    id = db.Column(db.Integer, primary_key=True)
+    employee_id = db.Column(db.Integer, db.ForeignKey('employee.id'), nullable=False)
+    saturday = db.Column(db.String(20))
+    sunday = db.Column(db.String(20))
+    monday = db.Column(db.String(20))
+    tuesday = db.Column(db.String(20))
+    wednesday = db.Column(db.String(20))
+    thursday = db.Column(db.String(20))
+    friday = db.Column(db.String(20))
+
+    def to_dict(self):
+        return {
+            'saturday': self.saturday,
+            'sunday': self.sunday,
+            'monday': self.monday,
+            'tuesday': self.tuesday,
+            'wednesday': self.wednesday,
+            'thursday': self.thursday,
+            'friday': self.friday
+        }
+        
+    def is_available(self, day_of_week, start_time, end_time):
+        """Check if employee is available on specified day and time"""
+        day_schedule = getattr(self, day_of_week.lower())
+        if not day_schedule:
+            # No schedule for this day, they're free
+            return True
+        parsed = parse_shift(day_schedule)
+        if parsed.status == ShiftStatus.INVALID:
+            # If we can't parse the schedule format, assume not available
+            return False
+        req_start = parse_time(start_time)
+        req_end = parse_time(end_time)
+        if req_start is None or req_end is None:
+            return False
+        if req_end <= req_start:
+            req_end += 24 * 60
+        # Check for overlap (not available if there's overlap)
+        return not any(req_start < e and req_end > s for s, e in parsed.intervals)
+
+class ScheduleColumnMeta(SiteScoped, db.Model):
+    """Per-site label, order and visibility of a day column."""
+    site = db.Column(db.String(40), primary_key=True, default=current_site)
+    day_key = db.Column(db.String(20), primary_key=True)
+    display_name = db.Column(db.String(40), nullable=False)
+    subtitle = db.Column(db.String(40))
+    is_visible = db.Column(db.Boolean, default=True)
+    sort_order = db.Column(db.Integer, default=0)
+
+    def to_dict(self):
+        return {
+            'day_key': self.day_key,
+            'display_name': self.display_name,
+            'subtitle': self.subtitle or '',
+            'is_visible': bool(self.is_visible),
+            'sort_order': self.sort_order
+        }
+
+class Task(SiteScoped, db.Model):
+    __table_args__ = (db.Index('ix_task_site_employee_day_start', 'site', 'employee_id', 'day_of_week', 'start_min'),)
+    id = db.Column(db.Integer, primary_key=True)
+    employee_id = db.Column(db.Integer, db.ForeignKey('employee.id'), nullable=False)
+    task_name = db.Column(db.String(100), nullable=False)
+    day_of_week = db.Column(db.String(10), nullable=False)
+    start_time = db.Column(db.String(10), nullable=False)
+    end_time = db.Column(db.String(10), nullable=False)
+    required_skill = db.Column(db.String(100))
+    # Parsed from start_time/end_time on every write (see _set_task_bounds); NULL when unparsable
+    start_min = db.Column(db.Integer)
+    end_min = db.Column(db.Integer)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'employee_id': self.employee_id,
+            'task_name': self.task_name,
+            'day_of_week': self.day_of_week,
+            'start_time': self.start_time,
+            'end_time': self.end_time,
+            'required_skill': self.required_skill,
+            'start_min': self.start_min,
+            'end_min': self.end_min
+        }
+
+@event.listens_for(Task, 'before_insert')
+@event.listens_for(Task, 'before_update')
+def _set_task_bounds(mapper, connection, task):
+    bounds = parse_time_range(task.start_time, task.end_time)
+    task.start_min, task.end_min = bounds if bounds else (None, None)
+
+class Announcement(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    title = db.Column(db.String(100), nullable=False)
+    content = db.Column(db.Text, nullable=False)
+    type = db.Column(db.String(20), default='normal')  # normal, important, urgent
+    date = db.Column(db.Date, default=datetime.now().date)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'title': self.title,
+            'content': self.content,
+            'type': self.type,
+            'date': self.date.isoformat() if self.date else None
+        }
+
+class TimeOffRequest(SiteScoped, db.Model):
+    __table_args__ = (db.Index('ix_time_off_request_site_employee', 'site', 'employee_id'),
+                      db.Index('ix_time_off_request_site_status', 'site', 'status'))
+    id = db.Column(db.Integer, primary_key=True)
+    employee_id = db.Column(db.Integer, db.ForeignKey('employee.id'), nullable=False)
+    request_type = db.Column(db.String(20), nullable=False)  # sick, vacation, pto
+    start_date = db.Column(db.String(20), nullable=False)
+    end_date = db.Column(db.String(20), nullable=False)
+    reason = db.Column(db.Text)
+    status = db.Column(db.String(20), default='pending')  # pending, approved, denied
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'employee_id': self.employee_id,
+            'employee_name': self.employee.name if self.employee else '',
+            'request_type': self.request_type,
+            'start_date': self.start_date,
+            'end_date': self.end_date,
+            'reason': self.reason,
+            'status': self.status
+        }
+
+class Suggestion(SiteScoped, db.Model):
+    __table_args__ = (db.Index('ix_suggestion_site_status_created', 'site', 'status', 'created_at'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    type = db.Column(db.String(64), nullable=False)  # coverage_backfill, burnout_mitigation
+    title = db.Column(db.String(255), nullable=False)
+    description = db.Column(db.Text, default='')
+    day_key = db.Column(db.String(16))  # saturday..friday
+    start_time = db.Column(db.String(16))
+    end_time = db.Column(db.String(16))
+    employee_id = db.Column(db.Integer, db.ForeignKey('employee.id'))
+    status = db.Column(db.String(16), default='pending')  # pending, approved, denied, expired
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime)
+    content_key = db.Column(db.String(40), unique=True, index=True)  # see _suggestion_key
+    schedule_version = db.Column(db.Integer)
+
+    employee = db.relationship('Employee')
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'type': self.type,
+            'title': self.title,
+            'description': self.description,
+            'day_key': self.day_key,
+            'start_time': self.start_time,
+            'end_time': self.end_time,
+            'employee_id': self.employee_id,
+            'employee_name': self.employee.name if self.employee else None,
+            'status': self.status,
+            'created_at': self.created_at.isoformat(),
+            'schedule_version': self.schedule_version
+        }
+
+class SuggestionArchive(SiteScoped, db.Model):
+    """Expired and long-decided suggestions moved out of the live table by _archive_suggestions."""
+    id = db.Column(db.Integer, primary_key=True)
+    type = db.Column(db.String(64), nullable=False)
+    title = db.Column(db.String(255), nullable=False)
+    description = db.Column(db.Text, default='')
+    day_key = db.Column(db.String(16))
+    start_time = db.Column(db.String(16))
+    end_time = db.Column(db.String(16))
+    employee_id = db.Column(db.Integer)
+    status = db.Column(db.String(16))
+    created_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime)
+    content_key = db.Column(db.String(40), index=True)
+    schedule_version = db.Column(db.Integer)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class NameMatchReview(SiteScoped, db.Model):
+    """An imported name that may be an existing employee under another spelling; see name_matching.py."""
+    __table_args__ = (db.Index('ix_name_match_review_site_status_created', 'site', 'status', 'created_at'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    imported_name = db.Column(db.String(200), nullable=False)
+    department = db.Column(db.String(100))
+    employee_id = db.Column(db.Integer, db.ForeignKey('employee.id'))  # created by the import
+    candidate_id = db.Column(db.Integer, db.ForeignKey('employee.id'))  # best existing match
+    confidence = db.Column(db.Float, nullable=False)
+    candidates = db.Column(db.Text, default='[]')  # JSON list of ranked matches
+    source = db.Column(db.String(16))  # upload, csv_script
+    status = db.Column(db.String(16), default='pending')  # pending, merged, distinct
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    resolved_at = db.Column(db.DateTime)
+
+    employee = db.relationship('Employee', foreign_keys=[employee_id])
+    candidate = db.relationship('Employee', foreign_keys=[candidate_id])
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'imported_name': self.imported_name,
+            'department': self.department,
+            'employee_id': self.employee_id,
+            'employee_name': self.employee.name if self.employee else None,
+            'candidate_id': self.candidate_id,
+            'candidate_name': self.candidate.name if self.candidate else None,
+            'confidence': self.confidence,
+            'candidates': json.loads(self.candidates or '[]'),
+            'source': self.source,
+            'status': self.status,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'resolved_at': self.resolved_at.isoformat() if self.resolved_at else None,
+        }
+
+class EmployeeAggregate(db.Model):
+    """Weekly workload for one employee (see schedule_metrics.py), rewritten in the same transaction
+    as every schedule write so rosters can be filtered and sorted by it in SQL.
+    Employees without a schedule row have no aggregate.
+    """
+    __table_args__ = tuple(db.Index(f'ix_employee_aggregate_{name}', name) for name in (
+        'weekly_minutes', 'workdays', 'night_shifts', 'weekend_minutes', 'rest_violations', 'max_heavy_streak'))
+    employee_id = db.Column(db.Integer, db.ForeignKey('employee.id'), primary_key=True)
+    weekly_minutes = db.Column(db.Integer, nullable=False, default=0)
+    workdays = db.Column(db.Integer, nullable=False, default=0)
+    night_shifts = db.Column(db.Integer, nullable=False, default=0)
+    weekend_minutes = db.Column(db.Integer, nullable=False, default=0)
+    rest_violations = db.Column(db.Integer, nullable=False, default=0)
+    max_heavy_streak = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'employee_id': self.employee_id,
+            'weekly_minutes': self.weekly_minutes,
+            'weekly_hours': round(self.weekly_minutes / 60.0, 1),
+            'workdays': self.workdays,
+            'night_shifts': self.night_shifts,
+            'weekend_minutes': self.weekend_minutes,
+            'rest_violations': self.rest_violations,
+            'max_heavy_streak': self.max_heavy_streak
+        }
+
+class StaffingRequirement(SiteScoped, db.Model):
+    """Minimum and preferred headcount for a department over [start_slot, end_slot) 30-minute slots.
+    day_key None applies to every day; rows for a specific day override it. See staffing.py.
+    """
+    __table_args__ = (db.Index('ix_staffing_requirement_site_department_day', 'site', 'department', 'day_key'),)
+    id = db.Column(db.Integer, primary_key=True)
+    department = db.Column(db.String(100), nullable=False)
+    day_key = db.Column(db.String(10))
+    start_slot = db.Column(db.Integer, nullable=False, default=0)
+    end_slot = db.Column(db.Integer, nullable=False, default=48)
+    min_staff = db.Column(db.Integer, nullable=False)
+    preferred_staff = db.Column(db.Integer, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'department': self.department,
+            'day_key': self.day_key,
+            'start_slot': self.start_slot,
+            'end_slot': self.end_slot,
+            'min_staff': self.min_staff,
+            'preferred_staff': self.preferred_staff,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+class ScheduleVersion(db.Model):
+    """Per-site counters: version is bumped whenever the site's Employee, Schedule or StaffingRequirement
+    rows are written, timeoff_version whenever its TimeOffRequest rows are.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    site = db.Column(db.String(40), unique=True, index=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    timeoff_version = db.Column(db.Integer, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+def _schedule_version(site=None) -> int:
+    version = db.session.execute(select(ScheduleVersion.version)
+                                 .where(ScheduleVersion.site == (site or current_site()))).scalar()
+    return version or 0
+
+def _timeoff_version(site=None) -> int:
+    version = db.session.execute(select(ScheduleVersion.timeoff_version)
+                                 .where(ScheduleVersion.site == (site or current_site()))).scalar()
+    return version or 0
+
+def _bump_site_counter(conn, site, column):
+    table = ScheduleVersion.__table__
+    now = datetime.utcnow()
+    result = conn.execute(table.update().where(table.c.site == site)
+                          .values({column: func.coalesce(table.c[column], 0) + 1, 'updated_at': now}))
+    if result.rowcount == 0:
+        conn.execute(table.insert().values({'site': site, 'version': 0, 'timeoff_version': 0, column: 1, 'updated_at': now}))
+
+def _bump_schedule_version(conn=None, site=None):
+    """Increment a site's schedule version (default: the current site's) on the current transaction's connection."""
+    _bump_site_counter(conn if conn is not None else db.session.connection(), site or current_site(), 'version')
+
+@event.listens_for(db.session, 'after_flush')
+def _bump_schedule_version_on_flush(session, flush_context):
+    roster_types = (Employee, Schedule, StaffingRequirement)
+    written = list(session.new) + list(session.deleted) + [obj for obj in session.dirty if session.is_modified(obj)]
+    changed = [obj for obj in written if isinstance(obj, roster_types)]
+    for site in sorted({obj.site or current_site() for obj in changed}):
+        _bump_schedule_version(session.connection(), site)
+    # Time off feeds predictive insights only, so it has its own counter and leaves rosters cached
+    timeoff = [obj for obj in written if isinstance(obj, TimeOffRequest)]
+    for site in sorted({obj.site or current_site() for obj in timeoff}):
+        _bump_site_counter(session.connection(), site, 'timeoff_version')
+
+# --- Site scoping (see sites.py) ---
+@event.listens_for(db.session, 'do_orm_execute')
+def _scope_to_site(state):
+    """Add site = <current site> to ORM SELECT, UPDATE and DELETE statements on site-scoped models,
+    including joined and aliased ones. execution_options(all_sites=True) opts out.
+    """
+    if state.is_column_load or state.is_relationship_load or state.execution_options.get('all_sites'):
+        return
+    if state.is_select or state.is_update or state.is_delete:
+        site = current_site()
+        state.statement = state.statement.options(
+            with_loader_criteria(SiteScoped, lambda cls: cls.site == site, include_aliases=True))
+
+AGGREGATE_BATCH = 500
+_AGGREGATE_DAYS = ('saturday', 'sunday', 'monday', 'tuesday', 'wednesday', 'thursday', 'friday')
+
+def _refresh_employee_aggregates(conn, employee_ids=None):
+    """Recompute employee_aggregate rows from schedule rows on conn's transaction.
+    employee_ids None rebuilds every row (use after bulk UPDATEs that bypass the ORM).
+    """
+    sched = Schedule.__table__
+    agg = EmployeeAggregate.__table__
+    if employee_ids is None:
+        conn.execute(agg.delete())
+        batches = [None]
+    else:
+        ids = sorted(set(employee_ids))
+        batches = [ids[i:i + AGGREGATE_BATCH] for i in range(0, len(ids), AGGREGATE_BATCH)]
+    now = datetime.utcnow()
+    for batch in batches:
+        q = select(sched.c.employee_id, *[sched.c[d] for d in _AGGREGATE_DAYS]).order_by(sched.c.employee_id, sched.c.id)
+        if batch is not None:
+            q = q.where(sched.c.employee_id.in_(batch))
+            conn.execute(agg.delete().where(agg.c.employee_id.in_(batch)))
+        values = {}
+        for row in conn.execute(q):
+            # An employee's first schedule row is the one the roster uses
+            if row[0] is None or row[0] in values:
+                continue
+            metrics = week_metrics([parse_shift(v) for v in row[1:]])
+            values[row[0]] = {'employee_id': row[0], 'updated_at': now, **metrics.aggregate_columns()}
+        if values:
+            conn.execute(agg.insert(), list(values.values()))
+
+@event.listens_for(db.session, 'after_flush')
+def _refresh_employee_aggregates_on_flush(session, flush_context):
+    employee_ids = set()
+    for obj in session.new:
+        if isinstance(obj, Schedule):
+            employee_ids.add(obj.employee_id)
+    for obj in session.dirty:
+        if isinstance(obj, Schedule) and session.is_modified(obj):
+            employee_ids.add(obj.employee_id)
+            # Reassigned to another employee: refresh the previous one too
+            history = inspect(obj).attrs.employee_id.history
+            employee_ids.update(history.deleted or ())
+    for obj in session.deleted:
+        if isinstance(obj, Schedule):
+            employee_ids.add(obj.employee_id)
+        elif isinstance(obj, Employee):
+            employee_ids.add(obj.id)
+    employee_ids.discard(None)
+    if employee_ids:
+        _refresh_employee_aggregates(session.connection(), employee_ids)
+
+# Single-site indexes replaced by the site-leading ones above
+_SUPERSEDED_INDEXES = ('ix_task_employee_day_start', 'ix_suggestion_status_created',
+                       'ix_name_match_review_status_created', 'ix_staffing_requirement_department_day')
+
+def _rekey_schedule_column_meta(conn):
+    """Rebuild schedule_column_meta keyed by (site, day_key); SQLite cannot change a primary key in place."""
+    table = ScheduleColumnMeta.__table__
+    conn.exec_driver_sql('ALTER TABLE schedule_column_meta RENAME TO schedule_column_meta_legacy')
+    table.create(bind=conn)
+    columns = ', '.join(c.name for c in table.columns if c.name != 'site')
+    conn.exec_driver_sql(f'INSERT INTO schedule_column_meta (site, {columns}) '
+                         f'SELECT ?, {columns} FROM schedule_column_meta_legacy', (DEFAULT_SITE,))
+    conn.exec_driver_sql('DROP TABLE schedule_column_meta_legacy')
+
+def _ensure_schema():
+    """Create missing tables and add columns introduced after a table was first created.
+    SQLite cannot add UNIQUE columns in place, so indexes are created separately afterwards.
+    Rows written before sites existed belong to DEFAULT_SITE.
+    """
+    db.create_all()
+    inspector = inspect(db.engine)
+    if 'site' not in {c['name'] for c in inspector.get_columns('schedule_column_meta')}:
+        with db.engine.begin() as conn:
+            _rekey_schedule_column_meta(conn)
+        inspector = inspect(db.engine)
+    with db.engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            present = {c['name'] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in present:
+                    continue
+                col_type = column.type.compile(dialect=db.engine.dialect)
+                conn.exec_driver_sql(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {col_type}')
+            if 'site' in table.c and 'site' not in present:
+                conn.execute(table.update().where(table.c.site.is_(None)).values(site=DEFAULT_SITE))
+        for name in _SUPERSEDED_INDEXES:
+            conn.exec_driver_sql(f'DROP INDEX IF EXISTS "{name}"')
+        site = Site.__table__
+        if conn.execute(select(site.c.code).where(site.c.code == DEFAULT_SITE)).first() is None:
+            conn.execute(site.insert().values(code=DEFAULT_SITE, name=DEFAULT_SITE, departments=json.dumps(DEFAULT_DEPARTMENTS),
+                                              crisis_department=DEFAULT_CRISIS_DEPARTMENT, created_at=datetime.utcnow()))
+        for table in db.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=conn, checkfirst=True)
+        # Parse minute bounds for tasks written before the columns existed
+        task = Task.__table__
+        pending = conn.execute(select(task.c.id, task.c.day_of_week, task.c.start_time, task.c.end_time)
+                               .where(task.c.start_min.is_(None))).all()
+        for task_id, day, start, end in pending:
+            bounds = parse_time_range(start, end)
+            if bounds:
+                day = day.strip().capitalize() if day else day
+                conn.execute(task.update().where(task.c.id == task_id)
+                             .values(day_of_week=day, start_min=bounds[0], end_min=bounds[1]))
+        # Fill employee_aggregate for databases written before it existed
+        sched = Schedule.__table__
+        scheduled = conn.execute(select(func.count(func.distinct(sched.c.employee_id)))).scalar()
+        aggregated = conn.execute(select(func.count()).select_from(EmployeeAggregate.__table__)).scalar()
+        if scheduled != aggregated:
+            _refresh_employee_aggregates(conn)
+
+class InsightsSnapshot(SiteScoped, db.Model):
+    __table_args__ = (db.Index('ix_insights_snapshot_site_version', 'site', 'version'),)
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, index=True)
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    source = db.Column(db.String(16), default='on_demand')  # scheduled, on_demand
+    schedule_version = db.Column(db.Integer)  # site schedule version the snapshot was computed from
+    timeoff_version = db.Column(db.Integer)  # site time-off version it was computed from
+    week_start = db.Column(db.String(10))  # ISO date of the Saturday starting the week it describes
+    payload = db.Column(db.Text, nullable=False)  # serialized /api/predictive-insights response
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'version': self.version,
+            'schedule_version': self.schedule_version,
+            'timeoff_version': self.timeoff_version,
+            'week_start': self.week_start,
+            'computed_at': self.computed_at.isoformat() if self.computed_at else None,
+            'source': self.source
+        }
+
+class SchedulerLease(db.Model):
+    """Leader lease for a background runtime; see scheduler_runtime.py."""
+    name = db.Column(db.String(64), primary_key=True)
+    holder = db.Column(db.String(128), nullable=False)
+    acquired_at = db.Column(db.DateTime, nullable=False)
+    heartbeat_at = db.Column(db.DateTime, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'holder': self.holder,
+            'acquired_at': self.acquired_at.isoformat() if self.acquired_at else None,
+            'heartbeat_at': self.heartbeat_at.isoformat() if self.heartbeat_at else None,
+            'expires_at': self.expires_at.isoformat() if self.expires_at else None,
+        }
@@ -0,0 +1,340 @@
+"""Fuzzy matching of imported names against existing employees.
+
+Exact matching on a normalized name turns "Frank Isaza" and "Francisco Isaza",
+or "Carolyn (Renae) Griggs" and "Carolyn Griggs", into two employees. Scoring
+every imported name against every employee would be quadratic. ``NameIndex``
+is built once per import over the existing roster and narrows each lookup
+to a handful of candidates:
+
+- a blocking index on (department, surname, first initial), which also
+  covers the initials of nicknames and parenthesized alternates, and
+- a character trigram inverted index, which catches misspelled surnames and
+  names missing a surname. Trigrams shared by a large part of a big roster
+  are skipped.
+
+Each candidate gets a confidence in [0, 1]. The score combines surname and
+given-name similarity. Names are compared by edit distance with a cutoff,
+with extra credit for common prefixes ("fran"), known nicknames and initials.
+
+At AUTO_MATCH_CONFIDENCE or above, an import updates the existing employee.
+Between REVIEW_CONFIDENCE and that, the import creates the employee as before
+and queues a NameMatchReview, so a person can merge the pair or mark them
+distinct (``merge_employee``).
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import update
+
+from extensions import db
+from models import Employee, NameMatchReview, Schedule, Suggestion, Task, TimeOffRequest
+
+AUTO_MATCH_CONFIDENCE = 0.9
+REVIEW_CONFIDENCE = 0.75
+MAX_CANDIDATES = 5
+# Candidates taken from the trigram index per lookup, best overlap first
+TRIGRAM_CANDIDATES = 20
+TRIGRAM_MIN_OVERLAP = 0.4
+# Trigrams in more than this share of a roster larger than STOP_GRAM_MIN_ROSTER say nothing
+STOP_GRAM_FRACTION = 0.25
+STOP_GRAM_MIN_ROSTER = 200
+
+# Common diminutives, grouped; any two names in a group count as the same given name
+NICKNAME_GROUPS = (
+    ('alexander', 'alexandra', 'alex', 'alejandro', 'alejandra', 'xander'),
+    ('robert', 'roberto', 'rob', 'bob', 'bobby', 'bobbi', 'roberta'),
+    ('william', 'will', 'bill', 'billy', 'liam', 'guillermo'),
+    ('francisco', 'frank', 'frankie', 'franklin', 'pancho', 'paco', 'francis', 'fran'),
+    ('jose', 'joseph', 'joe', 'joey', 'pepe'),
+    ('elizabeth', 'liz', 'lizzie', 'beth', 'betty', 'eliza'),
+    ('katherine', 'kathryn', 'catherine', 'kate', 'katie', 'kathy', 'cathy', 'kat'),
+    ('margaret', 'maggie', 'meg', 'peggy', 'margarita', 'marge'),
+    ('michael', 'mike', 'mikey', 'miguel'),
+    ('richard', 'rick', 'ricky', 'rich', 'ricardo'),
+    ('james', 'jim', 'jimmy', 'jamie'),
+    ('jennifer', 'jen', 'jenny', 'jenn'),
+    ('christopher', 'chris', 'cristobal'),
+    ('christina', 'christine', 'tina'),
+    ('rebecca', 'becky', 'becca'),
+    ('victoria', 'vicky', 'vicki', 'tori'),
+    ('patricia', 'patty', 'trish'),
+    ('samantha', 'sam', 'sammy'),
+    ('teresa', 'theresa', 'terry', 'tere', 'teresita'),
+    ('daniel', 'dan', 'danny'),
+    ('anthony', 'tony', 'antonio'),
+    ('edward', 'ed', 'eddie', 'eduardo', 'ted'),
+    ('kimberley', 'kimberly', 'kim'),
+    ('rachael', 'rachel', 'raquel'),
+    ('stephanie', 'steph', 'stefanie'),
+    ('stephen', 'steven', 'steve'),
+    ('tammy', 'tamara'),
+    ('cynthia', 'cindy'),
+    ('joanne', 'joann', 'joanna', 'jo'),
+)
+_NICKNAMES: Dict[str, Set[int]] = {}
+for _group_id, _group in enumerate(NICKNAME_GROUPS):
+    for _name in _group:
+        _NICKNAMES.setdefault(_name, set()).add(_group_id)
+
+_PAREN_RE = re.compile(r'\(([^)]*)\)')
+_NON_NAME_RE = re.compile(r"[^a-z\s-]")
+_SPACE_RE = re.compile(r'\s+')
+
+
+def _fold(text: str) -> str:
+    """Lowercase ASCII with accents removed."""
+    return unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode().lower()
+
+
+class NameKey:
+    """A name split for matching: given name, surname ('' for a single name) and alternates."""
+    __slots__ = ('given', 'surname', 'alternates', 'full')
+
+    def __init__(self, raw: str):
+        text = _fold(str(raw or ''))
+        alternates = []
+        for inner in _PAREN_RE.findall(text):
+            alternates.extend(_SPACE_RE.sub(' ', _NON_NAME_RE.sub(' ', inner)).split())
+        text = _PAREN_RE.sub(' ', text)
+        # "Isaza, Francisco" -> "francisco isaza"
+        if text.count(',') == 1:
+            last, first = text.split(',')
+            text = f'{first} {last}'
+        tokens = _SPACE_RE.sub(' ', _NON_NAME_RE.sub(' ', text)).strip().split()
+        tokens = [t.strip('-') for t in tokens if t.strip('-')]
+        self.given = tokens[0] if tokens else ''
+        self.surname = tokens[-1] if len(tokens) > 1 else ''
+        self.alternates = tuple(a for a in alternates if a != self.given)
+        self.full = ' '.join(tokens)
+
+    @property
+    def given_names(self) -> Tuple[str, ...]:
+        return (self.given,) + self.alternates if self.given else self.alternates
+
+    def trigrams(self) -> Set[str]:
+        padded = f'  {self.full} '
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def levenshtein(a: str, b: str, max_distance: Optional[int] = None) -> int:
+    """Edit distance, stopping early (returning max_distance + 1) once it must exceed max_distance."""
+    if a == b:
+        return 0
+    if len(a) < len(b):
+        a, b = b, a
+    if max_distance is None:
+        max_distance = len(a)
+    if len(a) - len(b) > max_distance:
+        return max_distance + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        best = i
+        for j, cb in enumerate(b, 1):
+            cost = previous[j - 1] + (ca != cb)
+            cost = min(cost, previous[j] + 1, current[j - 1] + 1)
+            current.append(cost)
+            if cost < best:
+                best = cost
+        if best > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+
+def _similarity(a: str, b: str) -> float:
+    """1 - normalized edit distance, 0 for empty or clearly different strings."""
+    if not a or not b:
+        return 0.0
+    longest = max(len(a), len(b))
+    # Distances beyond half the length score 0 anyway
+    distance = levenshtein(a, b, longest // 2)
+    return max(0.0, 1.0 - distance / longest)
+
+
+def _given_similarity(a: str, b: str) -> float:
+    if a == b:
+        return 1.0
+    if _NICKNAMES.get(a, set()) & _NICKNAMES.get(b, set()):
+        return 0.95
+    if len(a) == 1 or len(b) == 1:
+        return 0.75 if a[0] == b[0] else 0.0
+    shorter = min(len(a), len(b))
+    prefix = 0
+    while prefix < shorter and a[prefix] == b[prefix]:
+        prefix += 1
+    if prefix >= 3 and prefix >= 0.75 * shorter:
+        return 0.9
+    return _similarity(a, b)
+
+
+def _surname_similarity(a: str, b: str) -> float:
+    if a == b:
+        return 1.0
+    # Hyphenated surnames: "mann-kelly" vs "kelly", or "ben-lulu" vs "benlulu"
+    parts_a, parts_b = set(a.split('-')), set(b.split('-'))
+    if a.replace('-', '') == b.replace('-', ''):
+        return 0.98
+    if parts_a & parts_b:
+        return 0.9
+    return _similarity(a.replace('-', ''), b.replace('-', ''))
+
+
+def score(query: NameKey, candidate: NameKey) -> float:
+    """Confidence that two names refer to the same person."""
+    if query.full and query.full == candidate.full:
+        return 1.0
+    given = max((_given_similarity(a, b) for a in query.given_names for b in candidate.given_names), default=0.0)
+    if query.surname and candidate.surname:
+        return round(0.55 * _surname_similarity(query.surname, candidate.surname) + 0.45 * given, 3)
+    if query.surname or candidate.surname:
+        # "Carolyn" vs "Carolyn Griggs": plausible, never certain
+        return round(0.8 * given, 3)
+    return round(0.9 * given, 3)
+
+
+class NameMatch:
+    __slots__ = ('employee_id', 'name', 'department', 'confidence')
+
+    def __init__(self, employee_id: int, name: str, department: Optional[str], confidence: float):
+        self.employee_id = employee_id
+        self.name = name
+        self.department = department
+        self.confidence = confidence
+
+    def to_dict(self) -> dict:
+        return {'employee_id': self.employee_id, 'name': self.name, 'department': self.department,
+                'confidence': self.confidence}
+
+
+def _department_key(department: Optional[str]) -> str:
+    return (department or '').strip().lower()
+
+
+class NameIndex:
+    """Blocking and trigram indexes over a roster, built once and queried per imported name."""
+
+    def __init__(self, people: Iterable[Tuple[int, str, Optional[str]]]):
+        self._people: Dict[int, Tuple[str, Optional[str], NameKey]] = {}
+        self._blocks: Dict[tuple, List[int]] = {}
+        self._grams: Dict[str, List[int]] = {}
+        for employee_id, name, department in people:
+            key = NameKey(name)
+            self._people[employee_id] = (name, department, key)
+            dept = _department_key(department)
+            for given in key.given_names:
+                self._blocks.setdefault((dept, key.surname, given[:1]), []).append(employee_id)
+            for gram in key.trigrams():
+                self._grams.setdefault(gram, []).append(employee_id)
+        size = len(self._people)
+        self._stop_size = int(size * STOP_GRAM_FRACTION) if size > STOP_GRAM_MIN_ROSTER else None
+
+    @classmethod
+    def from_roster(cls) -> 'NameIndex':
+        """Index every employee, reading only id, name and department."""
+        rows = db.session.execute(db.select(Employee.id, Employee.name, Employee.department))
+        return cls((row.id, row.name, row.department) for row in rows)
+
+    def __len__(self) -> int:
+        return len(self._people)
+
+    def _candidates(self, key: NameKey, dept: Optional[str]) -> Set[int]:
+        found = set()
+        for given in key.given_names:
+            found.update(self._blocks.get((dept, key.surname, given[:1]), ()))
+        grams = key.trigrams()
+        overlap: Dict[int, int] = {}
+        for gram in grams:
+            posting = self._grams.get(gram, ())
+            if self._stop_size is not None and len(posting) > self._stop_size:
+                continue
+            for employee_id in posting:
+                overlap[employee_id] = overlap.get(employee_id, 0) + 1
+        needed = TRIGRAM_MIN_OVERLAP * len(grams)
+        ranked = sorted((n, i) for i, n in overlap.items() if n >= needed)
+        found.update(i for _, i in ranked[-TRIGRAM_CANDIDATES:])
+        if dept is not None:
+            found = {i for i in found if _department_key(self._people[i][1]) == dept}
+        return found
+
+    def match(self, name: str, department: Optional[str] = None, limit: int = MAX_CANDIDATES,
+              min_confidence: float = REVIEW_CONFIDENCE) -> List[NameMatch]:
+        """Ranked matches at or above min_confidence; department, when given, must agree."""
+        key = NameKey(name)
+        if not key.full:
+            return []
+        dept = _department_key(department) if department is not None else None
+        matches = []
+        for employee_id in self._candidates(key, dept):
+            stored_name, stored_department, stored_key = self._people[employee_id]
+            confidence = score(key, stored_key)
+            if confidence >= min_confidence:
+                matches.append(NameMatch(employee_id, stored_name, stored_department, confidence))
+        matches.sort(key=lambda m: (-m.confidence, m.employee_id))
+        return matches[:limit]
+
+    def match_any(self, names: Iterable[str], department: Optional[str] = None,
+                  limit: int = MAX_CANDIDATES) -> List[NameMatch]:
+        """Best match per employee over several spellings of one name (e.g. raw and as stored)."""
+        best: Dict[int, NameMatch] = {}
+        for name in dict.fromkeys(n for n in names if n):
+            for m in self.match(name, department, limit):
+                if m.employee_id not in best or m.confidence > best[m.employee_id].confidence:
+                    best[m.employee_id] = m
+        return sorted(best.values(), key=lambda m: (-m.confidence, m.employee_id))[:limit]
+
+
+# --- Review queue ---
+
+def queue_review(imported_name: str, department: Optional[str], employee: Employee,
+                 matches: List[NameMatch], source: str) -> NameMatchReview:
+    """Record a possible duplicate for a person to merge or dismiss. The caller commits."""
+    review = NameMatchReview(
+        imported_name=imported_name,
+        department=department,
+        employee=employee,
+        candidate_id=matches[0].employee_id,
+        confidence=matches[0].confidence,
+        candidates=json.dumps([m.to_dict() for m in matches]),
+        source=source,
+        status='pending',
+    )
+    db.session.add(review)
+    return review
+
+
+def merge_employee(source: Employee, target: Employee) -> None:
+    """Fold source (usually the row an import just created) into target. The caller commits.
+
+    Schedule days and profile fields set on source win, since they are the
+    newer data. Tasks, time off, suggestions and reviews move to target.
+    """
+    if source.id == target.id:
+        return
+    for field in ('position', 'supervisor'):
+        value = getattr(source, field)
+        if value:
+            setattr(target, field, value)
+    if source.schedule is not None:
+        schedule = target.schedule
+        if schedule is None:
+            schedule = Schedule(employee_id=target.id)
+            db.session.add(schedule)
+        for day in ('saturday', 'sunday', 'monday', 'tuesday', 'wednesday', 'thursday', 'friday'):
+            value = getattr(source.schedule, day)
+            if value is not None:
+                setattr(schedule, day, value)
+        db.session.delete(source.schedule)
+    for model in (Task, TimeOffRequest, Suggestion):
+        db.session.execute(update(model).where(model.employee_id == source.id).values(employee_id=target.id),
+                           execution_options={'synchronize_session': False})
+    db.session.execute(update(NameMatchReview).where(NameMatchReview.candidate_id == source.id)
+                       .values(candidate_id=target.id), execution_options={'synchronize_session': False})
+    db.session.execute(update(NameMatchReview).where(NameMatchReview.employee_id == source.id)
+                       .values(employee_id=target.id), execution_options={'synchronize_session': False})
+    db.session.delete(source)
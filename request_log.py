@@ -0,0 +1,50 @@
+"""Record API requests to a JSONL file for replay by loadtest.py.
+
+Off unless REQUEST_LOG_PATH is set. Each /api/ request is written as one line
+with its method, path and query, JSON body, response status and the time
+since the first recorded request. The event stream and multipart uploads are
+skipped, since neither can be replayed as recorded.
+
+    REQUEST_LOG_PATH=requests.log python app.py
+    python loadtest.py run --replay requests.log
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+
+from flask import request
+
+SKIPPED_PATHS = ('/api/events',)
+
+
+def init_request_log(app) -> None:
+    path = os.getenv('REQUEST_LOG_PATH')
+    if not path:
+        return
+    lock = threading.Lock()
+    started = []
+
+    @app.after_request
+    def _record_request(response):
+        if not request.path.startswith('/api/') or request.path.startswith(SKIPPED_PATHS):
+            return response
+        if request.mimetype == 'multipart/form-data':
+            return response
+        now = time.monotonic()
+        with lock:
+            if not started:
+                started.append(now)
+            entry = {
+                't': round(now - started[0], 4),
+                'method': request.method,
+                'path': request.full_path.rstrip('?'),
+                'body': request.get_json(silent=True),
+                'status': response.status_code,
+            }
+            with open(path, 'a', encoding='utf-8') as fh:
+                fh.write(json.dumps(entry) + '\n')
+        return response
@@ -1,8 +1,16 @@
+"""Replay Cleaned_Schedule_Data.csv into the roster row by row.
+
+To roll back to an earlier state, restoring a snapshot is much faster:
+``python snapshot_db.py list`` then ``python snapshot_db.py restore <name>``.
+"""
 import csv
-from app import db, Employee, Schedule
+from app import app, db, Employee, Schedule, _ensure_schema
+from snapshots import auto_snapshot
 
 def restore_schedule():
-    with open('Cleaned_Schedule_Data.csv', 'r') as file:
+    with app.app_context(), open('Cleaned_Schedule_Data.csv', 'r') as file:
+        _ensure_schema()
+        auto_snapshot('pre-import')
         reader = csv.DictReader(file)
         for row in reader:
             if row['Name'] and row['Position']:
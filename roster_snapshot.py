@@ -0,0 +1,125 @@
+"""Immutable in-memory roster read model.
+
+A ``RosterSnapshot`` holds every employee with their raw and parsed weekly
+shifts, built from one flat query and tagged with the schedule version it was
+read at. ``RosterCache`` keeps the current snapshot per key (the site) and
+rebuilds one only when that key's schedule version moves, swapping the
+reference in one assignment, so readers never lock and never see a half-built
+roster. Each key rebuilds under its own lock, so a large site's rebuild never
+holds up another site. Snapshots are shared between threads and must be
+treated as read-only.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+from shift_parser import ParsedShift, parse_shift
+
+DAY_KEYS = ('saturday', 'sunday', 'monday', 'tuesday', 'wednesday', 'thursday', 'friday')
+DAY_INDEX = {day: idx for idx, day in enumerate(DAY_KEYS)}
+
+
+class RosterEntry:
+    """One employee and their week. shifts/parsed are None when the employee has no schedule row."""
+    __slots__ = ('id', 'name', 'position', 'supervisor', 'department', 'shifts', 'parsed')
+
+    def __init__(self, id: int, name: str, position: Optional[str], supervisor: Optional[str],
+                 department: Optional[str], shifts: Optional[Tuple[Optional[str], ...]]):
+        self.id = id
+        self.name = name
+        self.position = position
+        self.supervisor = supervisor
+        self.department = department
+        self.shifts = shifts
+        self.parsed: Optional[Tuple[ParsedShift, ...]] = tuple(parse_shift(s) for s in shifts) if shifts is not None else None
+
+    @property
+    def has_schedule(self) -> bool:
+        return self.shifts is not None
+
+    def shift(self, day_key: str) -> Optional[str]:
+        return self.shifts[DAY_INDEX[day_key]] if self.shifts is not None else None
+
+    def parsed_shift(self, day_key: str) -> ParsedShift:
+        if self.parsed is None:
+            return parse_shift(None)
+        return self.parsed[DAY_INDEX[day_key]]
+
+    def to_dict(self) -> dict:
+        """Same shape as Employee.to_dict()."""
+        out = {
+            'id': self.id,
+            'employee_name': self.name,
+            'position': self.position,
+            'supervisor': self.supervisor,
+            'department': self.department,
+        }
+        if self.shifts is not None:
+            out.update(zip(DAY_KEYS, self.shifts))
+        return out
+
+
+class RosterSnapshot:
+    __slots__ = ('version', 'built_at', 'entries', 'by_id', 'by_department', '_memo')
+
+    def __init__(self, version: int, entries: Iterable[RosterEntry]):
+        self.version = version
+        self.built_at = time.time()
+        self.entries: Tuple[RosterEntry, ...] = tuple(entries)
+        self.by_id: Dict[int, RosterEntry] = {e.id: e for e in self.entries}
+        by_department: Dict[Optional[str], list] = {}
+        for e in self.entries:
+            by_department.setdefault(e.department, []).append(e)
+        self.by_department: Dict[Optional[str], Tuple[RosterEntry, ...]] = {k: tuple(v) for k, v in by_department.items()}
+        self._memo: Dict[Hashable, Any] = {}
+
+    def get(self, employee_id: int) -> Optional[RosterEntry]:
+        return self.by_id.get(employee_id)
+
+    def department(self, name: Optional[str]) -> Tuple[RosterEntry, ...]:
+        return self.by_department.get(name, ())
+
+    def memo(self, key: Hashable, build: Callable[[], Any]) -> Any:
+        """Return a value derived from this snapshot (e.g. an encoded response), building it once.
+        Two threads may race to build the same key; either result is equivalent.
+        """
+        try:
+            return self._memo[key]
+        except KeyError:
+            value = self._memo[key] = build()
+            return value
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+class RosterCache:
+    """Holds the current RosterSnapshot per key and rebuilds it when that key's schedule version changes."""
+
+    def __init__(self):
+        self._snapshots: Dict[Hashable, RosterSnapshot] = {}
+        self._locks: Dict[Hashable, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+        self.builds = 0
+
+    def get(self, version: int, loader: Callable[[], Iterable[RosterEntry]], key: Hashable = None) -> RosterSnapshot:
+        snap = self._snapshots.get(key)
+        if snap is not None and snap.version == version:
+            return snap
+        with self._locks_lock:
+            lock = self._locks.setdefault(key, threading.Lock())
+        with lock:
+            # Another thread may have rebuilt while we waited
+            snap = self._snapshots.get(key)
+            if snap is not None and snap.version == version:
+                return snap
+            snap = RosterSnapshot(version, loader())
+            self._snapshots[key] = snap
+            self.builds += 1
+            return snap
+
+    def invalidate(self, key: Hashable = None) -> None:
+        self._snapshots.pop(key, None)
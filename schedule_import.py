@@ -0,0 +1,308 @@
+"""Streaming schedule import from CSV files and Excel workbooks.
+
+Both formats feed one state machine (``import_rows``). Rows are read one at a
+time. A department header row (a known department name with every other cell
+empty) switches the current department, AVAILABLE SHIFTS ends the import, and
+every other named row becomes an Employee with a Schedule, or updates the
+existing employee its name matches (see name_matching.py).
+
+Workbooks are opened with openpyxl in ``read_only=True, data_only=True`` mode
+and rows are pulled lazily, so memory stays flat however large the workbook
+is. openpyxl is imported on first use to keep it out of worker startup.
+
+A sheet's header row is the first row (within HEADER_SCAN_ROWS) with a Name or
+Employee column. Day columns are matched by day name ("Saturday", "Sat 3/29")
+or by date cells. The week is detected from dates in the day headers, or from
+a "2025 Mar 29 - Apr 4" style sheet title.
+"""
+
+from __future__ import annotations
+
+import codecs
+import csv
+import re
+from datetime import date, datetime, timedelta
+from typing import IO, Any, Iterable, Iterator, List, Optional, Sequence
+
+from extensions import db
+from models import Employee, Schedule
+from name_matching import AUTO_MATCH_CONFIDENCE, NameIndex, queue_review
+from roster_snapshot import DAY_INDEX, DAY_KEYS
+from sites import site_departments
+
+# Department header rows come from the site's settings (see sites.py); this one always ends the import
+STOP_DEPARTMENT = 'AVAILABLE SHIFTS'
+
+HEADER_SCAN_ROWS = 25
+# Flushing in batches lets the session drop rows it has written, keeping memory flat
+IMPORT_FLUSH_EVERY = 500
+EXCEL_EXTENSIONS = ('.xlsx', '.xlsm')
+
+_DAY_PREFIXES = {day[:3]: day for day in DAY_KEYS}
+_MONTH_DAY = re.compile(r'\b(\d{1,2})/(\d{1,2})(?:/(\d{2,4}))?\b')
+_TITLE_DATE = re.compile(r'\b(\d{4})\s+([A-Za-z]{3})[A-Za-z]*\.?\s+(\d{1,2})\b')
+_MONTHS = {m: i for i, m in enumerate(('jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'), 1)}
+
+
+class ScheduleImportError(Exception):
+    """The file cannot be imported as given (no name column, unknown sheet, ...)."""
+
+
+def _is_blank(value: Any) -> bool:
+    return value is None or str(value).replace('\xa0', '').strip() == ''
+
+
+def _cell_text(value: Any) -> Optional[str]:
+    """Cell value as stripped text; whole-number floats lose their '.0'."""
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def _week_start(day_key: str, day: date) -> date:
+    return day - timedelta(days=DAY_INDEX[day_key])
+
+
+def week_from_title(title: Optional[str]) -> Optional[date]:
+    """Week start from a sheet or file name such as '2025 Mar 29 - Apr 4'."""
+    m = _TITLE_DATE.search(title or '')
+    if not m or m.group(2).lower() not in _MONTHS:
+        return None
+    try:
+        first = date(int(m.group(1)), _MONTHS[m.group(2).lower()], int(m.group(3)))
+    except ValueError:
+        return None
+    # The title names the first day shown; schedule weeks start on Saturday
+    return _week_start(DAY_KEYS[(first.weekday() + 2) % 7], first)
+
+
+class SheetLayout:
+    """Column positions found in a header row."""
+    __slots__ = ('labels', 'name_col', 'position_col', 'supervisor_col', 'department_col', 'day_cols', 'week_start')
+
+    def __init__(self, header: Sequence[Any], year_hint: Optional[int] = None):
+        self.labels = labels = [(_cell_text(h) or '') for h in header]
+        lookup = {}
+        for idx, label in enumerate(labels):
+            lookup.setdefault(label.lower(), idx)
+        self.name_col = lookup.get('employee', lookup.get('name'))
+        self.position_col = lookup.get('position')
+        self.supervisor_col = lookup.get('supervisor')
+        self.department_col = lookup.get('department')
+        self.day_cols = {}
+        self.week_start: Optional[date] = None
+        for idx, cell in enumerate(header):
+            if isinstance(cell, (datetime, date)):
+                day_value = cell.date() if isinstance(cell, datetime) else cell
+                day_key = DAY_KEYS[(day_value.weekday() + 2) % 7]
+            else:
+                word = re.split(r'[^A-Za-z]', labels[idx], maxsplit=1)[0].lower()
+                day_key = _DAY_PREFIXES.get(word[:3])
+                # "Sat", "Thurs" and "Saturday 3/29" match; "Position" or "Sunset" do not
+                if day_key is None or not day_key.startswith(word):
+                    continue
+                day_value = self._header_date(labels[idx], year_hint)
+            self.day_cols.setdefault(day_key, idx)
+            if day_value is not None and self.week_start is None:
+                self.week_start = _week_start(day_key, day_value)
+
+    @staticmethod
+    def _header_date(label: str, year_hint: Optional[int]) -> Optional[date]:
+        m = _MONTH_DAY.search(label)
+        if not m:
+            return None
+        year = int(m.group(3)) if m.group(3) else (year_hint or date.today().year)
+        if year < 100:
+            year += 2000
+        try:
+            return date(year, int(m.group(1)), int(m.group(2)))
+        except ValueError:
+            return None
+
+    @property
+    def valid(self) -> bool:
+        return self.name_col is not None
+
+
+def find_header(rows: Iterator[Sequence[Any]], year_hint: Optional[int] = None, scan: int = HEADER_SCAN_ROWS) -> Optional[SheetLayout]:
+    """Consume rows up to and including the header row; None when no header is found within scan rows."""
+    for _, row in zip(range(scan), rows):
+        layout = SheetLayout(row, year_hint)
+        if layout.valid:
+            return layout
+    return None
+
+
+def import_rows(layout: SheetLayout, rows: Iterable[Sequence[Any]], source: str = 'upload') -> dict:
+    """Run the department-header state machine over data rows and write employees to the session.
+
+    A row whose name confidently matches an employee of the same department
+    (see name_matching.py) updates that employee; each existing employee is
+    matched at most once per import. Other rows add employees, and a
+    plausible match queues a NameMatchReview. The caller commits. Returns
+    counts for the response.
+    """
+    def cell(row, idx):
+        return row[idx] if idx is not None and idx < len(row) else None
+
+    index = NameIndex.from_roster()
+    site_depts = site_departments()
+    header_names = {d.lower() for d in site_depts} | {STOP_DEPARTMENT.lower()}
+    # Before the first header row everyone belongs to the site's first department
+    default_department = site_depts[0]
+    claimed = set()
+    current_department = default_department
+    found_first_dept_header = False
+    added = 0
+    matched = 0
+    queued = 0
+    departments = set()
+    for row in rows:
+        # Skip blank rows
+        if all(_is_blank(v) for v in row):
+            continue
+        name_val = _cell_text(cell(row, layout.name_col)) or ''
+        # Detect department header
+        if (name_val.lower() in header_names
+                and all(_is_blank(v) for i, v in enumerate(row) if i != layout.name_col)):
+            current_department = name_val
+            found_first_dept_header = True
+            print(f"Found department: {current_department}")
+            if name_val.upper() == STOP_DEPARTMENT:
+                break
+            continue
+        # Skip rows with no employee name
+        if not name_val:
+            continue
+        department_val = _cell_text(cell(row, layout.department_col))
+        if not found_first_dept_header:
+            employee_department = default_department
+        elif department_val:
+            employee_department = department_val
+        else:
+            employee_department = current_department
+
+        position = _cell_text(cell(row, layout.position_col)) or None
+        supervisor = _cell_text(cell(row, layout.supervisor_col)) or None
+        stored_name = re.sub(r'[,(].*', '', name_val).strip()
+        # Earlier imports stored the truncated form, so match that too
+        matches = [m for m in index.match_any((name_val, stored_name), employee_department) if m.employee_id not in claimed]
+        if matches and matches[0].confidence >= AUTO_MATCH_CONFIDENCE:
+            employee = db.session.get(Employee, matches[0].employee_id)
+            claimed.add(employee.id)
+            if position:
+                employee.position = position
+            if supervisor:
+                employee.supervisor = supervisor
+            schedule = employee.schedule or Schedule()
+            matched += 1
+        else:
+            employee = Employee()
+            employee.name = stored_name
+            employee.position = position
+            employee.supervisor = supervisor
+            employee.department = employee_department
+            schedule = Schedule()
+            db.session.add(employee)
+            if matches:
+                queue_review(name_val, employee_department, employee, matches, source)
+                queued += 1
+            added += 1
+        for day_key, idx in layout.day_cols.items():
+            value = cell(row, idx)
+            # Empty cells are missing (None); whitespace-only ones are kept as ''
+            setattr(schedule, day_key, None if value is None or value == '' else _cell_text(value))
+        employee.schedule = schedule
+        departments.add(employee_department)
+        if (added + matched) % IMPORT_FLUSH_EVERY == 0:
+            db.session.flush()
+    db.session.flush()
+    return {'employees': added + matched, 'created': added, 'matched': matched, 'review_queued': queued,
+            'departments': sorted(departments)}
+
+
+# --- CSV ---
+
+def _csv_rows(stream: IO[bytes]) -> Iterator[List[str]]:
+    return csv.reader(codecs.iterdecode(stream, 'utf-8-sig'))
+
+
+def import_csv(stream: IO[bytes]) -> dict:
+    rows = _csv_rows(stream)
+    header = next(rows, None)
+    layout = SheetLayout(header or [])
+    if not layout.valid:
+        raise ScheduleImportError('No valid name column found (expected "Employee" or "Name")')
+    result = import_rows(layout, rows)
+    result['week_start'] = layout.week_start.isoformat() if layout.week_start else None
+    return result
+
+
+# --- Excel ---
+
+def open_workbook(stream: IO[bytes]):
+    try:
+        from openpyxl import load_workbook
+    except ImportError as ex:
+        raise ScheduleImportError('Excel import needs the openpyxl package') from ex
+    try:
+        return load_workbook(stream, read_only=True, data_only=True)
+    except Exception as ex:
+        raise ScheduleImportError(f'Could not read the workbook: {ex}') from ex
+
+
+def _sheet_layout(ws) -> tuple:
+    """(layout or None, row iterator positioned after the header) for a worksheet."""
+    title_week = week_from_title(ws.title)
+    rows = ws.iter_rows(values_only=True)
+    layout = find_header(rows, year_hint=title_week.year if title_week else None)
+    if layout is not None and layout.week_start is None:
+        layout.week_start = title_week
+    return layout, rows
+
+
+def list_sheets(stream: IO[bytes]) -> List[dict]:
+    """Sheet names with whether each has a usable header row and its detected week."""
+    wb = open_workbook(stream)
+    try:
+        sheets = []
+        for ws in wb.worksheets:
+            layout, _ = _sheet_layout(ws)
+            sheets.append({
+                'name': ws.title,
+                'importable': layout is not None,
+                'week_start': layout.week_start.isoformat() if layout and layout.week_start else None,
+                'days': [d for d in DAY_KEYS if layout and d in layout.day_cols],
+            })
+        return sheets
+    finally:
+        wb.close()
+
+
+def import_workbook(stream: IO[bytes], sheet: Optional[str] = None) -> dict:
+    """Import one sheet: the named (or 0-based index) one, else the first with a header row."""
+    wb = open_workbook(stream)
+    try:
+        if sheet:
+            if sheet in wb.sheetnames:
+                candidates = [wb[sheet]]
+            elif sheet.isdigit() and int(sheet) < len(wb.sheetnames):
+                candidates = [wb.worksheets[int(sheet)]]
+            else:
+                raise ScheduleImportError(f'Sheet not found: {sheet}')
+        else:
+            candidates = wb.worksheets
+        for ws in candidates:
+            layout, rows = _sheet_layout(ws)
+            if layout is None:
+                continue
+            print(f"Importing sheet '{ws.title}' (week {layout.week_start or 'unknown'})")
+            result = import_rows(layout, rows)
+            result['sheet'] = ws.title
+            result['week_start'] = layout.week_start.isoformat() if layout.week_start else None
+            return result
+        raise ScheduleImportError('No sheet with a "Name" or "Employee" header row was found')
+    finally:
+        wb.close()
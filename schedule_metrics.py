@@ -0,0 +1,83 @@
+"""Weekly workload metrics computed from one employee's parsed shifts.
+
+Used by the burnout insights (services._employee_insight) and by the
+employee_aggregate table, which models.py rewrites in the same transaction as
+every schedule write. Both therefore always agree on what counts as a night
+shift, a heavy day or a short rest.
+"""
+
+from __future__ import annotations
+
+from typing import List, Sequence
+
+from shift_parser import ParsedShift
+
+MINUTES_PER_DAY = 24 * 60
+HEAVY_SHIFT_MINUTES = 9 * 60
+REST_THRESHOLD_MINUTES = 10 * 60
+# Positions in the saturday..friday week
+WEEKEND_DAYS = (0, 1)
+
+
+class WeekMetrics:
+    __slots__ = ('weekly_minutes', 'workdays', 'night_shifts', 'night_sequences', 'weekend_minutes',
+                 'max_heavy_streak', 'rest_violations', 'start_minutes')
+
+    def __init__(self):
+        self.weekly_minutes = 0
+        self.workdays = 0
+        self.night_shifts = 0
+        self.night_sequences = 0
+        self.weekend_minutes = 0
+        self.max_heavy_streak = 0
+        self.rest_violations = 0
+        self.start_minutes: List[int] = []
+
+    def aggregate_columns(self) -> dict:
+        """The values stored in employee_aggregate."""
+        return {
+            'weekly_minutes': self.weekly_minutes,
+            'workdays': self.workdays,
+            'night_shifts': self.night_shifts,
+            'weekend_minutes': self.weekend_minutes,
+            'rest_violations': self.rest_violations,
+            'max_heavy_streak': self.max_heavy_streak,
+        }
+
+
+def week_metrics(parsed: Sequence[ParsedShift]) -> WeekMetrics:
+    """Metrics for a saturday..friday sequence of parsed shifts."""
+    m = WeekMetrics()
+    windows = [p.window for p in parsed]
+    current_streak = 0
+    in_night_streak = False
+    for idx, (p, win) in enumerate(zip(parsed, windows)):
+        m.weekly_minutes += p.minutes
+        if p.is_scheduled:
+            m.workdays += 1
+        if not win:
+            continue
+        sm, em = win
+        m.start_minutes.append(sm % MINUTES_PER_DAY)
+        is_night = (sm % MINUTES_PER_DAY) >= 20*60 or (em % MINUTES_PER_DAY) <= 6*60
+        if is_night:
+            m.night_shifts += 1
+            if not in_night_streak:
+                in_night_streak = True
+                m.night_sequences += 1
+        else:
+            in_night_streak = False
+        if idx in WEEKEND_DAYS:
+            m.weekend_minutes += p.minutes
+        if p.minutes >= HEAVY_SHIFT_MINUTES:
+            current_streak += 1
+            m.max_heavy_streak = max(m.max_heavy_streak, current_streak)
+        else:
+            current_streak = 0
+    for w1, w2 in zip(windows, windows[1:]):
+        if not w1 or not w2:
+            continue
+        gap = (MINUTES_PER_DAY - w1[1] % MINUTES_PER_DAY) + (w2[0] % MINUTES_PER_DAY)
+        if gap < REST_THRESHOLD_MINUTES:
+            m.rest_violations += 1
+    return m
@@ -0,0 +1,209 @@
+"""Run background jobs in exactly one process across all web workers.
+
+Every process that starts a ``SchedulerRuntime`` joins an election over one
+row of the ``scheduler_lease`` table. The process holding the lease renews it
+every TTL/3 seconds. If the holder stops renewing (crash, hang, deploy), the
+lease expires after the TTL and the next follower to poll takes over. A clean
+shutdown releases the lease so failover is immediate.
+
+Only the leader runs an APScheduler ``BackgroundScheduler``. Jobs and their
+next run times are stored in the app database (SQLAlchemyJobStore, table
+``apscheduler_jobs``), so a new leader resumes the schedule where the old one
+stopped. Jobs default to ``coalesce=True``: a backlog of missed runs fires
+once, provided it is no later than the misfire grace time.
+
+Configuration (environment):
+    SCHEDULER_LEASE_TTL_SECONDS      - lease lifetime without a heartbeat (default 60)
+    SCHEDULER_MISFIRE_GRACE_SECONDS  - how late a missed run may still fire (default 21600)
+"""
+
+from __future__ import annotations
+
+import atexit
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from extensions import db
+from models import SchedulerLease
+
+LEASE_NAME = 'scheduler'
+JOBS_TABLE = 'apscheduler_jobs'
+DEFAULT_LEASE_TTL_SECONDS = 60
+DEFAULT_MISFIRE_GRACE_SECONDS = 6 * 3600
+
+_runtime: Optional['SchedulerRuntime'] = None
+
+
+def current_runtime() -> Optional['SchedulerRuntime']:
+    """The runtime started in this process, if any."""
+    return _runtime
+
+
+class LeaderLease:
+    """A named, expiring lease row; whoever holds an unexpired lease is the leader."""
+
+    def __init__(self, engine, name: str = LEASE_NAME, ttl_seconds: int = DEFAULT_LEASE_TTL_SECONDS):
+        self.engine = engine
+        self.name = name
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.holder = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+        self._table = SchedulerLease.__table__
+
+    def try_acquire(self) -> bool:
+        """Take the lease if it is free or expired, or renew it if we hold it."""
+        t = self._table
+        now = datetime.utcnow()
+        with self.engine.begin() as conn:
+            renewed = conn.execute(
+                update(t).where(t.c.name == self.name, t.c.holder == self.holder)
+                .values(heartbeat_at=now, expires_at=now + self.ttl)
+            ).rowcount
+            if renewed:
+                return True
+            taken = conn.execute(
+                update(t).where(t.c.name == self.name, or_(t.c.expires_at < now, t.c.holder == ''))
+                .values(holder=self.holder, acquired_at=now, heartbeat_at=now, expires_at=now + self.ttl)
+            ).rowcount
+            if taken:
+                return True
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(t.insert().values(name=self.name, holder=self.holder, acquired_at=now,
+                                               heartbeat_at=now, expires_at=now + self.ttl))
+            return True
+        except IntegrityError:
+            # Someone else holds it
+            return False
+
+    def held(self) -> bool:
+        """Re-check in the database that we still hold an unexpired lease."""
+        t = self._table
+        with self.engine.connect() as conn:
+            row = conn.execute(select(t.c.holder, t.c.expires_at).where(t.c.name == self.name)).first()
+        return row is not None and row.holder == self.holder and row.expires_at > datetime.utcnow()
+
+    def release(self) -> None:
+        t = self._table
+        with self.engine.begin() as conn:
+            conn.execute(update(t).where(t.c.name == self.name, t.c.holder == self.holder)
+                         .values(holder='', expires_at=datetime.utcnow()))
+
+
+def ensure_job(scheduler, func: Callable, trigger, job_id: str, **kwargs) -> None:
+    """Add a job unless the jobstore already has it with the same function and trigger.
+
+    Keeping the stored job keeps its stored next run time, which is how a run
+    missed while no leader was up still fires (once) after a failover.
+    """
+    existing = scheduler.get_job(job_id)
+    ref = f'{func.__module__}:{func.__qualname__}'
+    if existing is not None and existing.func_ref == ref and str(existing.trigger) == str(trigger):
+        return
+    scheduler.add_job(func, trigger, id=job_id, replace_existing=True, **kwargs)
+
+
+class SchedulerRuntime:
+    """Leader election loop that runs a BackgroundScheduler only while holding the lease.
+
+    ``configure(scheduler)`` is called each time this process becomes leader,
+    with the scheduler started but paused, to add or update jobs (use ensure_job).
+    """
+
+    def __init__(self, app, configure: Callable, name: str = LEASE_NAME):
+        self.app = app
+        self.configure = configure
+        self.name = name
+        self.ttl_seconds = int(os.getenv('SCHEDULER_LEASE_TTL_SECONDS', DEFAULT_LEASE_TTL_SECONDS))
+        self.misfire_grace = int(os.getenv('SCHEDULER_MISFIRE_GRACE_SECONDS', DEFAULT_MISFIRE_GRACE_SECONDS))
+        with app.app_context():
+            self.engine = db.engine
+        self.lease = LeaderLease(self.engine, name, self.ttl_seconds)
+        self.scheduler = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self.scheduler is not None
+
+    def start(self) -> 'SchedulerRuntime':
+        global _runtime
+        _runtime = self
+        SchedulerLease.__table__.create(self.engine, checkfirst=True)
+        self._thread = threading.Thread(target=self._run, name=f'{self.name}-election', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+        return self
+
+    def _run(self) -> None:
+        heartbeat = max(self.ttl_seconds / 3.0, 1.0)
+        while not self._stop.is_set():
+            try:
+                leader = self.lease.try_acquire()
+            except Exception as ex:
+                # Cannot confirm the lease, so behave as a follower until we can
+                print(f"Scheduler lease check failed: {ex}")
+                leader = False
+            if leader and self.scheduler is None:
+                self._start_scheduler()
+            elif not leader and self.scheduler is not None:
+                print(f"Scheduler lease lost by {self.lease.holder}; stopping jobs")
+                self._stop_scheduler()
+            self._stop.wait(heartbeat)
+
+    def _start_scheduler(self) -> None:
+        from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+        from apscheduler.schedulers.background import BackgroundScheduler
+        scheduler = BackgroundScheduler(
+            jobstores={'default': SQLAlchemyJobStore(engine=self.engine, tablename=JOBS_TABLE)},
+            job_defaults={'coalesce': True, 'max_instances': 1, 'misfire_grace_time': self.misfire_grace},
+            daemon=True,
+        )
+        try:
+            scheduler.start(paused=True)
+            self.configure(scheduler)
+            scheduler.resume()
+        except Exception as ex:
+            print(f"Scheduler failed to start: {ex}")
+            if scheduler.running:
+                scheduler.shutdown(wait=False)
+            self.lease.release()
+            return
+        self.scheduler = scheduler
+        print(f"Scheduler leader: {self.lease.holder}")
+
+    def _stop_scheduler(self) -> None:
+        scheduler, self.scheduler = self.scheduler, None
+        if scheduler is not None and scheduler.running:
+            scheduler.shutdown(wait=False)
+
+    def confirm_leadership(self) -> bool:
+        """For jobs to call before doing work, in case the lease moved since the last heartbeat."""
+        try:
+            return self.is_leader and self.lease.held()
+        except Exception:
+            return False
+
+    def stop(self) -> None:
+        self._stop.set()
+        was_leader = self.is_leader
+        self._stop_scheduler()
+        if was_leader:
+            try:
+                self.lease.release()
+            except Exception:
+                pass
+
+    def status(self) -> dict:
+        jobs = []
+        if self.scheduler is not None:
+            jobs = [{'id': job.id, 'next_run_time': job.next_run_time.isoformat() if job.next_run_time else None}
+                    for job in self.scheduler.get_jobs()]
+        return {'holder': self.lease.holder, 'leader': self.is_leader, 'jobs': jobs}
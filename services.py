@@ -0,0 +1,716 @@
+"""Domain logic shared by the blueprints: shift math, coverage, insights and suggestions."""
+
+import functools
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta
+from typing import NamedTuple
+
+from flask import current_app
+from sqlalchemy import func, or_, select
+from sqlalchemy.exc import IntegrityError
+
+from async_work import cpu_map, cpu_workers
+from extensions import db, event_bus, mailer
+from models import (Employee, EmployeeAggregate, InsightsSnapshot, Schedule, ScheduleColumnMeta, StaffingRequirement, Suggestion, SuggestionArchive,
+                    TimeOffRequest, _schedule_version, _timeoff_version)
+from roster_snapshot import DAY_KEYS, RosterCache, RosterEntry, RosterSnapshot
+from shift_parser import parse_shift
+from schedule_metrics import week_metrics
+from single_flight import SingleFlight
+from sites import DEFAULT_CRISIS_DEPARTMENT, DEFAULT_SITE, crisis_department, current_site, site_codes, site_settings, using_site
+from staffing import DEFAULT_REQUIREMENTS, SEVERITY_CRITICAL, SEVERITY_WARN, classify, coverage_matrix, find_gaps, requirement_grids
+
+# --- Helpers: time parsing and break calculation ---
+def _shift_minutes(shift: str) -> int:
+    """Return worked minutes for a shift string like '9a-5p' or '8a-12p / 4p-8p'. Returns 0 if unparsable or OFF."""
+    return parse_shift(shift).minutes
+
+def _break_minutes_for_shift(shift: str) -> int:
+    mins = _shift_minutes(shift)
+    hours = mins / 60.0
+    return 45 if hours > 6 else 21 if mins > 0 else 0
+
+def _shift_window(shift: str):
+    """Return (start_min, end_min) envelope of a single-day shift. Overnight ends run past 24h."""
+    return parse_shift(shift).window
+
+def _shift_intervals(shift: str):
+    """Return the (start_min, end_min) pieces of a shift; split shifts yield more than one."""
+    return parse_shift(shift).intervals
+
+def _week_start_saturday(today: datetime.date) -> datetime.date:
+    # Python weekday: Mon=0..Sun=6; we want last Saturday (5)
+    wd = today.weekday()  # Mon=0
+    # Days since last Saturday: (wd - 5) mod 7
+    delta = (wd - 5) % 7
+    return today - timedelta(days=delta)
+
+def _week_dates_saturday_to_friday(today: datetime.date):
+    start = _week_start_saturday(today)
+    return [start + timedelta(days=i) for i in range(7)]
+
+# --- Roster read model (see roster_snapshot.py) ---
+roster_cache = RosterCache()
+
+def _load_roster():
+    """Yield a RosterEntry per employee from one outer-joined query."""
+    day_cols = [getattr(Schedule, d) for d in DAY_KEYS]
+    q = (select(Employee.id, Employee.name, Employee.position, Employee.supervisor, Employee.department, Schedule.id, *day_cols)
+         .outerjoin(Schedule, Schedule.employee_id == Employee.id)
+         .order_by(Employee.id, Schedule.id))
+    seen = set()
+    for row in db.session.execute(q):
+        if row[0] in seen:
+            continue
+        seen.add(row[0])
+        yield RosterEntry(row[0], row[1], row[2], row[3], row[4], tuple(row[6:]) if row[5] is not None else None)
+
+def _roster() -> RosterSnapshot:
+    """Return the current site's roster snapshot for its schedule version, rebuilding it only after writes."""
+    site = current_site()
+    return roster_cache.get(_schedule_version(site), _load_roster, key=site)
+
+# --- Workload aggregates (employee_aggregate, kept current by models.py) ---
+AGGREGATE_SORT_KEYS = ('weekly_minutes', 'workdays', 'night_shifts', 'weekend_minutes', 'rest_violations', 'max_heavy_streak')
+
+def _aggregate_query_args(args):
+    """Parse sort= (a column, '-' prefix for descending) and min_hours= from request args.
+    Returns (sort, min_hours, error); both None when neither is given.
+    """
+    sort = args.get('sort') or None
+    if sort and sort.lstrip('-') not in AGGREGATE_SORT_KEYS:
+        return None, None, f'sort must be one of {", ".join(AGGREGATE_SORT_KEYS)} (prefix with - for descending)'
+    min_hours = args.get('min_hours')
+    if min_hours not in (None, ''):
+        try:
+            min_hours = float(min_hours)
+        except ValueError:
+            return None, None, 'min_hours must be a number'
+    else:
+        min_hours = None
+    return sort, min_hours, None
+
+def _aggregate_rows(sort=None, min_hours=None, department=None):
+    """EmployeeAggregate rows matching min_hours, ordered by sort, from the indexed employee_aggregate table."""
+    # The join scopes the aggregates to the current site's employees
+    q = select(EmployeeAggregate).join(Employee, Employee.id == EmployeeAggregate.employee_id)
+    if department:
+        q = q.where(Employee.department == department)
+    if min_hours is not None:
+        q = q.where(EmployeeAggregate.weekly_minutes >= int(round(min_hours * 60)))
+    if sort:
+        column = getattr(EmployeeAggregate, sort.lstrip('-'))
+        q = q.order_by(column.desc() if sort.startswith('-') else column, EmployeeAggregate.employee_id)
+    else:
+        q = q.order_by(EmployeeAggregate.employee_id)
+    return db.session.execute(q).scalars().all()
+
+# Insight fields holding each aggregate, for filtering and sorting a stored insights snapshot
+_INSIGHT_SORT_FIELDS = {'weekly_minutes': 'weekly_minutes', 'workdays': 'workdays_this_week', 'night_shifts': 'night_shifts',
+                        'weekend_minutes': 'weekend_hours', 'rest_violations': 'rest_violations',
+                        'max_heavy_streak': 'max_heavy_streak'}
+
+def _select_insights(employees, sort=None, min_hours=None, department=None):
+    """_aggregate_rows' filter and order applied to insight dicts, using the snapshot's own figures
+    so the selection always agrees with the values returned.
+    """
+    if department:
+        employees = [e for e in employees if e.get('department') == department]
+    if min_hours is not None:
+        employees = [e for e in employees if e.get('weekly_minutes', 0) >= int(round(min_hours * 60))]
+    employees = sorted(employees, key=lambda e: e['employee_id'])
+    if sort:
+        field = _INSIGHT_SORT_FIELDS[sort.lstrip('-')]
+        # Stable sort keeps employee_id order among ties, as in SQL
+        employees.sort(key=lambda e: e.get(field) or 0, reverse=sort.startswith('-'))
+    return employees
+
+# --- Request coalescing for expensive analytics (see single_flight.py) ---
+flights = SingleFlight()
+
+def _coalesced(name: str, inputs=None):
+    """Share one in-flight run between concurrent callers with the same name, args, site and schedule version.
+    inputs, if given, returns a tuple of any other state the result depends on; it joins the key.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args):
+            site = current_site()
+            key = (name, site, _schedule_version(site)) + (inputs() if inputs else ()) + args
+            return flights.do(key, lambda: fn(*args))
+        return wrapper
+    return decorator
+
+def _coverage_for(entries):
+    """Build per-day, per-30min slot coverage counts for the given roster entries."""
+    slots_per_day = 48  # 24h * 2 per hour
+    coverage = {d: [0]*slots_per_day for d in DAY_KEYS}
+    for entry in entries:
+        if not entry.has_schedule:
+            continue
+        for day, parsed in zip(DAY_KEYS, entry.parsed):
+            for win in parsed.intervals:
+                start_slot, end_slot = _window_slot_range(win)
+                for s in range(start_slot, end_slot):
+                    coverage[day][s] += 1
+    return coverage
+
+@_coalesced('coverage')
+def _build_coverage(department: str):
+    """Build per-day, per-30min slot coverage counts for one department."""
+    return _coverage_for(_roster().department(department))
+
+def _build_coverage_988():
+    """Build per-day, per-30min slot coverage counts for the site's crisis department (988/CRISIS by default)."""
+    return _build_coverage(crisis_department())
+
+# --- Staffing targets and gaps (see staffing.py) ---
+def _default_requirements():
+    """DEFAULT_REQUIREMENTS, with the 988/CRISIS thresholds applied to the site's crisis department."""
+    return {crisis_department(): DEFAULT_REQUIREMENTS[DEFAULT_CRISIS_DEPARTMENT]}
+
+def _staffing_grids():
+    """Department -> (min, preferred) slot grids. Requirement writes bump the schedule version,
+    so the grids are cached on the roster snapshot.
+    """
+    return _roster().memo('staffing_grids', lambda: requirement_grids(
+        StaffingRequirement.query.order_by(StaffingRequirement.id).all(), _default_requirements()))
+
+@_coalesced('staffing_gaps')
+def _staffing_gaps(*departments):
+    """Shortfall runs for the given departments (default: every department with targets)."""
+    grids = _staffing_grids()
+    coverage = {d: _build_coverage(d) for d in (departments or sorted(grids)) if d in grids}
+    return find_gaps(coverage, grids)
+
+def _slot_severity(department: str, coverage=None):
+    """Per-day lists of slot severities (0 ok, 1 warn, 2 critical) for a department, or None without targets.
+    coverage defaults to the department's current coverage.
+    """
+    grid = _staffing_grids().get(department)
+    if grid is None:
+        return None
+    if coverage is None:
+        coverage = _build_coverage(department)
+    severity, _ = classify(coverage_matrix(coverage), *grid)
+    return dict(zip(DAY_KEYS, severity.tolist()))
+
+def _coverage_delta_runs(before, after):
+    """Collapse two per-slot coverage arrays into runs of equal change and resulting level.
+    Returns [{from, to, change, coverage}] for slots whose coverage changed.
+    """
+    runs = []
+    i = 0
+    slots = len(after)
+    while i < slots:
+        change = after[i] - before[i]
+        if change == 0:
+            i += 1
+            continue
+        start = i
+        while i < slots and after[i] - before[i] == change and after[i] == after[start]:
+            i += 1
+        runs.append({'from': _format_slot_time(start), 'to': _format_slot_time(i), 'change': change, 'coverage': after[start]})
+    return runs
+
+def _window_slot_range(win, slots_per_day: int = 48):
+    """Return the [start_slot, end_slot) 30-min slot range covered by a (start_min, end_min) window, clamped to the day."""
+    sm, em = win
+    start_slot = max(0, min(slots_per_day-1, sm // 30))
+    end_slot = max(0, min(slots_per_day, (em + 29) // 30))
+    return start_slot, end_slot
+
+def _format_slot_time(slot_idx: int) -> str:
+    # 30-min slots: 0..47
+    minutes = slot_idx * 30
+    h = (minutes // 60) % 24
+    m = minutes % 60
+    mer = 'a' if h < 12 else 'p'
+    h12 = 12 if h % 12 == 0 else h % 12
+    return f"{h12}{':' + str(m).zfill(2) if m else ''}{mer}"
+
+def _stddev(values):
+    vals = [v for v in values if isinstance(v, (int, float))]
+    n = len(vals)
+    if n < 2:
+        return 0.0
+    mean = sum(vals)/n
+    var = sum((v-mean)**2 for v in vals)/(n-1)
+    return var ** 0.5
+
+def _is_free(entry: RosterEntry, day_key: str, sm: int, em: int) -> bool:
+    """Return True if no overlap between [sm,em) and the employee's shift on day_key."""
+    # Check overlap in simple minutes domain; treat both in same day frame
+    return not any(sm < e2 and em > s2 for s2, e2 in entry.parsed_shift(day_key).intervals)
+
+def _slot_range_to_strings(start_idx: int, end_idx: int):
+    return _format_slot_time(start_idx), _format_slot_time(end_idx)
+
+def _day_key_to_title(dk: str) -> str:
+    return dk.capitalize()
+
+def _ensure_schedule_column_meta():
+    """Seed the current site's day columns on first use."""
+    defaults = [
+        ('saturday', 'Saturday'),
+        ('sunday', 'Sunday'),
+        ('monday', 'Monday'),
+        ('tuesday', 'Tuesday'),
+        ('wednesday', 'Wednesday'),
+        ('thursday', 'Thursday'),
+        ('friday', 'Friday'),
+    ]
+    created = False
+    for order, (day_key, label) in enumerate(defaults):
+        meta = ScheduleColumnMeta.query.filter_by(day_key=day_key).first()
+        if not meta:
+            meta = ScheduleColumnMeta()
+            meta.day_key = day_key
+            meta.display_name = label
+            meta.subtitle = ''
+            meta.is_visible = True
+            meta.sort_order = order
+            db.session.add(meta)
+            created = True
+    if created:
+        db.session.commit()
+
+def _generate_coverage_suggestions():
+    roster = _roster()
+    candidates = []
+    for gap in _staffing_gaps():
+        sm = gap.start_slot * 30
+        em = gap.end_slot * 30
+        candidate = None
+        for emp in roster.department(gap.department):
+            if _is_free(emp, gap.day_key, sm, em):
+                candidate = emp
+                break
+        st_str, et_str = _slot_range_to_strings(gap.start_slot, gap.end_slot)
+        title = f"Backfill {gap.severity.upper()} gap: {_day_key_to_title(gap.day_key)} {st_str}-{et_str}"
+        desc = f"Assign coverage to reach ≥{gap.needed} on {gap.department} between {st_str}-{et_str} on {_day_key_to_title(gap.day_key)}."
+        candidates.append({
+            'title': title,
+            'description': desc,
+            'day_key': gap.day_key,
+            'start_time': st_str,
+            'end_time': et_str,
+            'employee_id': candidate.id if candidate else None
+        })
+    return _upsert_suggestions('coverage_backfill', candidates)
+
+@_coalesced('coverage_preview')
+def _compute_coverage_suggestions_preview():
+    """Return a list of coverage backfill suggestions without persisting to DB.
+    Each item: { department, day_key, from, to, needed, current, suggested_backfill: [{id,name}], severity }
+    """
+    roster = _roster()
+    suggestions = []
+    for gap in _staffing_gaps():
+        sm = gap.start_slot * 30
+        em = gap.end_slot * 30
+        free = []
+        for emp in roster.department(gap.department):
+            if _is_free(emp, gap.day_key, sm, em):
+                free.append({'id': emp.id, 'name': emp.name})
+            if len(free) >= 5:
+                break
+        suggestions.append({
+            'department': gap.department,
+            'day_key': gap.day_key,
+            'from': _format_slot_time(gap.start_slot),
+            'to': _format_slot_time(gap.end_slot),
+            'needed': gap.needed,
+            'current': gap.coverage,
+            'severity': gap.severity,
+            'suggested_backfill': free
+        })
+    return suggestions
+
+def _employee_insight(emp: RosterEntry, history, week_dates, severity988=None, crisis_dept=DEFAULT_CRISIS_DEPARTMENT):
+    """Burnout metrics, risk score and drivers for one employee's week; None without a schedule.
+    history: the employee's TimeOffRequest rows or _TimeOffRecords. severity988: per-day slot severities for
+    crisis_dept, the site's crisis department (see _slot_severity), used to count the employee's slots in
+    under-covered time.
+    """
+    week_days = ['saturday','sunday','monday','tuesday','wednesday','thursday','friday']
+    slots_per_day = 48
+    sick_count = sum(1 for r in history if r.request_type == 'sick')
+    pto_count = sum(1 for r in history if r.request_type == 'pto')
+    vacation_count = sum(1 for r in history if r.request_type == 'vacation')
+    if not emp.has_schedule:
+        return None
+    day_parsed = {day_key: emp.parsed_shift(day_key) for day_key in week_days}
+    metrics = week_metrics([day_parsed[day_key] for day_key in week_days])
+    weekly_minutes = metrics.weekly_minutes
+    night_shifts = metrics.night_shifts
+    night_sequences = metrics.night_sequences
+    weekend_minutes = metrics.weekend_minutes
+    max_heavy_streak = metrics.max_heavy_streak
+    rest_violations = metrics.rest_violations
+    workday_count = metrics.workdays
+    start_variability_hours = round(_stddev(metrics.start_minutes)/60.0, 2)
+    weekly_hours = weekly_minutes/60.0
+    approved = [r for r in history if r.status == 'approved']
+    overlap_dates = []
+    for r in approved:
+        try:
+            rs = datetime.strptime(r.start_date, '%Y-%m-%d').date()
+            re = datetime.strptime(r.end_date, '%Y-%m-%d').date()
+        except Exception:
+            continue
+        for d in week_dates:
+            if rs <= d <= re:
+                overlap_dates.append(d.isoformat())
+    overlap_dates = sorted(list(set(overlap_dates)))
+    cov_crit = 0
+    cov_warn = 0
+    if emp.department == crisis_dept and severity988 is not None:
+        for day_key in week_days:
+            for win in day_parsed[day_key].intervals:
+                start_slot, end_slot = _window_slot_range(win, slots_per_day)
+                for s in range(start_slot, end_slot):
+                    level = severity988[day_key][s]
+                    if level == SEVERITY_CRITICAL:
+                        cov_crit += 1
+                    elif level == SEVERITY_WARN:
+                        cov_warn += 1
+
+    # Risk scoring (0-100)
+    def clamp(v, lo, hi):
+        return max(lo, min(hi, v))
+    score = 0.0
+    # Weekly hours: 40->60 maps to 0->30
+    wh_points = clamp((weekly_hours - 40.0) / 20.0, 0.0, 1.0) * 30.0
+    score += wh_points
+    # Rest violations: 0..3 -> 0..25
+    rv_points = clamp(rest_violations / 3.0, 0.0, 1.0) * 25.0
+    score += rv_points
+    # Heavy streak: 0..4 -> 0..20
+    hs_points = clamp(max_heavy_streak / 4.0, 0.0, 1.0) * 20.0
+    score += hs_points
+    # Night sequences: 0..3 -> 0..15
+    ns_points = clamp(night_sequences / 3.0, 0.0, 1.0) * 15.0
+    score += ns_points
+    # Start time variability: 0..6h -> 0..10
+    sv_points = clamp(start_variability_hours / 6.0, 0.0, 1.0) * 10.0
+    score += sv_points
+    # Weekend hours: 0..12 -> 0..10
+    we_points = clamp((weekend_minutes/60.0) / 12.0, 0.0, 1.0) * 10.0
+    score += we_points
+    risk_score = round(clamp(score, 0.0, 100.0), 0)
+    risk_level = 'low' if risk_score < 35 else 'medium' if risk_score < 60 else 'high'
+
+    drivers = []
+    if wh_points >= 5: drivers.append(f"High weekly hours: {round(weekly_hours,1)}h")
+    if rv_points >= 5: drivers.append(f"Rest gaps <10h: {rest_violations}x")
+    if hs_points >= 5: drivers.append(f"Heavy shift streak: {max_heavy_streak}")
+    if ns_points >= 5: drivers.append(f"Night sequences: {night_sequences}")
+    if sv_points >= 5: drivers.append(f"Start-time variability: {start_variability_hours}h")
+    if we_points >= 5: drivers.append(f"Weekend load: {round(weekend_minutes/60.0,1)}h")
+
+    # Simple narrative
+    if risk_level == 'high':
+        narrative = 'High burnout risk driven by ' + ', '.join(drivers[:3])
+    elif risk_level == 'medium':
+        narrative = 'Moderate risk; monitor and adjust for ' + ', '.join(drivers[:2] or ['balanced load'])
+    else:
+        narrative = 'Low risk; workload appears balanced'
+
+    return {
+        'employee_id': emp.id,
+        'employee_name': emp.name,
+        'department': emp.department,
+        'sick_days': sick_count,
+        'pto_days': pto_count,
+        'vacation_days': vacation_count,
+        'workdays_this_week': workday_count,
+        'weekly_minutes': weekly_minutes,
+        'weekly_hours': round(weekly_hours, 1),
+        'night_shifts': night_shifts,
+        'night_sequences': night_sequences,
+        'start_time_variability_hours': start_variability_hours,
+        'weekend_hours': round(weekend_minutes/60.0, 1),
+        'max_heavy_streak': max_heavy_streak,
+        'rest_violations': rest_violations,
+        'pto_overlap_dates': overlap_dates,
+        'coverage_critical_slots': cov_crit,
+        'coverage_warn_slots': cov_warn,
+        'burnout_risk': risk_level != 'low',
+        'risk_level': risk_level,
+        'risk_score': int(risk_score),
+        'drivers': drivers,
+        'narrative': narrative
+    }
+
+class _TimeOffRecord(NamedTuple):
+    """The TimeOffRequest fields _employee_insight reads, as plain data that can be sent to a CPU worker."""
+    request_type: str
+    status: str
+    start_date: str
+    end_date: str
+
+# Rosters at least this large are scored in the CPU process pool (see async_work.py); smaller ones
+# score faster inline than the entries take to pickle
+INSIGHTS_CPU_MIN_EMPLOYEES = int(os.getenv('INSIGHTS_CPU_MIN_EMPLOYEES', '400') or '400')
+
+def _score_employees(entries, history_by_emp, week_dates, severity988, crisis_dept):
+    """_employee_insight for each scheduled entry. Reads no database state, so it can run in a worker process."""
+    out = []
+    for emp in entries:
+        insight = _employee_insight(emp, history_by_emp.get(emp.id, []), week_dates, severity988, crisis_dept)
+        if insight is not None:
+            out.append(insight)
+    return out
+
+def _insights_inputs():
+    """What predictive insights read besides the roster: (time-off version, ISO start of the current week)."""
+    return _timeoff_version(), _week_start_saturday(datetime.now().date()).isoformat()
+
+@_coalesced('predictive_insights', _insights_inputs)
+def _compute_predictive_insights():
+    """Compute employee burnout insights plus a preview of coverage backfills.
+    Returns an object with keys: employees (list), coverage_suggestions (list)
+    """
+    week_dates = _week_dates_saturday_to_friday(datetime.now().date())
+    crisis_dept = crisis_department()
+    severity988 = _slot_severity(crisis_dept)
+
+    history_by_emp = {}
+    rows = db.session.execute(select(TimeOffRequest.employee_id, TimeOffRequest.request_type, TimeOffRequest.status,
+                                     TimeOffRequest.start_date, TimeOffRequest.end_date))
+    for employee_id, *fields in rows:
+        history_by_emp.setdefault(employee_id, []).append(_TimeOffRecord(*fields))
+
+    entries = _roster().entries
+    if len(entries) >= INSIGHTS_CPU_MIN_EMPLOYEES and cpu_workers() > 1:
+        size = -(-len(entries) // cpu_workers())
+        chunks = [entries[i:i + size] for i in range(0, len(entries), size)]
+        jobs = [(chunk, {e.id: history_by_emp[e.id] for e in chunk if e.id in history_by_emp}, week_dates, severity988,
+                 crisis_dept) for chunk in chunks]
+        employees_out = [insight for part in cpu_map(_score_employees, jobs) for insight in part]
+    else:
+        employees_out = _score_employees(entries, history_by_emp, week_dates, severity988, crisis_dept)
+    return {
+        'employees': employees_out,
+        'coverage_suggestions': _compute_coverage_suggestions_preview()
+    }
+
+# --- Insights snapshots ---
+INSIGHTS_SNAPSHOT_RETENTION = int(os.getenv('INSIGHTS_SNAPSHOT_RETENTION', '30') or '30')
+
+def _store_insights_snapshot(source: str = 'on_demand', insights=None):
+    """Compute (unless given) and persist a predictive insights snapshot.
+    Returns the stored InsightsSnapshot row. Older snapshots beyond the retention limit are pruned.
+    """
+    # Read before computing: an edit made meanwhile leaves the snapshot behind the site's versions
+    schedule_version = _schedule_version()
+    timeoff_version, week_start = _insights_inputs()
+    if insights is None:
+        insights = _compute_predictive_insights()
+    latest = InsightsSnapshot.query.order_by(InsightsSnapshot.id.desc()).first()
+    version = (latest.version + 1) if latest else 1
+    computed_at = datetime.utcnow()
+    payload = dict(insights)
+    payload['snapshot'] = {
+        'version': version,
+        'schedule_version': schedule_version,
+        'timeoff_version': timeoff_version,
+        'week_start': week_start,
+        'computed_at': computed_at.isoformat(),
+        'source': source
+    }
+    snap = InsightsSnapshot(version=version, computed_at=computed_at, source=source, schedule_version=schedule_version,
+                            timeoff_version=timeoff_version, week_start=week_start, payload=current_app.json.dumps(payload))
+    db.session.add(snap)
+    db.session.flush()
+    stale = (InsightsSnapshot.query
+             .order_by(InsightsSnapshot.id.desc())
+             .offset(INSIGHTS_SNAPSHOT_RETENTION)
+             .all())
+    for old in stale:
+        db.session.delete(old)
+    db.session.commit()
+    return snap
+
+def _latest_insights_snapshot(current: bool = False):
+    """Return the most recent InsightsSnapshot (primary key lookup) or None.
+    current=True returns it only if it was computed from the site's present schedule and time-off
+    versions, for the current week.
+    """
+    snap = InsightsSnapshot.query.order_by(InsightsSnapshot.id.desc()).first()
+    if current and snap is not None and (snap.schedule_version, (snap.timeoff_version, snap.week_start)) != (
+            _schedule_version(), _insights_inputs()):
+        return None
+    return snap
+
+@_coalesced('insights_snapshot', _insights_inputs)
+def _current_insights_payload() -> str:
+    """Payload of a snapshot matching the current schedule, time off and week, storing a new one if the latest is behind.
+    Concurrent callers after an edit share one recompute and one stored snapshot.
+    """
+    snap = _latest_insights_snapshot(current=True)
+    if snap is None:
+        snap = _store_insights_snapshot(source='on_demand')
+    return snap.payload
+
+def _generate_burnout_suggestions(insights=None):
+    if insights is None:
+        insights = _compute_predictive_insights()
+    candidates = []
+    for emp in insights.get('employees', []):
+        if emp.get('burnout_risk'):
+            title = f"Mitigate burnout risk for {emp['employee_name']}"
+            desc = (
+                f"Recommendation: {emp['narrative']}. Drivers — weekly_hours: {emp['weekly_hours']}, "
+                f"rest_violations: {emp['rest_violations']}, night_shifts: {emp['night_shifts']}, "
+                f"start_variability: {emp['start_time_variability_hours']}h, heavy_streak: {emp['max_heavy_streak']}."
+            )
+            candidates.append({'title': title, 'description': desc, 'employee_id': emp['employee_id']})
+    return _upsert_suggestions('burnout_mitigation', candidates)
+
+# --- Suggestion dedupe, expiry and retention ---
+SUGGESTION_RETENTION_DAYS = int(os.getenv('SUGGESTION_RETENTION_DAYS', '30') or '30')
+
+def _suggestion_key(sug_type: str, day_key, start_time, end_time, employee_id, version: int) -> str:
+    """Content hash identifying a suggestion: site, type, day, window, employee and schedule version."""
+    parts = [sug_type, day_key, start_time, end_time, employee_id, version]
+    site = current_site()
+    if site != DEFAULT_SITE:
+        # Keys from before sites existed stay valid for the default site
+        parts.append(site)
+    raw = '|'.join('' if p is None else str(p) for p in parts)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+def _upsert_suggestions(sug_type: str, candidates):
+    """Insert suggestions that are not already stored and expire pending ones no longer produced.
+    candidates: list of dicts of Suggestion fields (title, description, day_key, start_time, end_time, employee_id).
+    Returns only the newly created rows.
+    """
+    version = _schedule_version()
+    by_key = {}
+    for c in candidates:
+        key = _suggestion_key(sug_type, c.get('day_key'), c.get('start_time'), c.get('end_time'), c.get('employee_id'), version)
+        by_key[key] = c
+    existing = set()
+    if by_key:
+        rows = db.session.execute(select(Suggestion.content_key).where(Suggestion.content_key.in_(list(by_key))))
+        existing = {k for (k,) in rows}
+    created = []
+    for key, fields in by_key.items():
+        if key in existing:
+            continue
+        sug = Suggestion(type=sug_type, status='pending', content_key=key, schedule_version=version, **fields)
+        db.session.add(sug)
+        created.append(sug)
+    # Pending suggestions whose gap/risk is no longer produced (or predate content keys) are stale
+    stale = Suggestion.query.filter(Suggestion.type == sug_type, Suggestion.status == 'pending')
+    if by_key:
+        stale = stale.filter(or_(Suggestion.content_key.is_(None), ~Suggestion.content_key.in_(list(by_key))))
+    stale.update({'status': 'expired', 'updated_at': datetime.utcnow()}, synchronize_session=False)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # A concurrent generation stored the same keys first; keep its rows
+        db.session.rollback()
+        return []
+    return created
+
+def _refresh_stale_coverage_suggestions():
+    """Regenerate coverage suggestions if pending ones were computed against an older schedule version."""
+    version = _schedule_version()
+    outdated = (Suggestion.query
+                .filter(Suggestion.type == 'coverage_backfill', Suggestion.status == 'pending',
+                        or_(Suggestion.schedule_version.is_(None), Suggestion.schedule_version != version))
+                .first())
+    if outdated:
+        _generate_coverage_suggestions()
+
+def _archive_suggestions(retention_days: int = None):
+    """Move expired suggestions, and approved/denied ones decided more than retention_days ago,
+    into suggestion_archive. Returns the number of rows archived.
+    """
+    if retention_days is None:
+        retention_days = SUGGESTION_RETENTION_DAYS
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    decided_at = func.coalesce(Suggestion.updated_at, Suggestion.created_at)
+    criteria = (Suggestion.site == current_site()) & or_(
+        Suggestion.status == 'expired',
+        (Suggestion.status.in_(['approved', 'denied'])) & (decided_at < cutoff)
+    )
+    columns = [c.name for c in SuggestionArchive.__table__.columns if c.name != 'archived_at']
+    src = select(*[Suggestion.__table__.c[name] for name in columns]).where(criteria)
+    db.session.execute(SuggestionArchive.__table__.insert().from_select(columns, src))
+    archived = Suggestion.query.filter(criteria).delete(synchronize_session=False)
+    db.session.commit()
+    return archived
+
+def _insights_email_body(heading: str) -> str:
+    pending_q = Suggestion.query.filter_by(status='pending')
+    pending_count = pending_q.count()
+    pending = pending_q.order_by(Suggestion.created_at.desc()).limit(25).all()
+    approved = Suggestion.query.filter_by(status='approved').order_by(Suggestion.created_at.desc()).limit(20).all()
+    lines = [heading, '', f'Pending suggestions: {pending_count}']
+    for s in pending:
+        who = f" -> {s.employee.name}" if s.employee else ''
+        when = f" on {_day_key_to_title(s.day_key)} {s.start_time}-{s.end_time}" if s.day_key and s.start_time else ''
+        lines.append(f"- [{s.type}] {s.title}{when}{who}")
+    if approved:
+        lines.append('\nRecent approvals:')
+        for s in approved:
+            lines.append(f"- {s.title}")
+    return '\n'.join(lines)
+
+def _run_daily_insights_job():
+    """Daily snapshot, suggestions and insights email; runs on the scheduler leader only."""
+    from scheduler_runtime import current_runtime
+    runtime = current_runtime()
+    # Fence: the lease may have moved since the last heartbeat
+    if runtime is None or not runtime.confirm_leadership():
+        print('Skipping daily insights job: this process is not the scheduler leader')
+        return
+    with runtime.app.app_context():
+        to_list = os.getenv('ADMIN_REPORT_EMAILS', 'Freeranger77@gmail.com')
+        recipients = [e.strip() for e in to_list.split(',') if e.strip()]
+        codes = site_codes()
+        for code in codes:
+            with using_site(code):
+                snap = _store_insights_snapshot(source='scheduled')
+                _generate_coverage_suggestions()
+                _generate_burnout_suggestions(json.loads(snap.payload))
+                _archive_suggestions()
+                subject = 'Daily ShiftLine Insights' if len(codes) == 1 else f"Daily ShiftLine Insights: {site_settings()['name']}"
+                send_email(recipients, subject, _insights_email_body(subject))
+        mailer.flush(timeout=300)
+
+def _ensure_daily_scheduler(app):
+    """Join the scheduler election; whichever process holds the lease runs the daily job.
+
+    Safe to call from every worker. Returns this process's SchedulerRuntime.
+    """
+    try:
+        import apscheduler  # noqa: F401
+    except ImportError:
+        app.logger.warning('APScheduler not installed; daily emails disabled.')
+        return None
+    from scheduler_runtime import SchedulerRuntime, current_runtime, ensure_job
+    if current_runtime() is not None:
+        return current_runtime()
+
+    def configure(scheduler):
+        from apscheduler.triggers.cron import CronTrigger
+        ensure_job(scheduler, _run_daily_insights_job, CronTrigger(hour=5, minute=30), 'daily_insights_email')
+    return SchedulerRuntime(app, configure).start()
+
+def send_email(to_address, subject: str, body: str):
+    """Queue an email to one address or a list of addresses; never blocks on SMTP."""
+    mailer.send(to_address, subject, body)
+
+def _publish_change(kind: str, action: str, **data):
+    """Publish a compact change event to the current site's streams, stamped with its schedule version. Call after commit."""
+    site = current_site()
+    payload = {'action': action, 'version': _schedule_version(site)}
+    payload.update(data)
+    event_bus.publish(kind, payload, site=site)
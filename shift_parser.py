@@ -0,0 +1,204 @@
+"""Single grammar for roster shift strings.
+
+Every shift cell ("8a-4:30p", "9p-7a", "8a-12p / 4p-8p", "OFF", "Vacation", ...)
+goes through ``parse_shift``, which returns a status plus a tuple of
+(start_min, end_min) intervals measured from midnight of the shift day.
+Overnight intervals end past 1440, and later pieces of a split shift are
+pushed forward a day when they start before the previous piece ended.
+
+A roster repeats a small vocabulary of distinct strings across many cells, so
+parsing sits behind a bounded LRU cache and each distinct string is parsed
+once per process.
+"""
+
+from __future__ import annotations
+
+import re
+from enum import Enum
+from functools import lru_cache
+from typing import NamedTuple, Optional, Tuple
+
+DAY_MINUTES = 24 * 60
+SHIFT_CACHE_SIZE = 4096
+
+
+class ShiftStatus(str, Enum):
+    WORKING = 'working'
+    OFF = 'off'
+    VACATION = 'vacation'
+    TRAINING = 'training'
+    BLANK = 'blank'
+    INVALID = 'invalid'
+
+
+STATUS_WORDS = {
+    'off': ShiftStatus.OFF,
+    'vacation': ShiftStatus.VACATION,
+    'vac': ShiftStatus.VACATION,
+    'pto': ShiftStatus.VACATION,
+    'training': ShiftStatus.TRAINING,
+}
+
+# Statuses that mean the employee is not expected in (used for day counts and conflicts)
+NOT_SCHEDULED = frozenset({ShiftStatus.OFF, ShiftStatus.VACATION, ShiftStatus.BLANK})
+
+
+class ParsedShift(NamedTuple):
+    status: ShiftStatus
+    intervals: Tuple[Tuple[int, int], ...]
+
+    @property
+    def minutes(self) -> int:
+        return sum(e - s for s, e in self.intervals)
+
+    @property
+    def window(self) -> Optional[Tuple[int, int]]:
+        """Envelope (first start, last end) of the intervals, or None when not working."""
+        if not self.intervals:
+            return None
+        return (self.intervals[0][0], self.intervals[-1][1])
+
+    @property
+    def is_scheduled(self) -> bool:
+        return self.status not in NOT_SCHEDULED
+
+
+_TIME = r'(\d{1,2})(?::(\d{2}))?\s*([ap])?\.?(?:m\.?)?'
+TIME_RE = re.compile(rf'^\s*{_TIME}\s*$', re.IGNORECASE)
+RANGE_RE = re.compile(rf'^\s*{_TIME}\s*(?:-|–|—|‒|\bto\b)\s*{_TIME}\s*$', re.IGNORECASE)
+# Pieces are separated by '/', ',', ';', '&', 'and', or bare whitespace between two ranges ('11a-1p 6p-8p')
+PIECE_SPLIT_RE = re.compile(r'\s*(?:/|,|;|&|\band\b)\s*|(?<=[apm\d])\s+(?=\d)', re.IGNORECASE)
+PAREN_RE = re.compile(r'\([^)]*\)')
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+def _to_minutes(hour: int, minute: int, mer: Optional[str]) -> Optional[int]:
+    if minute > 59:
+        return None
+    if mer is None:
+        # No meridiem: 13..24 read as 24-hour clock, otherwise resolved by the caller
+        if hour > 24:
+            return None
+        return (hour % 24) * 60 + minute
+    if hour < 1 or hour > 12:
+        return None
+    mer = mer.lower()
+    if mer == 'a':
+        hour = 0 if hour == 12 else hour
+    else:
+        hour = 12 if hour == 12 else hour + 12
+    return hour * 60 + minute
+
+
+def parse_time(token: str) -> Optional[int]:
+    """Parse '9a', '9:30p', '12a', '14:00' to minutes from midnight. Bare 1..12 defaults to AM."""
+    m = TIME_RE.match(token or '')
+    if not m:
+        return None
+    hour, minute, mer = int(m.group(1)), int(m.group(2) or 0), m.group(3)
+    if mer is None and 1 <= hour <= 12:
+        mer = 'a'
+    return _to_minutes(hour, minute, mer)
+
+
+def parse_time_range(start: str, end: str) -> Optional[Tuple[int, int]]:
+    """Minute bounds for a start/end pair such as ('9a', '10:30a') or ('22:00', '2:00').
+    An end at or before the start runs past midnight (end > 1440).
+    """
+    start_min = parse_time(start)
+    end_min = parse_time(end)
+    if start_min is None or end_min is None:
+        return None
+    if end_min <= start_min:
+        end_min += DAY_MINUTES
+    return start_min, end_min
+
+
+def _parse_range(text: str) -> Optional[Tuple[int, int]]:
+    m = RANGE_RE.match(text)
+    if not m:
+        return None
+    sh, smin, smer, eh, emin, emer = m.groups()
+    sh, eh = int(sh), int(eh)
+    smin, emin = int(smin or 0), int(emin or 0)
+    if smer is None and 1 <= sh <= 12:
+        # '1-5p' means 1p-5p while '10-2p' means 10a-2p: take the reading giving the shorter shift
+        if emer is not None:
+            end = _to_minutes(eh, emin, emer)
+            options = [_to_minutes(sh, smin, m_) for m_ in ('a', 'p')]
+            options = [o for o in options if o is not None and end is not None]
+            smer = 'a'
+            if options:
+                best = min(options, key=lambda o: (end - o) % DAY_MINUTES or DAY_MINUTES)
+                smer = 'a' if best == _to_minutes(sh, smin, 'a') else 'p'
+        else:
+            smer = 'a'
+    start = _to_minutes(sh, smin, smer)
+    if start is None:
+        return None
+    if emer is None and 1 <= eh <= 12:
+        # Pick the meridiem that ends soonest after the start ('8-4' is 8a-4p)
+        options = [o for o in (_to_minutes(eh, emin, 'a'), _to_minutes(eh, emin, 'p')) if o is not None]
+        end = min(options, key=lambda o: (o - start) % DAY_MINUTES or DAY_MINUTES)
+    else:
+        end = _to_minutes(eh, emin, emer)
+    if end is None:
+        return None
+    while end <= start:
+        end += DAY_MINUTES
+    return (start, end)
+
+
+def clean_shift_text(value) -> str:
+    """Normalize whitespace, NBSPs and dash variants; 'nan'/None become ''."""
+    if value is None:
+        return ''
+    text = str(value)
+    if text.lower() == 'nan':
+        return ''
+    text = text.replace('\xa0', ' ')
+    text = text.replace('–', '-').replace('—', '-').replace('‒', '-')
+    return WHITESPACE_RE.sub(' ', text).strip()
+
+
+@lru_cache(maxsize=SHIFT_CACHE_SIZE)
+def _parse_shift_cached(text: str) -> ParsedShift:
+    cleaned = clean_shift_text(text)
+    if not cleaned:
+        return ParsedShift(ShiftStatus.BLANK, ())
+    lowered = PAREN_RE.sub('', cleaned).strip().lower()
+    if lowered in STATUS_WORDS:
+        return ParsedShift(STATUS_WORDS[lowered], ())
+    intervals = []
+    statuses = []
+    for piece in PIECE_SPLIT_RE.split(lowered):
+        if not piece:
+            continue
+        if piece in STATUS_WORDS:
+            statuses.append(STATUS_WORDS[piece])
+            continue
+        rng = _parse_range(piece)
+        if rng is None:
+            return ParsedShift(ShiftStatus.INVALID, ())
+        start, end = rng
+        if intervals and start < intervals[-1][1]:
+            # Later piece of a split shift that runs past midnight
+            shift = ((intervals[-1][1] - start) // DAY_MINUTES + 1) * DAY_MINUTES
+            start, end = start + shift, end + shift
+        intervals.append((start, end))
+    if intervals:
+        return ParsedShift(ShiftStatus.WORKING, tuple(intervals))
+    if statuses:
+        return ParsedShift(statuses[0], ())
+    return ParsedShift(ShiftStatus.INVALID, ())
+
+
+def parse_shift(value) -> ParsedShift:
+    """Parse any shift cell value (str, None, NaN-like) into a ParsedShift."""
+    if value is None:
+        return ParsedShift(ShiftStatus.BLANK, ())
+    return _parse_shift_cached(str(value))
+
+
+def cache_info():
+    return _parse_shift_cached.cache_info()
@@ -0,0 +1,205 @@
+"""What-if schedule simulation over an in-memory overlay of the roster.
+
+``simulate(edits)`` applies hypothetical edits to copies of the affected
+RosterEntry objects, leaving the database and the shared roster snapshot
+untouched. It recomputes coverage, staffing gaps and burnout scores only for
+the affected departments and employees, with the same code as the live
+endpoints (_coverage_for, find_gaps, _employee_insight), and returns the
+deltas against the current roster. The "before" side is served from the
+snapshot caches, so a simulation takes milliseconds.
+
+Edits are applied in order:
+    {"employee_id": 12, "day": "monday", "shift": "9a-5p"}   set a shift ('' or null clears it)
+    {"employee_id": 12, "remove": true}                       leave the employee out
+    {"new_employee": {"name": "...", "department": "...", "monday": "9a-5p", ...}}
+                                                              add a hire (ids -1, -2, ...)
+"""
+
+from __future__ import annotations
+
+import time
+from datetime import date
+from typing import Dict, List, Optional
+
+from models import TimeOffRequest
+from roster_snapshot import DAY_KEYS, RosterEntry
+from services import (_build_coverage, _coverage_delta_runs, _coverage_for, _employee_insight, _format_slot_time, _roster, _slot_severity,
+                      _staffing_gaps, _staffing_grids, _week_dates_saturday_to_friday)
+from shift_parser import ShiftStatus, clean_shift_text, parse_shift
+from sites import crisis_department
+from staffing import find_gaps
+
+SIMULATION_MAX_EDITS = 500
+# Numeric insight fields reported in each employee's delta
+DELTA_FIELDS = ('risk_score', 'weekly_hours', 'workdays_this_week', 'rest_violations', 'max_heavy_streak',
+                'night_shifts', 'night_sequences', 'weekend_hours', 'start_time_variability_hours',
+                'coverage_critical_slots', 'coverage_warn_slots')
+
+
+class SimulationError(ValueError):
+    """Invalid edits; errors is a list of {index, error}."""
+
+    def __init__(self, errors: List[dict]):
+        super().__init__('Invalid simulation edits')
+        self.errors = errors
+
+
+def _with_shift(entry: RosterEntry, day: str, shift: str) -> RosterEntry:
+    shifts = list(entry.shifts) if entry.shifts is not None else [None] * len(DAY_KEYS)
+    shifts[DAY_KEYS.index(day)] = shift
+    return RosterEntry(entry.id, entry.name, entry.position, entry.supervisor, entry.department, tuple(shifts))
+
+
+def _shift_or_error(value) -> tuple:
+    shift = clean_shift_text(value)
+    if parse_shift(shift).status == ShiftStatus.INVALID:
+        return None, f'Unrecognized shift: {shift!r}'
+    return shift, None
+
+
+def apply_edits(roster, edits: list) -> Dict[int, Optional[RosterEntry]]:
+    """Return {employee_id: replacement entry, or None when removed}; new hires get negative ids."""
+    overlay: Dict[int, Optional[RosterEntry]] = {}
+    errors = []
+    next_new_id = -1
+    for idx, item in enumerate(edits):
+        if not isinstance(item, dict):
+            errors.append({'index': idx, 'error': 'Edit must be an object'})
+            continue
+        hire = item.get('new_employee')
+        if hire is not None:
+            if not isinstance(hire, dict) or not str(hire.get('name') or '').strip():
+                errors.append({'index': idx, 'error': 'new_employee needs a name'})
+                continue
+            shifts = []
+            for day in DAY_KEYS:
+                shift, error = _shift_or_error(hire.get(day))
+                if error:
+                    errors.append({'index': idx, 'error': f'{day}: {error}'})
+                    break
+                shifts.append(shift)
+            else:
+                overlay[next_new_id] = RosterEntry(next_new_id, str(hire['name']).strip(), hire.get('position'),
+                                                   hire.get('supervisor'), (hire.get('department') or '').strip() or None,
+                                                   tuple(shifts))
+                next_new_id -= 1
+            continue
+        try:
+            employee_id = int(item.get('employee_id'))
+        except (TypeError, ValueError):
+            errors.append({'index': idx, 'error': 'employee_id must be an integer'})
+            continue
+        entry = overlay[employee_id] if employee_id in overlay else roster.get(employee_id)
+        if entry is None:
+            errors.append({'index': idx, 'error': 'Employee not found'})
+            continue
+        if item.get('remove'):
+            overlay[employee_id] = None
+            continue
+        day = str(item.get('day') or '').lower()
+        if day not in DAY_KEYS:
+            errors.append({'index': idx, 'error': f'Invalid day. Must be one of: {", ".join(DAY_KEYS)}'})
+            continue
+        shift, error = _shift_or_error(item.get('shift'))
+        if error:
+            errors.append({'index': idx, 'error': error})
+            continue
+        overlay[employee_id] = _with_shift(entry, day, shift)
+    if errors:
+        raise SimulationError(errors)
+    return overlay
+
+
+def _gap_key(gap) -> tuple:
+    return (gap.department, gap.day_key, gap.start_slot, gap.end_slot, gap.severity, gap.needed)
+
+
+def _gap_dict(gap) -> dict:
+    item = gap.to_dict()
+    item['from'] = _format_slot_time(gap.start_slot)
+    item['to'] = _format_slot_time(gap.end_slot)
+    return item
+
+
+def simulate(edits: list) -> dict:
+    started = time.perf_counter()
+    roster = _roster()
+    overlay = apply_edits(roster, edits)
+
+    # Departments whose coverage can change, and their members after the edits
+    departments = set()
+    for emp_id, entry in overlay.items():
+        base = roster.get(emp_id)
+        if base is not None and base.department:
+            departments.add(base.department)
+        if entry is not None and entry.department:
+            departments.add(entry.department)
+    departments = sorted(departments)
+    added = [e for emp_id, e in overlay.items() if emp_id < 0]
+    after_members = {}
+    for dept in departments:
+        members = [overlay.get(e.id, e) for e in roster.department(dept)]
+        after_members[dept] = [e for e in members if e is not None] + [e for e in added if e.department == dept]
+
+    # Coverage: before comes from the cached per-department build
+    before_cov = {dept: _build_coverage(dept) for dept in departments}
+    after_cov = {dept: _coverage_for(after_members[dept]) for dept in departments}
+    coverage = []
+    for dept in departments:
+        for day in DAY_KEYS:
+            if before_cov[dept][day] != after_cov[dept][day]:
+                coverage.append({'department': dept, 'day': day,
+                                 'changes': _coverage_delta_runs(before_cov[dept][day], after_cov[dept][day])})
+
+    # Staffing gaps for the affected departments that have targets
+    grids = _staffing_grids()
+    targeted = tuple(d for d in departments if d in grids)
+    before_gaps = {_gap_key(g): g for g in _staffing_gaps(*targeted)} if targeted else {}
+    after_gaps = {_gap_key(g): g for g in find_gaps({d: after_cov[d] for d in targeted}, grids)}
+    gaps = {
+        'before': len(before_gaps),
+        'after': len(after_gaps),
+        'resolved': [_gap_dict(g) for k, g in before_gaps.items() if k not in after_gaps],
+        'introduced': [_gap_dict(g) for k, g in after_gaps.items() if k not in before_gaps],
+    }
+
+    # Burnout scores: edited employees, plus 988 staff whose under-coverage counts can move
+    scored = set(overlay)
+    crisis_dept = crisis_department()
+    severity_before = severity_after = _slot_severity(crisis_dept)
+    if crisis_dept in after_cov:
+        severity_after = _slot_severity(crisis_dept, after_cov[crisis_dept])
+        scored.update(e.id for e in roster.department(crisis_dept))
+        scored.update(e.id for e in after_members[crisis_dept])
+    existing_ids = [i for i in scored if i > 0]
+    history = {}
+    if existing_ids:
+        for r in TimeOffRequest.query.filter(TimeOffRequest.employee_id.in_(existing_ids)):
+            history.setdefault(r.employee_id, []).append(r)
+    week_dates = _week_dates_saturday_to_friday(date.today())
+    employees = []
+    for emp_id in sorted(scored, key=lambda i: (i < 0, abs(i))):
+        base = roster.get(emp_id)
+        entry = overlay[emp_id] if emp_id in overlay else base
+        before = _employee_insight(base, history.get(emp_id, []), week_dates, severity_before, crisis_dept) if base else None
+        after = _employee_insight(entry, history.get(emp_id, []), week_dates, severity_after, crisis_dept) if entry else None
+        if before == after:
+            continue
+        delta = {}
+        for field in DELTA_FIELDS:
+            old = (before or {}).get(field, 0)
+            new = (after or {}).get(field, 0)
+            if old != new:
+                delta[field] = round(new - old, 2)
+        source = entry or base
+        employees.append({'employee_id': emp_id, 'employee_name': source.name, 'department': source.department,
+                          'before': before, 'after': after, 'delta': delta})
+
+    return {
+        'version': roster.version,
+        'departments': departments,
+        'coverage': coverage,
+        'gaps': gaps,
+        'employees': employees,
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 2),
+    }
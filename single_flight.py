@@ -0,0 +1,100 @@
+"""Coalesce concurrent identical computations into one execution.
+
+``SingleFlight.do(key, fn)`` runs ``fn`` once per key at a time: a caller that
+arrives while the same key is already being computed waits for that run and
+receives its result (or its exception) instead of starting another. Nothing
+is cached after the run finishes; callers that arrive later start a new run.
+
+Results are shared between threads and must be treated as read-only.
+Keys are tuples whose first element names the computation; per-name counters
+are exposed by ``stats()``.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException = None
+        self.waiters = 0
+
+
+class _Stats:
+    __slots__ = ('executions', 'coalesced', 'errors', 'exec_seconds')
+
+    def __init__(self):
+        self.executions = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.exec_seconds = 0.0
+
+    def to_dict(self) -> dict:
+        calls = self.executions + self.coalesced
+        avg = self.exec_seconds / self.executions if self.executions else 0.0
+        return {
+            'calls': calls,
+            'executions': self.executions,
+            'coalesced': self.coalesced,
+            'errors': self.errors,
+            'coalesced_ratio': round(self.coalesced / calls, 3) if calls else 0.0,
+            'avg_exec_ms': round(avg * 1000, 1),
+            # Work callers did not have to repeat, estimated from the average run time
+            'saved_seconds_estimate': round(self.coalesced * avg, 3),
+        }
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._stats: Dict[str, _Stats] = {}
+
+    def do(self, key: Tuple, fn: Callable[[], Any]) -> Any:
+        name = str(key[0])
+        with self._lock:
+            stats = self._stats.setdefault(name, _Stats())
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                stats.executions += 1
+            else:
+                call.waiters += 1
+                stats.coalesced += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        started = time.perf_counter()
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as ex:
+            call.error = ex
+            with self._lock:
+                stats.errors += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                stats.exec_seconds += elapsed
+                del self._calls[key]
+            call.done.set()
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {name: s.to_dict() for name, s in sorted(self._stats.items())}
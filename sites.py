@@ -0,0 +1,177 @@
+"""Sites: several call centers served from one database and process.
+
+Every site-scoped row carries a ``site`` code. That covers employees,
+schedules, tasks, time off and suggestions, plus the rows derived from them:
+staffing targets, name-match reviews, insights snapshots, schedule versions
+and the day column settings.
+The current site is held in a context variable:
+
+* in a request it comes from the X-Site header or the ``site`` query
+  parameter, and defaults to DEFAULT_SITE. An unknown site is a 404 for /api/
+  routes.
+* scripts and the scheduler use DEFAULT_SITE, or ``using_site(code)``.
+
+models.py adds ``site = <current site>`` to every ORM query on a scoped model
+and stamps new rows with it (see SiteScoped), so route code reads like
+single-site code. The roster, coalesced computations, insights snapshots and
+change events are keyed by site. A write to one site bumps only that site's
+schedule version, so it never invalidates another site's caches. A query that
+really spans sites passes ``execution_options(all_sites=True)``.
+
+Each site has its own department list, which is used to recognise department
+header rows in imports, and its own crisis line department. The crisis
+department is what the 988 coverage views and burnout scoring look at.
+
+Configuration (environment):
+    DEFAULT_SITE - site used when a request names none, and by scripts (default 'main')
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional
+
+from flask import g, jsonify, request
+
+SITE_RE = re.compile(r'^[a-z0-9][a-z0-9-]{0,39}$')
+DEFAULT_SITE = (os.getenv('DEFAULT_SITE') or 'main').strip().lower()
+SITE_HEADER = 'X-Site'
+DEFAULT_CRISIS_DEPARTMENT = '988/CRISIS'
+# Department header rows recognised in uploaded schedules, for sites that do not set their own.
+# Rows before the first header belong to the first department.
+DEFAULT_DEPARTMENTS = [
+    "HELPLINE LEADERSHIP",
+    "TEAM LEADERS/COORDINATORS/SPECIALISTS",
+    "211 HELPLINE",
+    "988/CRISIS",
+    "CARE COORDINATORS/PEER SPECIALISTS",
+    "CHAT/EMAIL/TEXT",
+    "COURT/COMMUNITY RELATIONS",
+    "ELC ANSWERING SERVICE",
+    "TOUCHLINE",
+]
+
+# Site settings are cached per process; edits made by another worker show up within this many seconds
+SETTINGS_TTL_SECONDS = 30
+
+_current: ContextVar[Optional[str]] = ContextVar('site', default=None)
+_settings_lock = threading.Lock()
+_settings: dict = {}  # code -> (settings, loaded at)
+
+
+class SiteError(Exception):
+    pass
+
+
+def current_site() -> str:
+    return _current.get() or DEFAULT_SITE
+
+
+@contextmanager
+def using_site(code: str) -> Iterator[str]:
+    """Scope the block (queries, new rows, caches) to site code."""
+    token = _current.set(code)
+    try:
+        yield code
+    finally:
+        _current.reset(token)
+
+
+def _load(code: str) -> Optional[dict]:
+    from models import Site
+
+    with _settings_lock:
+        cached = _settings.get(code)
+    if cached is not None and time.monotonic() - cached[1] < SETTINGS_TTL_SECONDS:
+        return cached[0]
+    from extensions import db
+
+    row = db.session.get(Site, code)
+    if row is None:
+        return None
+    settings = row.to_dict()
+    with _settings_lock:
+        _settings[code] = (settings, time.monotonic())
+    return settings
+
+
+def site_settings(code: Optional[str] = None) -> dict:
+    settings = _load(code or current_site())
+    if settings is None:
+        raise SiteError(f'Unknown site: {code or current_site()}')
+    return settings
+
+
+def site_departments() -> List[str]:
+    return site_settings()['departments']
+
+
+def crisis_department() -> str:
+    return site_settings()['crisis_department']
+
+
+def site_codes() -> List[str]:
+    from extensions import db
+    from models import Site
+
+    return list(db.session.execute(db.select(Site.code).order_by(Site.code)).scalars())
+
+
+def save_site(code: str, name: Optional[str] = None, departments: Optional[List[str]] = None,
+              crisis_department: Optional[str] = None) -> dict:
+    """Create a site or update its settings; the caller commits. A settings change bumps the
+    site's schedule version, since its staffing grids and coverage depend on them.
+    """
+    from extensions import db
+    from models import Site, _bump_schedule_version
+
+    code = (code or '').strip().lower()
+    if not SITE_RE.match(code):
+        raise SiteError('site code must be 1-40 lowercase letters, digits or dashes')
+    if departments is not None:
+        if not isinstance(departments, list) or not departments or not all(isinstance(d, str) and d.strip() for d in departments):
+            raise SiteError('departments must be a non-empty list of names')
+        departments = [d.strip() for d in departments]
+    row = db.session.get(Site, code)
+    if row is None:
+        row = Site(code=code, name=name or code, departments=json.dumps(departments or DEFAULT_DEPARTMENTS),
+                   crisis_department=crisis_department or DEFAULT_CRISIS_DEPARTMENT)
+        db.session.add(row)
+    else:
+        if name:
+            row.name = name
+        if departments is not None:
+            row.departments = json.dumps(departments)
+        if crisis_department:
+            row.crisis_department = crisis_department
+        if departments is not None or crisis_department:
+            _bump_schedule_version(site=code)
+    db.session.flush()
+    with _settings_lock:
+        _settings.pop(code, None)
+    return row.to_dict()
+
+
+def init_sites(app) -> None:
+    """Resolve the request's site before its view runs; register after the schema check."""
+
+    @app.before_request
+    def _resolve_site():
+        code = (request.headers.get(SITE_HEADER) or request.args.get('site') or DEFAULT_SITE).strip().lower()
+        if not SITE_RE.match(code) or _load(code) is None:
+            if request.path.startswith('/api/'):
+                return jsonify({'error': f'Unknown site: {code}'}), 404
+            code = DEFAULT_SITE
+        g.site_token = _current.set(code)
+
+    @app.teardown_request
+    def _reset_site(exc):
+        token = g.pop('site_token', None)
+        if token is not None:
+            _current.reset(token)
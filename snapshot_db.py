@@ -0,0 +1,57 @@
+"""Create, list, restore and prune schedule database snapshots (see snapshots.py).
+
+Usage:
+    python snapshot_db.py create [--reason manual]
+    python snapshot_db.py list
+    python snapshot_db.py restore <name>     # takes a pre-restore snapshot first
+    python snapshot_db.py prune [--keep 20]  # automatic snapshots only
+    python snapshot_db.py delete <name>
+"""
+
+import argparse
+import sys
+
+from app import app, _ensure_schema
+from snapshots import SnapshotError, create_snapshot, delete_snapshot, list_snapshots, prune_snapshots, restore_snapshot
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Schedule database snapshots')
+    sub = parser.add_subparsers(dest='command', required=True)
+    create = sub.add_parser('create')
+    create.add_argument('--reason', default='manual')
+    sub.add_parser('list')
+    restore = sub.add_parser('restore')
+    restore.add_argument('name')
+    prune = sub.add_parser('prune')
+    prune.add_argument('--keep', type=int)
+    delete = sub.add_parser('delete')
+    delete.add_argument('name')
+    args = parser.parse_args(argv)
+
+    with app.app_context():
+        _ensure_schema()
+        try:
+            if args.command == 'create':
+                create_snapshot(args.reason)
+            elif args.command == 'list':
+                for s in list_snapshots():
+                    print(f"{s['name']}  {s['bytes']:>10} bytes  {s['compression']}")
+            elif args.command == 'restore':
+                restore_snapshot(args.name)
+            elif args.command == 'prune':
+                for name in prune_snapshots(args.keep):
+                    print(f"Deleted {name}")
+            elif args.command == 'delete':
+                delete_snapshot(args.name)
+        except FileNotFoundError as e:
+            print(f"No such snapshot: {e}")
+            return 1
+        except SnapshotError as e:
+            print(str(e))
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,272 @@
+"""Compressed point-in-time snapshots of the schedule database, and restore.
+
+A snapshot is taken with ``VACUUM INTO`` on a separate connection. The copy
+runs inside one read transaction, so it is consistent, it does not block
+readers, and the result is compacted. It falls back to the online backup API
+on SQLite builds without ``VACUUM INTO``. The copy is then stream-compressed
+into the snapshot directory, with zstd when the optional ``zstandard`` package
+is installed and gzip otherwise.
+
+A restore decompresses the snapshot to a temporary file, checks it, takes an
+automatic "pre-restore" snapshot of the current database, and copies the
+snapshot over the live database with the backup API. Other pooled connections
+see the new contents on their next transaction. The schedule version is then
+moved past both the old and the restored value so no cached roster survives.
+A snapshot holds every site, so a restore replaces all of them; the admin
+route only restores when the request confirms that with ``all_sites``.
+
+Imports and destructive scripts call ``auto_snapshot`` first, so a bad upload
+can be rolled back. Automatic snapshots beyond the newest SNAPSHOT_KEEP_AUTO
+are pruned; manual ones are kept until deleted.
+
+Configuration (environment):
+    SNAPSHOT_DIR        - where snapshot files go (default <instance>/snapshots)
+    SNAPSHOT_KEEP_AUTO  - automatic snapshots to keep (default 20)
+    SNAPSHOT_ZSTD_LEVEL - zstd level (default 10)
+    SNAPSHOT_GZIP_LEVEL - gzip level 1-9 (default 6)
+"""
+
+from __future__ import annotations
+
+import gzip
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+import time
+import traceback
+from datetime import datetime
+from typing import List, Optional
+
+from flask import current_app
+
+from extensions import db
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+SNAPSHOT_SUFFIXES = ('.sqlite.zst', '.sqlite.gz')
+AUTO_REASONS = ('pre-import', 'pre-restore', 'pre-reset')
+REASON_RE = re.compile(r'^[a-z0-9][a-z0-9-]{0,39}$')
+NAME_RE = re.compile(r'^(\d{8}T\d{12}Z)-([a-z0-9][a-z0-9-]{0,39})(\.sqlite\.(?:zst|gz))$')
+COPY_CHUNK = 1 << 20
+# Pages copied per backup API step; the source lock is released between steps
+BACKUP_PAGES_PER_STEP = 4096
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def snapshot_dir() -> str:
+    path = os.getenv('SNAPSHOT_DIR') or os.path.join(current_app.instance_path, 'snapshots')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def database_path() -> str:
+    """Filesystem path of the app's SQLite database."""
+    url = db.engine.url
+    if url.get_backend_name() != 'sqlite' or not url.database or url.database == ':memory:':
+        raise SnapshotError('Snapshots need a file-backed SQLite database')
+    return url.database
+
+
+def _describe(name: str, path: str) -> dict:
+    stamp, reason, suffix = NAME_RE.match(name).groups()
+    created = datetime.strptime(stamp, '%Y%m%dT%H%M%S%fZ')
+    return {
+        'name': name,
+        'reason': reason,
+        'automatic': reason in AUTO_REASONS,
+        'created_at': created.isoformat() + 'Z',
+        'compression': 'zstd' if suffix.endswith('.zst') else 'gzip',
+        'bytes': os.path.getsize(path),
+    }
+
+
+def list_snapshots() -> List[dict]:
+    """Snapshots on disk, newest first."""
+    directory = snapshot_dir()
+    items = []
+    for name in os.listdir(directory):
+        if NAME_RE.match(name):
+            items.append(_describe(name, os.path.join(directory, name)))
+    items.sort(key=lambda s: s['name'], reverse=True)
+    return items
+
+
+def _snapshot_path(name: str) -> str:
+    """Path of an existing snapshot; name must be a bare snapshot file name."""
+    if not NAME_RE.match(name or ''):
+        raise SnapshotError(f'Not a snapshot name: {name!r}')
+    path = os.path.join(snapshot_dir(), name)
+    if not os.path.exists(path):
+        raise FileNotFoundError(name)
+    return path
+
+
+# --- Copying the live database ---
+
+def _backup(source: sqlite3.Connection, target_path: str) -> None:
+    target = sqlite3.connect(target_path)
+    try:
+        source.backup(target, pages=BACKUP_PAGES_PER_STEP)
+    finally:
+        target.close()
+
+
+def _copy_database(source_path: str, target_path: str) -> None:
+    """Consistent copy of the database at source_path without blocking its readers."""
+    source = sqlite3.connect(source_path, timeout=30)
+    try:
+        try:
+            source.execute('VACUUM INTO ?', (target_path,))
+        except sqlite3.OperationalError as e:
+            if 'syntax error' not in str(e):
+                raise
+            # SQLite before 3.27
+            _backup(source, target_path)
+    finally:
+        source.close()
+
+
+def _compress(raw_path: str, out_path: str) -> None:
+    with open(raw_path, 'rb') as src, open(out_path, 'wb') as dst:
+        if out_path.endswith('.zst'):
+            level = int(os.getenv('SNAPSHOT_ZSTD_LEVEL', '10') or '10')
+            zstandard.ZstdCompressor(level=level, threads=-1).copy_stream(src, dst, read_size=COPY_CHUNK)
+        else:
+            level = int(os.getenv('SNAPSHOT_GZIP_LEVEL', '6') or '6')
+            with gzip.GzipFile(fileobj=dst, mode='wb', compresslevel=level, mtime=0) as gz:
+                shutil.copyfileobj(src, gz, COPY_CHUNK)
+
+
+def _decompress(path: str, out_path: str) -> None:
+    with open(path, 'rb') as src, open(out_path, 'wb') as dst:
+        if path.endswith('.zst'):
+            if zstandard is None:
+                raise SnapshotError('Restoring a .zst snapshot needs the zstandard package')
+            zstandard.ZstdDecompressor().copy_stream(src, dst, read_size=COPY_CHUNK)
+        else:
+            with gzip.GzipFile(fileobj=src, mode='rb') as gz:
+                shutil.copyfileobj(gz, dst, COPY_CHUNK)
+
+
+def create_snapshot(reason: str = 'manual') -> dict:
+    """Write a compressed snapshot of the live database and return its description."""
+    reason = (reason or 'manual').strip().lower()
+    if not REASON_RE.match(reason):
+        raise SnapshotError('reason must be 1-40 lowercase letters, digits or dashes')
+    source_path = database_path()
+    directory = snapshot_dir()
+    started = time.perf_counter()
+    suffix = SNAPSHOT_SUFFIXES[0] if zstandard is not None else SNAPSHOT_SUFFIXES[1]
+    name = f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S%fZ')}-{reason}{suffix}"
+    out_path = os.path.join(directory, name)
+    with tempfile.TemporaryDirectory(dir=directory) as tmp:
+        raw_path = os.path.join(tmp, 'copy.sqlite')
+        _copy_database(source_path, raw_path)
+        raw_bytes = os.path.getsize(raw_path)
+        part_path = os.path.join(tmp, name)
+        _compress(raw_path, part_path)
+        os.replace(part_path, out_path)
+    if reason in AUTO_REASONS:
+        prune_snapshots()
+    info = _describe(name, out_path)
+    info['raw_bytes'] = raw_bytes
+    info['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 1)
+    print(f"Snapshot {name}: {raw_bytes} -> {info['bytes']} bytes in {info['elapsed_ms']} ms")
+    return info
+
+
+def auto_snapshot(reason: str) -> Optional[dict]:
+    """Snapshot before a risky write. Failures are logged, not raised, so they never block the write."""
+    try:
+        return create_snapshot(reason)
+    except Exception as e:
+        print(f"Automatic {reason} snapshot failed: {e}")
+        print(traceback.format_exc())
+        return None
+
+
+def prune_snapshots(keep: Optional[int] = None) -> List[str]:
+    """Delete automatic snapshots beyond the newest keep; returns the deleted names."""
+    if keep is None:
+        keep = int(os.getenv('SNAPSHOT_KEEP_AUTO', '20') or '20')
+    automatic = [s['name'] for s in list_snapshots() if s['automatic']]
+    deleted = automatic[max(keep, 0):]
+    for name in deleted:
+        os.remove(os.path.join(snapshot_dir(), name))
+    return deleted
+
+
+def delete_snapshot(name: str) -> None:
+    os.remove(_snapshot_path(name))
+
+
+def _check_snapshot_db(path: str) -> None:
+    conn = sqlite3.connect(path)
+    try:
+        result = conn.execute('PRAGMA quick_check').fetchone()[0]
+        if result != 'ok':
+            raise SnapshotError(f'Snapshot failed its integrity check: {result}')
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    except sqlite3.DatabaseError as e:
+        raise SnapshotError(f'Snapshot is not a readable database: {e}')
+    finally:
+        conn.close()
+    if not {'employee', 'schedule'} <= tables:
+        raise SnapshotError('Snapshot has no employee/schedule tables')
+
+
+def _site_versions() -> dict:
+    from models import ScheduleVersion
+
+    rows = db.session.execute(db.select(ScheduleVersion.site, ScheduleVersion.version)).all()
+    return {site: version or 0 for site, version in rows if site}
+
+
+def restore_snapshot(name: str) -> dict:
+    """Replace the live database with a snapshot; a pre-restore snapshot is taken first."""
+    from models import ScheduleVersion, _ensure_schema
+
+    path = _snapshot_path(name)
+    target_path = database_path()
+    started = time.perf_counter()
+    with tempfile.TemporaryDirectory(dir=snapshot_dir()) as tmp:
+        raw_path = os.path.join(tmp, 'restore.sqlite')
+        _decompress(path, raw_path)
+        _check_snapshot_db(raw_path)
+
+        previous = _site_versions()
+        # Release this session's connection so the copy can take the write lock
+        db.session.remove()
+        undo = create_snapshot('pre-restore')
+        source = sqlite3.connect(raw_path)
+        try:
+            target = sqlite3.connect(target_path, timeout=30)
+            try:
+                # One step: the live database is swapped in a single write transaction
+                source.backup(target)
+            finally:
+                target.close()
+        finally:
+            source.close()
+
+    # The snapshot may predate schema changes, and its versions may collide with cached rosters
+    _ensure_schema()
+    restored = _site_versions()
+    versions = {site: max(previous.get(site, 0), restored.get(site, 0)) + 1 for site in set(previous) | set(restored)}
+    table = ScheduleVersion.__table__
+    db.session.execute(table.delete())
+    now = datetime.utcnow()
+    for site, version in versions.items():
+        db.session.execute(table.insert().values(site=site, version=version, updated_at=now))
+    db.session.commit()
+    elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+    print(f"Restored snapshot {name} in {elapsed_ms} ms (undo with {undo['name']})")
+    return {'restored': name, 'pre_restore_snapshot': undo['name'], 'versions': versions, 'elapsed_ms': elapsed_ms}
@@ -0,0 +1,141 @@
+"""Staffing targets per department, day and 30-minute slot, and gap detection against coverage.
+
+Targets come from the staffing_requirement table. A row sets the minimum and
+preferred headcount for a department over a slot range, either on every day
+(day_key NULL) or on one day; day rows override every-day rows, and later rows
+override earlier ones. A department with no rows falls back to
+DEFAULT_REQUIREMENTS, which keeps the original 988/CRISIS thresholds: fewer
+than 2 on shift is critical, fewer than 3 is a warning. Sites whose crisis
+line has another name pass their own defaults (see services._default_requirements).
+
+Gap detection stacks the coverage of every department into one
+(departments x 7, 48) array and compares it with the min and preferred grids
+in a single vectorized step. The per-slot severity and target are then
+run-length encoded, so each gap is a maximal stretch of one day with the same
+severity and the same target. numpy is imported on first use.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Mapping, Sequence, Tuple
+
+from roster_snapshot import DAY_INDEX, DAY_KEYS
+
+SLOTS_PER_DAY = 48
+# department -> (min, preferred) for departments without any requirement rows
+DEFAULT_REQUIREMENTS = {'988/CRISIS': (2, 3)}
+
+SEVERITY_OK, SEVERITY_WARN, SEVERITY_CRITICAL = 0, 1, 2
+SEVERITY_NAMES = {SEVERITY_WARN: 'warn', SEVERITY_CRITICAL: 'critical'}
+
+
+class StaffingGap:
+    """A run of slots [start_slot, end_slot) on one day below the same target."""
+    __slots__ = ('department', 'day_key', 'start_slot', 'end_slot', 'severity', 'needed', 'coverage', 'min_coverage')
+
+    def __init__(self, department: str, day_key: str, start_slot: int, end_slot: int,
+                 severity: str, needed: int, coverage: int, min_coverage: int):
+        self.department = department
+        self.day_key = day_key
+        self.start_slot = start_slot
+        self.end_slot = end_slot
+        self.severity = severity
+        self.needed = needed
+        self.coverage = coverage  # level at the first slot
+        self.min_coverage = min_coverage
+
+    @property
+    def shortfall(self) -> int:
+        return self.needed - self.min_coverage
+
+    def to_dict(self) -> dict:
+        return {
+            'department': self.department,
+            'day_key': self.day_key,
+            'start_slot': self.start_slot,
+            'end_slot': self.end_slot,
+            'severity': self.severity,
+            'needed': self.needed,
+            'coverage': self.coverage,
+            'shortfall': self.shortfall,
+        }
+
+
+def requirement_grids(rows: Iterable, defaults: Mapping[str, Tuple[int, int]] = DEFAULT_REQUIREMENTS) -> Dict[str, tuple]:
+    """Build department -> (min, preferred) int arrays of shape (7, 48) from requirement rows.
+
+    rows need department, day_key, start_slot, end_slot, min_staff and
+    preferred_staff attributes and are applied in the order given, every-day
+    rows before day rows. defaults fill in departments without rows.
+    """
+    import numpy as np
+
+    rows = sorted(rows, key=lambda r: r.day_key is not None)
+    grids: Dict[str, tuple] = {}
+    for r in rows:
+        if r.department not in grids:
+            grids[r.department] = (np.zeros((7, SLOTS_PER_DAY), dtype=np.int32),
+                                   np.zeros((7, SLOTS_PER_DAY), dtype=np.int32))
+        mins, prefs = grids[r.department]
+        days = slice(None) if r.day_key is None else DAY_INDEX[r.day_key]
+        mins[days, r.start_slot:r.end_slot] = r.min_staff
+        prefs[days, r.start_slot:r.end_slot] = r.preferred_staff
+    for department, (min_staff, preferred_staff) in defaults.items():
+        if department not in grids:
+            grids[department] = (np.full((7, SLOTS_PER_DAY), min_staff, dtype=np.int32),
+                                 np.full((7, SLOTS_PER_DAY), preferred_staff, dtype=np.int32))
+    return grids
+
+
+def classify(coverage, mins, prefs) -> Tuple:
+    """Per-slot (severity, target) arrays: critical below min, warn below preferred."""
+    import numpy as np
+
+    critical = coverage < mins
+    warn = ~critical & (coverage < prefs)
+    severity = np.where(critical, SEVERITY_CRITICAL, np.where(warn, SEVERITY_WARN, SEVERITY_OK))
+    needed = np.where(critical, mins, np.where(warn, prefs, 0))
+    return severity, needed
+
+
+def coverage_matrix(coverage: Mapping[str, Sequence[int]]):
+    """(7, 48) array from a day_key -> per-slot counts mapping (as built by _build_coverage)."""
+    import numpy as np
+
+    return np.array([coverage[day] for day in DAY_KEYS], dtype=np.int32)
+
+
+def find_gaps(coverage: Mapping[str, Mapping[str, Sequence[int]]], grids: Mapping[str, tuple]) -> List[StaffingGap]:
+    """All shortfalls for every department present in both coverage and grids, in one pass.
+
+    Gaps are ordered by department (as given), day and start slot.
+    """
+    import numpy as np
+
+    departments = [d for d in coverage if d in grids]
+    if not departments:
+        return []
+    cov = np.concatenate([coverage_matrix(coverage[d]) for d in departments])
+    mins = np.concatenate([grids[d][0] for d in departments])
+    prefs = np.concatenate([grids[d][1] for d in departments])
+    severity, needed = classify(cov, mins, prefs)
+
+    flat_cov, flat_sev, flat_need = cov.ravel(), severity.ravel(), needed.ravel()
+    # A run starts where severity or target changes, and at the start of every day
+    starts_mask = np.empty(flat_sev.size, dtype=bool)
+    starts_mask[0] = True
+    starts_mask[1:] = (flat_sev[1:] != flat_sev[:-1]) | (flat_need[1:] != flat_need[:-1])
+    starts_mask[::SLOTS_PER_DAY] = True
+    starts = np.flatnonzero(starts_mask)
+    ends = np.append(starts[1:], flat_sev.size)
+    lows = np.minimum.reduceat(flat_cov, starts)
+    keep = flat_sev[starts] != SEVERITY_OK
+
+    gaps = []
+    for start, end, low in zip(starts[keep].tolist(), ends[keep].tolist(), lows[keep].tolist()):
+        row, first = divmod(start, SLOTS_PER_DAY)
+        gaps.append(StaffingGap(
+            departments[row // 7], DAY_KEYS[row % 7], first, end - row * SLOTS_PER_DAY,
+            SEVERITY_NAMES[int(flat_sev[start])], int(flat_need[start]), int(flat_cov[start]), low,
+        ))
+    return gaps
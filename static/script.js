@@ -1,3 +1,27 @@
+// --- Site: ?site=<code> picks the call center (see sites.py); remembered for later visits ---
+const SHIFTLINE_SITE = (function() {
+    const fromUrl = new URLSearchParams(window.location.search).get('site');
+    try {
+        if (fromUrl) localStorage.setItem('shiftlineSite', fromUrl);
+        return fromUrl || localStorage.getItem('shiftlineSite') || '';
+    } catch (err) {
+        return fromUrl || '';
+    }
+})();
+if (SHIFTLINE_SITE) {
+    // Every API call carries the site header, so callers need no changes
+    const nativeFetch = window.fetch.bind(window);
+    window.fetch = function(input, init) {
+        const url = typeof input === 'string' ? input : input.url;
+        if (url.startsWith('/api/')) {
+            init = Object.assign({}, init);
+            init.headers = new Headers(init.headers || (typeof input === 'string' ? undefined : input.headers));
+            init.headers.set('X-Site', SHIFTLINE_SITE);
+        }
+        return nativeFetch(input, init);
+    };
+}
+
 document.addEventListener('DOMContentLoaded', function() {
     const uploadForm = document.getElementById('uploadForm');
     const departmentSelect = document.getElementById('departmentSelect');
@@ -394,347 +418,447 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
 
+    // --- Schedule grid ---
+    // Rows arrive from /api/schedule in chunks and only the rows around the viewport are in
+    // the DOM. Row elements that scroll out are detached and reused for rows scrolling in, and
+    // row heights are measured once per render, so scrolling never rebuilds the whole table.
+    const SCHEDULE_CHUNK_SIZE = 500;
+    const SCHEDULE_OVERSCAN_ROWS = 15;
+
+    // Define department order
+    const departmentOrder = [
+        "HELPLINE LEADERSHIP",
+        "TEAM LEADERS/COORDINATORS/SPECIALISTS",
+        "211 HELPLINE",
+        "988/CRISIS",
+        "CARE COORDINATORS/PEER SPECIALISTS",
+        "CHAT/EMAIL/TEXT",
+        "COURT/COMMUNITY RELATIONS",
+        "ELC ANSWERING SERVICE",
+        "TOUCHLINE",
+        "AVAILABLE SHIFTS"
+    ];
+
+    // Department to CSS class mapping
+    const deptClassMap = {
+        "HELPLINE LEADERSHIP": "dept-helpline-leadership",
+        "TEAM LEADERS/COORDINATORS/SPECIALISTS": "dept-team-leaders",
+        "211 HELPLINE": "dept-211-helpline",
+        "988/CRISIS": "dept-988-crisis",
+        "CARE COORDINATORS/PEER SPECIALISTS": "dept-care-coordinators",
+        "CHAT/EMAIL/TEXT": "dept-chat-email-text",
+        "COURT/COMMUNITY RELATIONS": "dept-court-community",
+        "ELC ANSWERING SERVICE": "dept-elc-answering",
+        "TOUCHLINE": "dept-touchline",
+        "AVAILABLE SHIFTS": "dept-available-shifts"
+    };
+
+    let scheduleRows = [];             // employee rows as returned by the API
+    let scheduleItems = [];            // display order: { type: 'header' | 'employee', dept, schedule, height }
+    let scheduleItemsById = new Map(); // employee id (or `header|dept`) -> item
+    let scheduleOffsets = [0];         // top of each item within the tbody; last entry is the total height
+    let scheduleRowHeight = 48;        // estimate for rows that have not been measured yet
+    let scheduleDayKeys = DEFAULT_DAY_ORDER;
+    let scheduleRendered = new Map();  // item -> tr currently in the DOM
+    const scheduleRowPool = [];        // detached rows ready for reuse
+    let scheduleRange = [0, 0];
+    let scheduleBodyTop = 0;           // page offset of the tbody, refreshed after each render
+    let scheduleLoadToken = 0;
+    let tasksByCell = new Map();       // `${employeeId}|${Day}` -> tasks
+    let scheduleTimeOff = new Set();   // `${employeeId}|${day}` with approved time off this week
+
+    const scheduleTopSpacer = createScheduleSpacer();
+    const scheduleBottomSpacer = createScheduleSpacer();
+
+    function createScheduleSpacer() {
+        const tr = document.createElement('tr');
+        tr.className = 'schedule-spacer';
+        tr.setAttribute('aria-hidden', 'true');
+        tr.innerHTML = '<td></td>';
+        return tr;
+    }
+
+    function indexAssignedTasks() {
+        tasksByCell = new Map();
+        assignedTasks.forEach(task => {
+            const key = `${task.employee_id}|${task.day_of_week}`;
+            if (!tasksByCell.has(key)) {
+                tasksByCell.set(key, []);
+            }
+            tasksByCell.get(key).push(task);
+        });
+    }
+
+    function tasksForCell(employeeId, day) {
+        return tasksByCell.get(`${employeeId}|${day.charAt(0).toUpperCase() + day.slice(1)}`) || [];
+    }
+
+    function isoDate(date) {
+        const pad = n => String(n).padStart(2, '0');
+        return `${date.getFullYear()}-${pad(date.getMonth() + 1)}-${pad(date.getDate())}`;
+    }
+
+    // Approved time off that overlaps this week's schedule columns
+    function indexScheduleTimeOff(items) {
+        const weekStart = getScheduleStartDate(new Date());
+        const dayDates = DEFAULT_DAY_ORDER.map((day, idx) => {
+            const date = new Date(weekStart);
+            date.setDate(weekStart.getDate() + idx);
+            return [day, isoDate(date)];
+        });
+        scheduleTimeOff = new Set();
+        items.filter(item => item.status === 'approved').forEach(item => {
+            dayDates.forEach(([day, iso]) => {
+                if (item.start_date <= iso && iso <= item.end_date) {
+                    scheduleTimeOff.add(`${item.employee_id}|${day}`);
+                }
+            });
+        });
+    }
+
+    function isOnTimeOff(employeeId, day) {
+        return scheduleTimeOff.has(`${employeeId}|${day}`);
+    }
+
+    // Fetch every page of the schedule, calling onPage(rowsSoFar, firstPage) after each one.
+    // Restarts from the first page if the schedule changes between pages.
+    function fetchSchedulePages(department, onPage, isCurrent) {
+        const base = `/api/schedule?department=${encodeURIComponent(department)}&limit=${SCHEDULE_CHUNK_SIZE}`;
+        let rows = [];
+        const next = (offset, version) => fetch(`${base}&offset=${offset}${version == null ? '' : `&version=${version}`}`)
+            .then(response => {
+                if (response.status === 409) {
+                    return next(0, null);
+                }
+                if (!response.ok) {
+                    throw new Error(`Schedule request failed (${response.status})`);
+                }
+                return response.json().then(page => {
+                    if (!isCurrent()) {
+                        return;
+                    }
+                    rows = offset === 0 ? page.rows : rows.concat(page.rows);
+                    onPage(rows, offset === 0);
+                    if (page.next_offset != null) {
+                        return next(page.next_offset, page.version);
+                    }
+                });
+            });
+        return next(0, null);
+    }
+
     // Load and display schedule
     function loadSchedule() {
         const department = departmentSelect.value;
-        const dayKeys = getVisibleDayKeys();
-        const totalColumns = 2 + dayKeys.length;
-        
-        // First fetch the regular schedule
-        fetch(`/api/schedule?department=${department}`)
-            .then(response => response.json())
-            .then(schedules => {
-                console.log('Fetched schedules:', schedules); // Debug log
-                // Then fetch all tasks to overlay on the schedule
-                return fetch('/api/tasks')
-                    .then(response => response.json())
-                    .then(tasks => {
-                        console.log('Fetched tasks:', tasks); // Debug log
-                        // Store tasks globally
-                        assignedTasks = tasks;
-                        
-                        // Clear current schedule
-                        scheduleTableBody.innerHTML = '';
-
-                        // Define department order
-                        const departmentOrder = [
-                            "HELPLINE LEADERSHIP",
-                            "TEAM LEADERS/COORDINATORS/SPECIALISTS",
-                            "211 HELPLINE",
-                            "988/CRISIS",
-                            "CARE COORDINATORS/PEER SPECIALISTS",
-                            "CHAT/EMAIL/TEXT",
-                            "COURT/COMMUNITY RELATIONS",
-                            "ELC ANSWERING SERVICE",
-                            "TOUCHLINE",
-                            "AVAILABLE SHIFTS"
-                        ];
-
-                        // Department to CSS class mapping
-                        const deptClassMap = {
-                            "HELPLINE LEADERSHIP": "dept-helpline-leadership",
-                            "TEAM LEADERS/COORDINATORS/SPECIALISTS": "dept-team-leaders",
-                            "211 HELPLINE": "dept-211-helpline",
-                            "988/CRISIS": "dept-988-crisis",
-                            "CARE COORDINATORS/PEER SPECIALISTS": "dept-care-coordinators",
-                            "CHAT/EMAIL/TEXT": "dept-chat-email-text",
-                            "COURT/COMMUNITY RELATIONS": "dept-court-community",
-                            "ELC ANSWERING SERVICE": "dept-elc-answering",
-                            "TOUCHLINE": "dept-touchline",
-                            "AVAILABLE SHIFTS": "dept-available-shifts"
-                        };
-
-                        // Group employees by department
-                        const schedulesByDept = {};
-                        departmentOrder.forEach(dept => {
-                            schedulesByDept[dept] = [];
-                        });
+        const token = ++scheduleLoadToken;
+        const isCurrent = () => token === scheduleLoadToken;
 
-                        // Add employees to their departments
-                        schedules.forEach(schedule => {
-                            const dept = schedule.department || "Other";
-                            if (departmentOrder.includes(dept)) {
-                                schedulesByDept[dept].push(schedule);
-                            } else {
-                                // If department not in our predefined list, create it
-                                if (!schedulesByDept[dept]) {
-                                    schedulesByDept[dept] = [];
-                                }
-                                schedulesByDept[dept].push(schedule);
-                            }
-                        });
-
-                        // Display schedules in the specified department order
-                        departmentOrder.forEach(dept => {
-                            if (schedulesByDept[dept] && schedulesByDept[dept].length > 0) {
-                                // Add department header
-                                const deptHeaderRow = document.createElement('tr');
-                                deptHeaderRow.className = `table-primary dept-header ${deptClassMap[dept] || ''}`;
-                                deptHeaderRow.innerHTML = `
-                                    <td colspan="${totalColumns}"><strong>${dept}</strong></td>
-                                `;
-                                scheduleTableBody.appendChild(deptHeaderRow);
-
-                                // Add employees in this department
-                                schedulesByDept[dept].forEach(schedule => {
-                                    const row = document.createElement('tr');
-                                    // Apply department color class to employee rows
-                                    row.className = deptClassMap[dept] || '';
-                                    row.dataset.employeeId = schedule.id; // Store employee ID for editing
-                                    
-                                    // Create base schedule cells with regular shifts
-                                    const dayColumns = {
-                                        'saturday': schedule.saturday || '',
-                                        'sunday': schedule.sunday || '',
-                                        'monday': schedule.monday || '',
-                                        'tuesday': schedule.tuesday || '',
-                                        'wednesday': schedule.wednesday || '',
-                                        'thursday': schedule.thursday || '',
-                                        'friday': schedule.friday || ''
-                                    };
-                                    
-                                    // Add task assignments to each day's schedule
-                                    // First filter tasks for this employee
-                                    const employeeTasks = tasks.filter(task => task.employee_id == schedule.id);
-                                    
-                                    // Group tasks by day
-                                    const tasksByDay = {
-                                        'Monday': [], 'Tuesday': [], 'Wednesday': [], 
-                                        'Thursday': [], 'Friday': [], 'Saturday': [], 'Sunday': []
-                                    };
-                                    
-                                    employeeTasks.forEach(task => {
-                                        tasksByDay[task.day_of_week].push(task);
-                                    });
-                                    
-                                    // Build the row cells
-                                    const employeeCellContent = `
-                                        <div class="d-flex justify-content-between align-items-center gap-2">
-                                            <span class="employee-name">${schedule.employee_name}</span>
-                                            ${isAdminLoggedIn ? `<button class="btn btn-sm btn-outline-danger delete-employee-btn" data-employee-id="${schedule.id}" data-employee-name="${schedule.employee_name}" title="Remove employee"><i class="fas fa-trash"></i></button>` : ''}
-                                        </div>`;
-                                    let rowHTML = `
-                                        <td>${employeeCellContent}</td>
-                                        <td>${schedule.position || ''}</td>
-                                    `;
-                                    
-                                    // Create day cells with edit capability
-                                    dayKeys.forEach(day => {
-                                        // Build the cell content
-                                        let cellContent = dayColumns[day];
-                                        
-                                        // Add edit button if there's content
-                                        let editButton = '';
-                                        if (cellContent) {
-                                            editButton = `<button class="btn btn-sm btn-outline-secondary edit-shift-btn" 
-                                                data-day="${day}" title="Edit shift"><i class="fas fa-pencil-alt"></i></button>`;
-                                        } else {
-                                            editButton = `<button class="btn btn-sm btn-outline-primary add-shift-btn" 
-                                                data-day="${day}" title="Add shift"><i class="fas fa-plus"></i></button>`;
-                                        }
-                                        
-                                        // Add tasks if any
-                                        const dayCapitalized = day.charAt(0).toUpperCase() + day.slice(1);
-                                        if (tasksByDay[dayCapitalized] && tasksByDay[dayCapitalized].length > 0) {
-                                            const tasksList = tasksByDay[dayCapitalized].map(task => 
-                                                `<div class="task-item" style="background-color: #f8d7da; padding: 2px 5px; margin-top: 5px; border-radius: 3px;">
-                                                    <strong>${task.task_name}</strong>: ${task.start_time}-${task.end_time}
-                                                </div>`
-                                            ).join('');
-
-                                            if (cellContent) {
-                                                cellContent += '<hr style="margin: 5px 0">' + tasksList;
-                                            } else {
-                                                cellContent = tasksList;
-                                            }
-                                        }
-                                        
-                                        // Create the cell with edit controls
-                                        rowHTML += `
-                                            <td class="schedule-cell" data-day="${day}" data-employee-id="${schedule.id}">
-                                                <div class="d-flex justify-content-between align-items-start">
-                                                    <div class="shift-content">${cellContent || ''}</div>
-                                                    <div class="shift-actions">${editButton}</div>
-                                                </div>
-                                            </td>
-                                        `;
-                                    });
-                                    
-                                    row.innerHTML = rowHTML;
-                                    scheduleTableBody.appendChild(row);
-                                });
-                            }
-                        });
+        const tasksReady = fetch('/api/tasks')
+            .then(response => response.json())
+            .then(tasks => {
+                // Store tasks globally
+                assignedTasks = tasks;
+                indexAssignedTasks();
+            });
+        const timeOffReady = fetch('/api/timeoff')
+            .then(response => response.json())
+            .then(indexScheduleTimeOff)
+            .catch(error => console.error('Error loading time off for the schedule:', error));
 
-                        // Handle departments not in our predefined list
-                        Object.keys(schedulesByDept).forEach(dept => {
-                            if (!departmentOrder.includes(dept) && dept !== "Other" && schedulesByDept[dept].length > 0) {
-                                // Add department header
-                                const deptHeaderRow = document.createElement('tr');
-                                deptHeaderRow.className = 'table-primary dept-header';
-                                deptHeaderRow.innerHTML = `
-                                    <td colspan="${totalColumns}"><strong>${dept}</strong></td>
-                                `;
-                                scheduleTableBody.appendChild(deptHeaderRow);
-
-                                // Add employees in this department with tasks and edit controls
-                                schedulesByDept[dept].forEach(schedule => {
-                                    const row = document.createElement('tr');
-                                    row.dataset.employeeId = schedule.id;
-                                    
-                                    // Apply same rendering logic as above with edit controls
-                                    const dayColumns = {
-                                        'saturday': schedule.saturday || '',
-                                        'sunday': schedule.sunday || '',
-                                        'monday': schedule.monday || '',
-                                        'tuesday': schedule.tuesday || '',
-                                        'wednesday': schedule.wednesday || '',
-                                        'thursday': schedule.thursday || '',
-                                        'friday': schedule.friday || ''
-                                    };
-                                    
-                                    const employeeTasks = tasks.filter(task => task.employee_id == schedule.id);
-                                    
-                                    const tasksByDay = {
-                                        'Monday': [], 'Tuesday': [], 'Wednesday': [], 
-                                        'Thursday': [], 'Friday': [], 'Saturday': [], 'Sunday': []
-                                    };
-                                    
-                                    employeeTasks.forEach(task => {
-                                        tasksByDay[task.day_of_week].push(task);
-                                    });
-                                    
-                                    // Build the row cells
-                                    const employeeCellContent = `
-                                        <div class="d-flex justify-content-between align-items-center gap-2">
-                                            <span class="employee-name">${schedule.employee_name}</span>
-                                            ${isAdminLoggedIn ? `<button class="btn btn-sm btn-outline-danger delete-employee-btn" data-employee-id="${schedule.id}" data-employee-name="${schedule.employee_name}" title="Remove employee"><i class="fas fa-trash"></i></button>` : ''}
-                                        </div>`;
-                                    let rowHTML = `
-                                        <td>${employeeCellContent}</td>
-                                        <td>${schedule.position || ''}</td>
-                                    `;
-                                    
-                                    // Create day cells with edit capability
-                                    dayKeys.forEach(day => {
-                                        // Build the cell content
-                                        let cellContent = dayColumns[day];
-                                        
-                                        // Add edit button if there's content
-                                        let editButton = '';
-                                        if (cellContent) {
-                                            editButton = `<button class="btn btn-sm btn-outline-secondary edit-shift-btn" 
-                                                data-day="${day}" title="Edit shift"><i class="fas fa-pencil-alt"></i></button>`;
-                                        } else {
-                                            editButton = `<button class="btn btn-sm btn-outline-primary add-shift-btn" 
-                                                data-day="${day}" title="Add shift"><i class="fas fa-plus"></i></button>`;
-                                        }
-                                        
-                                        // Add tasks if any
-                                        const dayCapitalized = day.charAt(0).toUpperCase() + day.slice(1);
-                                        if (tasksByDay[dayCapitalized] && tasksByDay[dayCapitalized].length > 0) {
-                                            const tasksList = tasksByDay[dayCapitalized].map(task => 
-                                                `<div class="task-item" style="background-color: #f8d7da; padding: 2px 5px; margin-top: 5px; border-radius: 3px;">
-                                                    <strong>${task.task_name}</strong>: ${task.start_time}-${task.end_time}
-                                                </div>`
-                                            ).join('');
-                                            
-                                            if (cellContent) {
-                                                cellContent += '<hr style="margin: 5px 0">' + tasksList;
-                                            } else {
-                                                cellContent = tasksList;
-                                            }
-                                        }
-                                        
-                                        // Create the cell with edit controls
-                                        rowHTML += `
-                                            <td class="schedule-cell" data-day="${day}" data-employee-id="${schedule.id}">
-                                                <div class="d-flex justify-content-between align-items-start">
-                                                    <div class="shift-content">${cellContent || ''}</div>
-                                                    <div class="shift-actions">${editButton}</div>
-                                                </div>
-                                            </td>
-                                        `;
-                                    });
-                                    
-                                    row.innerHTML = rowHTML;
-                                    scheduleTableBody.appendChild(row);
-                                });
-                            }
-                        });
-                        
-                        // Add event listeners for shift editing
-                        addShiftEditListeners();
-                        attachEmployeeDeleteHandlers();
-                    });
-            })
+        // The first page is drawn as soon as it arrives; later pages extend the grid
+        return Promise.all([tasksReady, timeOffReady])
+            .then(() => fetchSchedulePages(department, (rows, firstPage) => resetScheduleGrid(rows, firstPage), isCurrent))
             .catch(error => {
                 console.error('Error loading schedule:', error);
                 alert('Error loading schedule. Please try again.');
             });
     }
-    
-    // Function to add event listeners for shift editing
-    function addShiftEditListeners() {
-        // Add shift button listeners
-        document.querySelectorAll('.add-shift-btn').forEach(button => {
-            button.addEventListener('click', function(e) {
-                e.stopPropagation();
-                const day = this.dataset.day;
-                const cell = this.closest('.schedule-cell');
-                const employeeId = cell.dataset.employeeId;
-                showShiftEditor(cell, day, employeeId, null);
-            });
+
+    // Group rows by department in display order, reusing item objects so measured heights survive
+    function buildScheduleItems(rows, previous) {
+        const byDept = new Map();
+        departmentOrder.forEach(dept => byDept.set(dept, []));
+        rows.forEach(schedule => {
+            const dept = schedule.department || "Other";
+            if (!byDept.has(dept)) {
+                byDept.set(dept, []);
+            }
+            byDept.get(dept).push(schedule);
         });
-        
-        // Edit shift button listeners
-        document.querySelectorAll('.edit-shift-btn').forEach(button => {
-            button.addEventListener('click', function(e) {
-                e.stopPropagation();
-                const day = this.dataset.day;
-                const cell = this.closest('.schedule-cell');
-                const employeeId = cell.dataset.employeeId;
-                const shiftContent = cell.querySelector('.shift-content').textContent.trim();
-                showShiftEditor(cell, day, employeeId, shiftContent);
+        const items = [];
+        const byId = new Map();
+        byDept.forEach((list, dept) => {
+            if (!list.length || dept === "Other") {
+                return;
+            }
+            const headerKey = `header|${dept}`;
+            const header = previous.get(headerKey) || { type: 'header', dept, height: 0 };
+            byId.set(headerKey, header);
+            items.push(header);
+            list.forEach(schedule => {
+                const key = String(schedule.id);
+                const prev = previous.get(key);
+                const item = prev && prev.dept === dept ? prev : { type: 'employee', dept, height: 0 };
+                item.schedule = schedule;
+                byId.set(key, item);
+                items.push(item);
             });
         });
+        return [items, byId];
     }
-    
-    function attachEmployeeDeleteHandlers() {
-        if (!isAdminLoggedIn) {
+
+    // fresh=true drops all rendered rows (new department, columns or login state); otherwise
+    // rows already on screen for unchanged items are kept as they are
+    function resetScheduleGrid(rows, fresh) {
+        if (fresh) {
+            releaseScheduleRows(() => true);
+            scheduleItemsById = new Map();
+            scheduleDayKeys = getVisibleDayKeys();
+            scheduleTableBody.innerHTML = '';
+            scheduleTableBody.append(scheduleTopSpacer, scheduleBottomSpacer);
+            [scheduleTopSpacer, scheduleBottomSpacer].forEach(tr => { tr.cells[0].colSpan = 2 + scheduleDayKeys.length; });
+        }
+        scheduleRows = rows;
+        [scheduleItems, scheduleItemsById] = buildScheduleItems(rows, scheduleItemsById);
+        // Rows whose item left the grid or moved department are refilled on the next render
+        const live = new Set(scheduleItems);
+        releaseScheduleRows(item => !live.has(item));
+        layoutScheduleItems();
+        renderScheduleWindow(true);
+    }
+
+    function releaseScheduleRows(shouldRelease) {
+        scheduleRendered.forEach((tr, item) => {
+            if (shouldRelease(item)) {
+                tr.remove();
+                scheduleRendered.delete(item);
+                scheduleRowPool.push(tr);
+            }
+        });
+    }
+
+    function layoutScheduleItems() {
+        const offsets = new Array(scheduleItems.length + 1);
+        offsets[0] = 0;
+        for (let i = 0; i < scheduleItems.length; i++) {
+            offsets[i + 1] = offsets[i] + (scheduleItems[i].height || scheduleRowHeight);
+        }
+        scheduleOffsets = offsets;
+    }
+
+    // Index of the item covering y (pixels from the top of the tbody)
+    function scheduleIndexAt(y) {
+        let lo = 0;
+        let hi = scheduleItems.length - 1;
+        while (lo < hi) {
+            const mid = (lo + hi + 1) >> 1;
+            if (scheduleOffsets[mid] <= y) {
+                lo = mid;
+            } else {
+                hi = mid - 1;
+            }
+        }
+        return Math.max(lo, 0);
+    }
+
+    function visibleScheduleRange() {
+        if (!scheduleItems.length) {
+            return [0, 0];
+        }
+        const top = window.scrollY - scheduleBodyTop;
+        const start = Math.max(scheduleIndexAt(top) - SCHEDULE_OVERSCAN_ROWS, 0);
+        const end = Math.min(scheduleIndexAt(top + window.innerHeight) + SCHEDULE_OVERSCAN_ROWS + 1, scheduleItems.length);
+        return [start, Math.max(end, start)];
+    }
+
+    function fillScheduleRow(tr, item) {
+        if (item.type === 'header') {
+            tr.className = `table-primary dept-header ${deptClassMap[item.dept] || ''}`;
+            delete tr.dataset.employeeId;
+            delete tr.dataset.department;
+            tr.innerHTML = `<td colspan="${2 + scheduleDayKeys.length}"><strong>${item.dept}</strong></td>`;
             return;
         }
-        document.querySelectorAll('.delete-employee-btn').forEach(button => {
-            button.addEventListener('click', function(e) {
-                e.preventDefault();
-                const employeeId = this.dataset.employeeId;
-                const employeeName = this.dataset.employeeName || '';
-                if (!employeeId) {
-                    return;
-                }
-                if (!confirm(`Remove ${employeeName || 'this employee'} and clear their schedule?`)) {
-                    return;
-                }
-                fetch(`/api/employees/${employeeId}`, {
-                    method: 'DELETE'
-                })
-                .then(response => {
-                    if (!response.ok) {
-                        throw new Error('Failed to delete employee');
-                    }
-                    return response.json();
-                })
-                .then(() => {
-                    loadSchedule();
-                    loadEmployees();
-                    loadDepartments();
-                    loadPositions();
-                })
-                .catch(error => {
-                    console.error('Error deleting employee:', error);
-                    alert('Unable to delete employee.');
-                });
-            });
+        const schedule = item.schedule;
+        // Apply department color class to employee rows
+        tr.className = deptClassMap[item.dept] || '';
+        tr.dataset.employeeId = schedule.id; // Store employee ID for editing
+        tr.dataset.department = item.dept;
+        let rowHTML = `
+            <td>
+                <div class="d-flex justify-content-between align-items-center gap-2">
+                    <span class="employee-name">${schedule.employee_name}</span>
+                    ${isAdminLoggedIn ? `<button class="btn btn-sm btn-outline-danger delete-employee-btn" data-employee-id="${schedule.id}" data-employee-name="${schedule.employee_name}" title="Remove employee"><i class="fas fa-trash"></i></button>` : ''}
+                </div>
+            </td>
+            <td>${schedule.position || ''}</td>
+        `;
+        // Create day cells with edit capability
+        scheduleDayKeys.forEach(day => {
+            const shift = schedule[day] || '';
+            rowHTML += `
+                <td class="schedule-cell" data-day="${day}" data-employee-id="${schedule.id}" data-shift="${shift}">
+                    ${scheduleCellInnerHTML(day, shift, tasksForCell(schedule.id, day), isOnTimeOff(schedule.id, day))}
+                </td>
+            `;
+        });
+        tr.innerHTML = rowHTML;
+    }
+
+    // Bring the DOM in line with the visible range. Only rows entering the range are filled;
+    // rows that stay keep their nodes, and rows that leave go back to the pool.
+    function renderScheduleWindow(force = false) {
+        const [start, end] = visibleScheduleRange();
+        if (!force && start === scheduleRange[0] && end === scheduleRange[1]) {
+            return;
+        }
+        scheduleRange = [start, end];
+        const wanted = scheduleItems.slice(start, end);
+        const wantedSet = new Set(wanted);
+        releaseScheduleRows(item => !wantedSet.has(item));
+
+        let cursor = scheduleTopSpacer.nextSibling;
+        wanted.forEach(item => {
+            let tr = scheduleRendered.get(item);
+            if (!tr) {
+                tr = scheduleRowPool.pop() || document.createElement('tr');
+                fillScheduleRow(tr, item);
+                scheduleRendered.set(item, tr);
+            }
+            if (tr === cursor) {
+                cursor = cursor.nextSibling;
+            } else {
+                scheduleTableBody.insertBefore(tr, cursor);
+            }
+        });
+        scheduleTopSpacer.cells[0].style.height = `${scheduleOffsets[start]}px`;
+        scheduleBottomSpacer.cells[0].style.height = `${scheduleOffsets[scheduleItems.length] - scheduleOffsets[end]}px`;
+        measureScheduleRows(start, end);
+    }
+
+    // One batched read after the writes above: real row heights and the tbody position
+    function measureScheduleRows(start, end) {
+        let changed = false;
+        let measured = 0;
+        let total = 0;
+        scheduleItems.slice(start, end).forEach(item => {
+            const height = scheduleRendered.get(item).offsetHeight;
+            if (!height) {
+                return; // tab hidden; keep the estimate
+            }
+            if (item.type === 'employee') {
+                measured++;
+                total += height;
+            }
+            if (height !== item.height) {
+                item.height = height;
+                changed = true;
+            }
+        });
+        if (measured) {
+            scheduleRowHeight = Math.round(total / measured);
+        }
+        scheduleBodyTop = scheduleTableBody.getBoundingClientRect().top + window.scrollY;
+        if (changed) {
+            layoutScheduleItems();
+            scheduleTopSpacer.cells[0].style.height = `${scheduleOffsets[start]}px`;
+            scheduleBottomSpacer.cells[0].style.height = `${scheduleOffsets[scheduleItems.length] - scheduleOffsets[end]}px`;
+            // Real heights may mean a different set of rows fills the viewport
+            scheduleWindowOnNextFrame();
+        }
+    }
+
+    let scheduleScrollFrame = 0;
+    function scheduleWindowOnNextFrame() {
+        if (scheduleScrollFrame) {
+            return;
+        }
+        scheduleScrollFrame = requestAnimationFrame(() => {
+            scheduleScrollFrame = 0;
+            renderScheduleWindow();
+        });
+    }
+    window.addEventListener('scroll', scheduleWindowOnNextFrame, { passive: true });
+    window.addEventListener('resize', () => renderScheduleWindow(true));
+    const scheduleTabBtn = document.getElementById('schedule-tab');
+    if (scheduleTabBtn) {
+        // Rows cannot be measured while the tab is hidden
+        scheduleTabBtn.addEventListener('shown.bs.tab', () => renderScheduleWindow(true));
+    }
+
+    // Refill a rendered employee row after its data changed
+    function refreshScheduleRow(item) {
+        const tr = scheduleRendered.get(item);
+        if (tr) {
+            fillScheduleRow(tr, item);
+        }
+    }
+
+    function removeScheduleEmployee(employeeId) {
+        const item = scheduleItemsById.get(String(employeeId));
+        if (!item) {
+            return;
+        }
+        resetScheduleGrid(scheduleRows.filter(row => row !== item.schedule), false);
+    }
+
+    // Apply an employee update in place; returns false when the grid needs regrouping
+    function updateScheduleEmployee(emp) {
+        const item = scheduleItemsById.get(String(emp.id));
+        if (!item || item.dept !== (emp.department || "Other")) {
+            return false;
+        }
+        Object.assign(item.schedule, emp);
+        refreshScheduleRow(item);
+        return true;
+    }
+
+    // Buttons inside the grid are handled here once instead of per rendered row
+    scheduleTableBody.addEventListener('click', function(e) {
+        const button = e.target.closest('.add-shift-btn, .edit-shift-btn, .delete-employee-btn');
+        if (!button || !scheduleTableBody.contains(button)) {
+            return;
+        }
+        if (button.classList.contains('delete-employee-btn')) {
+            e.preventDefault();
+            deleteEmployeeFromSchedule(button.dataset.employeeId, button.dataset.employeeName || '');
+            return;
+        }
+        e.stopPropagation();
+        const day = button.dataset.day;
+        const cell = button.closest('.schedule-cell');
+        const employeeId = cell.dataset.employeeId;
+        const shiftContent = button.classList.contains('edit-shift-btn')
+            ? cell.querySelector('.shift-content').textContent.trim()
+            : null;
+        showShiftEditor(cell, day, employeeId, shiftContent);
+    });
+
+    function deleteEmployeeFromSchedule(employeeId, employeeName) {
+        if (!isAdminLoggedIn || !employeeId) {
+            return;
+        }
+        if (!confirm(`Remove ${employeeName || 'this employee'} and clear their schedule?`)) {
+            return;
+        }
+        fetch(`/api/employees/${employeeId}`, {
+            method: 'DELETE'
+        })
+        .then(response => {
+            if (!response.ok) {
+                throw new Error('Failed to delete employee');
+            }
+            return response.json();
+        })
+        .then(() => {
+            loadSchedule();
+            loadEmployees();
+            loadDepartments();
+            loadPositions();
+        })
+        .catch(error => {
+            console.error('Error deleting employee:', error);
+            alert('Unable to delete employee.');
         });
     }
 
@@ -1007,9 +1131,9 @@ document.addEventListener('DOMContentLoaded', function() {
             
             // Update the shift in the database
             updateEmployeeShift(employeeId, day, newShift)
-                .then(() => {
-                    // Reload the schedule to reflect changes
-                    loadSchedule();
+                .then(result => {
+                    // Patch just this cell; other clients receive the same delta over /api/events
+                    applyShiftDelta(employeeId, day, result.shift ?? newShift);
                 })
                 .catch(error => {
                     console.error('Error updating shift:', error);
@@ -1026,7 +1150,7 @@ document.addEventListener('DOMContentLoaded', function() {
                 if (confirm('Are you sure you want to delete this shift?')) {
                     updateEmployeeShift(employeeId, day, '')
                         .then(() => {
-                            loadSchedule();
+                            applyShiftDelta(employeeId, day, '');
                         })
                         .catch(error => {
                             console.error('Error deleting shift:', error);
@@ -1042,7 +1166,6 @@ document.addEventListener('DOMContentLoaded', function() {
         cell.querySelector('.cancel-shift-btn').addEventListener('click', function() {
             cell.innerHTML = cell.dataset.originalContent;
             delete cell.dataset.originalContent;
-            addShiftEditListeners(); // Re-add listeners to the restored content
         });
     }
 
@@ -1054,21 +1177,129 @@ document.addEventListener('DOMContentLoaded', function() {
         restoreColumnsBtn.addEventListener('click', handleRestoreHiddenColumns);
     }
     
-    // Function to update an employee's shift in the database
+    // Shift edits made within a short window are saved together in one bulk request
+    const SHIFT_BATCH_WINDOW_MS = 300;
+    let pendingShiftEdits = [];
+    let shiftBatchTimer = null;
+
+    // Function to update an employee's shift in the database; resolves with { shift, version, coverage }
     function updateEmployeeShift(employeeId, day, shiftTime) {
-        return fetch(`/api/employee/${employeeId}/schedule/${day}`, {
-            method: 'PATCH',
+        return new Promise((resolve, reject) => {
+            pendingShiftEdits.push({
+                change: { employee_id: Number(employeeId), day: day, shift: shiftTime },
+                resolve: resolve,
+                reject: reject
+            });
+            if (!shiftBatchTimer) {
+                shiftBatchTimer = setTimeout(flushShiftEdits, SHIFT_BATCH_WINDOW_MS);
+            }
+        });
+    }
+
+    function flushShiftEdits() {
+        const batch = pendingShiftEdits;
+        pendingShiftEdits = [];
+        shiftBatchTimer = null;
+        if (!batch.length) {
+            return;
+        }
+        fetch('/api/schedule/bulk', {
+            method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
             },
-            body: JSON.stringify({ shift_time: shiftTime })
+            body: JSON.stringify({ changes: batch.map(edit => edit.change) })
         })
-        .then(response => {
+        .then(response => response.json().then(result => {
             if (!response.ok) {
-                throw new Error('Network response was not ok');
+                const details = (result.errors || []).map(e => e.error).join('; ');
+                throw new Error(details || result.error || 'Network response was not ok');
             }
-            return response.json();
-        });
+            return result;
+        }))
+        .then(result => {
+            const saved = {};
+            (result.changes || []).forEach(c => { saved[`${c.employee_id}:${c.day}`] = c.shift; });
+            batch.forEach(edit => {
+                const key = `${edit.change.employee_id}:${edit.change.day}`;
+                edit.resolve({
+                    shift: key in saved ? saved[key] : edit.change.shift,
+                    version: result.version,
+                    coverage: result.coverage
+                });
+            });
+        })
+        .catch(error => batch.forEach(edit => edit.reject(error)));
+    }
+
+    // Build the inner markup of a schedule cell: shift text, task overlays, time off and the edit/add button
+    function scheduleCellInnerHTML(day, shift, dayTasks, onTimeOff = false) {
+        let cellContent = shift || '';
+        const editButton = cellContent
+            ? `<button class="btn btn-sm btn-outline-secondary edit-shift-btn" 
+                data-day="${day}" title="Edit shift"><i class="fas fa-pencil-alt"></i></button>`
+            : `<button class="btn btn-sm btn-outline-primary add-shift-btn" 
+                data-day="${day}" title="Add shift"><i class="fas fa-plus"></i></button>`;
+        if (dayTasks && dayTasks.length > 0) {
+            const tasksList = dayTasks.map(task => 
+                `<div class="task-item" style="background-color: #f8d7da; padding: 2px 5px; margin-top: 5px; border-radius: 3px;">
+                    <strong>${task.task_name}</strong>: ${task.start_time}-${task.end_time}
+                </div>`
+            ).join('');
+            cellContent = cellContent ? cellContent + '<hr style="margin: 5px 0">' + tasksList : tasksList;
+        }
+        if (onTimeOff) {
+            const label = '<span class="badge bg-info ms-1">TIME OFF</span>';
+            cellContent = cellContent ? cellContent + '<br>' + label : label;
+        }
+        return `
+            <div class="d-flex justify-content-between align-items-start">
+                <div class="shift-content">${cellContent}</div>
+                <div class="shift-actions">${editButton}</div>
+            </div>`;
+    }
+
+    function findScheduleCell(employeeId, day) {
+        return scheduleTableBody.querySelector(`td.schedule-cell[data-employee-id="${employeeId}"][data-day="${day}"]`);
+    }
+
+    // Record a shift change in the grid model and re-render the cell if it is on screen.
+    // With shift undefined the cell keeps its shift and only the task overlay is refreshed.
+    function applyShiftDelta(employeeId, day, shift) {
+        const item = scheduleItemsById.get(String(employeeId));
+        if (item && shift !== undefined) {
+            item.schedule[day] = shift || '';
+        }
+        const cell = findScheduleCell(employeeId, day);
+        if (!cell) {
+            return;
+        }
+        if (shift === undefined) {
+            shift = cell.dataset.shift ?? '';
+        }
+        cell.dataset.shift = shift || '';
+        cell.innerHTML = scheduleCellInnerHTML(day, shift, tasksForCell(employeeId, day), isOnTimeOff(employeeId, day));
+        delete cell.dataset.originalContent;
+    }
+
+    // Keep the task overlay cache in sync and patch the affected cell
+    function addAssignedTask(task) {
+        if (!task || assignedTasks.some(t => t.id == task.id)) {
+            return;
+        }
+        assignedTasks.push(task);
+        indexAssignedTasks();
+        applyShiftDelta(task.employee_id, String(task.day_of_week || '').toLowerCase());
+    }
+
+    function removeAssignedTask(taskId) {
+        const task = assignedTasks.find(t => t.id == taskId);
+        if (!task) {
+            return;
+        }
+        assignedTasks = assignedTasks.filter(t => t.id != taskId);
+        indexAssignedTasks();
+        applyShiftDelta(task.employee_id, String(task.day_of_week || '').toLowerCase());
     }
 
     // Load departments
@@ -1185,6 +1416,7 @@ document.addEventListener('DOMContentLoaded', function() {
             .then(tasks => {
                 // Store tasks globally
                 assignedTasks = tasks;
+                indexAssignedTasks();
                 
                 // Clear current tasks
                 tasksTableBody.innerHTML = '';
@@ -1228,8 +1460,8 @@ document.addEventListener('DOMContentLoaded', function() {
             })
             .then(response => response.json())
             .then(data => {
+                removeAssignedTask(taskId);
                 loadTasks(); // Refresh tasks
-                loadSchedule(); // Also refresh the schedule to update task display
             })
             .catch(error => {
                 console.error('Error:', error);
@@ -1649,6 +1881,36 @@ document.addEventListener('DOMContentLoaded', function() {
     }
 
     // Event Listeners for Schedule Upload
+    // Workbooks can hold several weeks; offer the sheets that have a schedule header row
+    const scheduleFileInput = document.getElementById('csvFile');
+    const sheetSelect = document.getElementById('sheetSelect');
+    const isWorkbook = file => /\.xls[xm]$/i.test(file.name);
+    if (scheduleFileInput && sheetSelect) {
+        scheduleFileInput.addEventListener('change', function() {
+            const file = this.files[0];
+            sheetSelect.innerHTML = '';
+            sheetSelect.classList.add('d-none');
+            if (!file || !isWorkbook(file)) {
+                return;
+            }
+            const formData = new FormData();
+            formData.append('file', file);
+            fetch('/api/upload-schedule/sheets', { method: 'POST', body: formData })
+                .then(response => response.json())
+                .then(data => {
+                    const sheets = (data.sheets || []).filter(sheet => sheet.importable);
+                    sheets.forEach(sheet => {
+                        const option = document.createElement('option');
+                        option.value = sheet.name;
+                        option.textContent = sheet.week_start ? `${sheet.name} (week of ${sheet.week_start})` : sheet.name;
+                        sheetSelect.appendChild(option);
+                    });
+                    sheetSelect.classList.toggle('d-none', sheets.length < 2);
+                })
+                .catch(error => console.error('Error reading workbook sheets:', error));
+        });
+    }
+
     uploadForm.addEventListener('submit', function(e) {
         e.preventDefault();
         const fileInput = document.getElementById('csvFile');
@@ -1660,6 +1922,9 @@ document.addEventListener('DOMContentLoaded', function() {
 
         const formData = new FormData();
         formData.append('file', file);
+        if (sheetSelect && isWorkbook(file) && sheetSelect.value) {
+            formData.append('sheet', sheetSelect.value);
+        }
 
         fetch('/api/upload-schedule', {
             method: 'POST',
@@ -1672,6 +1937,10 @@ document.addEventListener('DOMContentLoaded', function() {
             } else {
                 alert(data.message);
                 uploadForm.reset();
+                if (sheetSelect) {
+                    sheetSelect.innerHTML = '';
+                    sheetSelect.classList.add('d-none');
+                }
                 
                 // Reload all data
                 loadDepartments();
@@ -1718,8 +1987,8 @@ document.addEventListener('DOMContentLoaded', function() {
             } else {
                 alert('Task added successfully!');
                 taskForm.reset();
+                addAssignedTask(data.task);
                 loadTasks();
-                loadSchedule(); // Also refresh the weekly schedule to show new task
             }
         })
         .catch(error => {
@@ -1749,7 +2018,9 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
 
-    // Sticky header fallback: clone header into a fixed overlay on scroll
+    // Sticky header fallback: a fixed copy of the header shown while the table is scrolled past.
+    // The copy and its column widths are rebuilt only when the header or the table size changes;
+    // scroll events compare window.scrollY against cached table bounds and touch no layout.
     (function setupStickyHeaderFallback(){
         const table = document.getElementById('scheduleTable');
         if (!table) return;
@@ -1761,41 +2032,63 @@ document.addEventListener('DOMContentLoaded', function() {
             document.body.appendChild(overlay);
         }
         const overlayThead = overlay.querySelector('thead');
-        const update = () => {
+        const inner = overlay.querySelector('.inner');
+        const thead = table.querySelector('thead');
+        let bounds = null; // { top, bottom } in page coordinates
+        let shown = false;
+        let dirty = true;
+        let frame = 0;
+
+        const rebuild = () => {
+            // Read everything first, then write, so the rebuild costs one layout
             const rect = table.getBoundingClientRect();
-            const shouldShow = rect.top < 0 && rect.bottom > 80; // table is scrolled past top but not fully out
-            overlay.style.display = shouldShow ? 'block' : 'none';
-            if (!shouldShow) return;
-            // mirror column widths
-            const srcHeaderRows = table.querySelectorAll('thead tr');
-            const srcThs = table.querySelectorAll('thead tr:first-child th');
-            overlay.style.width = document.documentElement.clientWidth + 'px';
-            const inner = overlay.querySelector('.inner');
-            // match container width to the table container
+            bounds = { top: rect.top + window.scrollY, bottom: rect.bottom + window.scrollY };
             const wrapper = table.closest('.container-fluid') || table.parentElement;
-            if (wrapper) inner.style.maxWidth = wrapper.clientWidth + 'px';
-            // rebuild thead content
-            overlayThead.innerHTML = '';
-            srcHeaderRows.forEach((row, idx) => {
+            const wrapperWidth = wrapper ? wrapper.clientWidth : 0;
+            const viewportWidth = document.documentElement.clientWidth;
+            const rows = Array.from(thead.rows).map(row =>
+                Array.from(row.cells).map(th => [th, th.getBoundingClientRect().width]));
+
+            overlay.style.width = viewportWidth + 'px';
+            if (wrapperWidth) inner.style.maxWidth = wrapperWidth + 'px';
+            const frag = document.createDocumentFragment();
+            rows.forEach(cells => {
                 const cloneRow = document.createElement('tr');
-                row.querySelectorAll('th').forEach((th, i) => {
+                cells.forEach(([th, width]) => {
                     const c = th.cloneNode(true);
-                    const width = th.getBoundingClientRect().width;
                     c.style.minWidth = width + 'px';
                     c.style.maxWidth = width + 'px';
                     cloneRow.appendChild(c);
                 });
-                overlayThead.appendChild(cloneRow);
+                frag.appendChild(cloneRow);
             });
+            overlayThead.replaceChildren(frag);
+            dirty = false;
+        };
+        const update = () => {
+            frame = 0;
+            if (dirty) rebuild();
+            const y = window.scrollY;
+            const shouldShow = y > bounds.top && y + 80 < bounds.bottom; // table is scrolled past top but not fully out
+            if (shouldShow !== shown) {
+                shown = shouldShow;
+                overlay.style.display = shown ? 'block' : 'none';
+            }
         };
-        window.addEventListener('scroll', update, { passive: true });
-        window.addEventListener('resize', update);
-        // Also update after schedule loads
-        const orig = window.loadSchedule;
-        if (typeof orig === 'function') {
-            window.loadSchedule = function(){ orig(); setTimeout(update, 50); };
+        const schedule = (invalidate) => {
+            if (invalidate) dirty = true;
+            if (!frame) frame = requestAnimationFrame(update);
+        };
+        window.addEventListener('scroll', () => schedule(false), { passive: true });
+        window.addEventListener('resize', () => schedule(true));
+        // Header text/columns changed, or rows were added/removed/resized above or in the table
+        new MutationObserver(() => schedule(true)).observe(thead, { childList: true, subtree: true, characterData: true });
+        if (window.ResizeObserver) {
+            const observer = new ResizeObserver(() => schedule(true));
+            observer.observe(table);
+            observer.observe(document.body);
         }
-        setTimeout(update, 200);
+        schedule(true);
     })();
 
     // Initial load
@@ -1890,63 +2183,85 @@ document.addEventListener('DOMContentLoaded', function() {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify(data)
-        }).then(() => {
-            loadTimeOffRequests();
+        }).then(res => res.json()).then(result => {
+            upsertTimeoffItem(result.request);
             this.reset();
         });
     });
 
+    function renderTimeoffItem(r) {
+        const li = document.createElement('li');
+        li.className = 'list-group-item';
+        li.dataset.requestId = r.id;
+        li.innerHTML = `
+            <strong>${r.employee_name}</strong> (${r.request_type.toUpperCase()}): 
+            ${r.start_date} to ${r.end_date}<br>
+            <em>${r.reason}</em><br>
+            <span class="badge bg-${r.status === 'approved' ? 'success' : r.status === 'denied' ? 'danger' : 'secondary'}">${r.status}</span>
+        `;
+        // manager actions
+        if (isAdminLoggedIn && r.status === 'pending') {
+            const approveBtn = document.createElement('button');
+            approveBtn.className = 'btn btn-sm btn-success me-2';
+            approveBtn.textContent = 'Approve';
+            approveBtn.onclick = () => updateTimeoffStatus(r.id, 'approved');
+            const denyBtn = document.createElement('button');
+            denyBtn.className = 'btn btn-sm btn-danger';
+            denyBtn.textContent = 'Deny';
+            denyBtn.onclick = () => updateTimeoffStatus(r.id, 'denied');
+            li.appendChild(approveBtn);
+            li.appendChild(denyBtn);
+        }
+        // conflict check display
+        fetch(`/api/timeoff/conflicts?employee_id=${r.employee_id}&start_date=${r.start_date}&end_date=${r.end_date}`)
+            .then(res=>res.json())
+            .then(c => {
+              if (c.conflicts && c.conflicts.length) {
+                const warn = document.createElement('div');
+                warn.className = 'mt-2';
+                warn.innerHTML = `<span class="badge bg-warning text-dark">Conflicts: ${c.conflicts.length}</span>`;
+                li.appendChild(warn);
+              }
+            })
+            .catch(()=>{});
+        return li;
+    }
+
     function loadTimeOffRequests() {
         fetch('/api/timeoff')
             .then(res => res.json())
             .then(requests => {
                 const container = document.getElementById('timeoffRequestList');
                 container.innerHTML = '';
+                container.dataset.loaded = '1';
                 requests.forEach(r => {
-                    const li = document.createElement('li');
-                    li.className = 'list-group-item';
-                    li.innerHTML = `
-                        <strong>${r.employee_name}</strong> (${r.request_type.toUpperCase()}): 
-                        ${r.start_date} to ${r.end_date}<br>
-                        <em>${r.reason}</em><br>
-                        <span class="badge bg-${r.status === 'approved' ? 'success' : r.status === 'denied' ? 'danger' : 'secondary'}">${r.status}</span>
-                    `;
-                    // manager actions
-                    if (isAdminLoggedIn && r.status === 'pending') {
-                        const approveBtn = document.createElement('button');
-                        approveBtn.className = 'btn btn-sm btn-success me-2';
-                        approveBtn.textContent = 'Approve';
-                        approveBtn.onclick = () => updateTimeoffStatus(r.id, 'approved');
-                        const denyBtn = document.createElement('button');
-                        denyBtn.className = 'btn btn-sm btn-danger';
-                        denyBtn.textContent = 'Deny';
-                        denyBtn.onclick = () => updateTimeoffStatus(r.id, 'denied');
-                        li.appendChild(approveBtn);
-                        li.appendChild(denyBtn);
-                    }
-                    // conflict check display
-                    fetch(`/api/timeoff/conflicts?employee_id=${r.employee_id}&start_date=${r.start_date}&end_date=${r.end_date}`)
-                        .then(res=>res.json())
-                        .then(c => {
-                          if (c.conflicts && c.conflicts.length) {
-                            const warn = document.createElement('div');
-                            warn.className = 'mt-2';
-                            warn.innerHTML = `<span class="badge bg-warning text-dark">Conflicts: ${c.conflicts.length}</span>`;
-                            li.appendChild(warn);
-                          }
-                        })
-                        .catch(()=>{});
-                    container.appendChild(li);
+                    container.appendChild(renderTimeoffItem(r));
                 });
             });
     }
 
+    // Insert or replace one request in the rendered list (used by live updates)
+    function upsertTimeoffItem(r) {
+        const container = document.getElementById('timeoffRequestList');
+        if (!container || !container.dataset.loaded || !r) {
+            return;
+        }
+        const li = renderTimeoffItem(r);
+        const existing = container.querySelector(`li[data-request-id="${r.id}"]`);
+        if (existing) {
+            existing.replaceWith(li);
+        } else {
+            container.appendChild(li);
+        }
+    }
+
     function updateTimeoffStatus(id, status) {
         fetch(`/api/timeoff/${id}`, {
             method: 'PATCH',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify({ status })
-        }).then(() => loadTimeOffRequests());
+        }).then(r => r.json())
+            .then(result => upsertTimeoffItem(result.request));
     }
 
     // Populate employee dropdown for requests
@@ -2020,85 +2335,11 @@ document.addEventListener('DOMContentLoaded', function() {
             };
             fetch('/api/timeoff', {
               method: 'POST', headers: { 'Content-Type': 'application/json' }, body: JSON.stringify(data)
-            }).then(() => { loadTimeOffRequests(); timeoffFormEl.reset(); });
+            }).then(res => res.json()).then(result => { upsertTimeoffItem(result.request); timeoffFormEl.reset(); });
           });
       });
     }
 
-    // --- Schedule overlay: show approved time off as OFF ---
-    function loadApprovedTimeOffMap() {
-      return fetch('/api/timeoff')
-        .then(res => res.json())
-        .then(items => {
-          const map = {}; // { employeeId: Set([isoDates...]) }
-          items.filter(i => i.status === 'approved').forEach(i => {
-            const s = new Date(i.start_date);
-            const e = new Date(i.end_date);
-            for (let d = new Date(s); d <= e; d.setDate(d.getDate()+1)) {
-              const key = i.employee_id;
-              if (!map[key]) map[key] = new Set();
-              map[key].add(d.toISOString().slice(0,10));
-            }
-          });
-          return map;
-        });
-    }
-
-    // Patch into loadSchedule rendering to annotate cells
-    const originalLoadSchedule = typeof loadSchedule === 'function' ? loadSchedule : null;
-    if (originalLoadSchedule) {
-      window.loadSchedule = function() {
-        Promise.all([
-          fetch('/api/timeoff').then(r=>r.json()),
-        ]).then(([allTimeoff]) => {
-          // Build helper for week date mapping
-          const today = new Date();
-          const dow = today.getDay();
-          const daysToGoBack = dow === 6 ? 0 : dow + 1; // aligns with existing logic
-          const start = new Date(today); start.setDate(today.getDate()-daysToGoBack);
-          const dayKeys = ['saturday','sunday','monday','tuesday','wednesday','thursday','friday'];
-          const dayDates = {}; // {daykey: 'YYYY-MM-DD'}
-          for (let i=0;i<7;i++){ const d=new Date(start); d.setDate(start.getDate()+i); dayDates[dayKeys[i]]=d.toISOString().slice(0,10); }
-
-          // Approved map for quick lookup
-          const approved = {};
-          allTimeoff.filter(i=>i.status==='approved').forEach(i=>{
-            const s=new Date(i.start_date), e=new Date(i.end_date);
-            for(let d=new Date(s); d<=e; d.setDate(d.getDate()+1)){
-              const iso = d.toISOString().slice(0,10);
-              if(!approved[i.employee_id]) approved[i.employee_id]={};
-              approved[i.employee_id][iso]=true;
-            }
-          });
-
-          // Temporarily hook DOM insertion by observing after rows render
-          const tbody = document.getElementById('scheduleTableBody');
-          const observer = new MutationObserver(() => {
-            // annotate cells
-            tbody.querySelectorAll('td.schedule-cell').forEach(td => {
-              const empId = td.getAttribute('data-employee-id');
-              const day = td.getAttribute('data-day');
-              const dateISO = dayDates[day];
-              if (empId && dateISO && approved[empId] && approved[empId][dateISO]) {
-                const content = td.querySelector('.shift-content');
-                if (content && !content.dataset.timeoffApplied) {
-                  const current = content.innerHTML.trim();
-                  const label = '<span class="badge bg-info ms-1">TIME OFF</span>';
-                  content.innerHTML = current ? current + '<br>' + label : label;
-                  content.dataset.timeoffApplied = '1';
-                }
-              }
-            });
-            observer.disconnect();
-          });
-          observer.observe(tbody, { childList: true, subtree: true });
-
-          // call original renderer
-          originalLoadSchedule();
-        });
-      }
-    }
-
     // Admin-only views helper
 function updateAdminOnlyViews() {
     const insightsTabBtn = document.getElementById('insights-tab');
@@ -2125,10 +2366,11 @@ function getTodayKey() {
 (function(){
   const origLoadInsights = typeof loadPredictiveInsights === 'function' ? loadPredictiveInsights : null;
   if (!origLoadInsights) return;
-  window.loadPredictiveInsights = function() {
+  // fresh=true recomputes the snapshot instead of serving the stored one
+  window.loadPredictiveInsights = function(fresh) {
     if (!isAdminLoggedIn) return;
         Promise.all([
-            fetch('/api/predictive-insights').then(r=>r.json()),
+            fetch(fresh === true ? '/api/predictive-insights?fresh=1' : '/api/predictive-insights').then(r=>r.json()),
       fetch('/api/coverage/988').then(r=>r.json()).catch(()=>null),
       fetch('/api/coverage/988/detailed').then(r=>r.json()).catch(()=>null)
     ]).then(([data, cov, detailed]) => {
@@ -2150,7 +2392,10 @@ function getTodayKey() {
         const covItem = document.createElement('li');
         covItem.className = 'list-group-item';
         const days = ['saturday','sunday','monday','tuesday','wednesday','thursday','friday'];
-        const rows = days.map(d => `${d.charAt(0).toUpperCase()+d.slice(1)}: ${cov.counts[d]} (min 2${cov.prefer3 && cov.prefer3[d] ? ', prefer 3' : ''})`).join('<br>');
+        const rows = days.map(d => {
+          const t = (cov.targets && cov.targets[d]) || {min: 2, preferred: 3};
+          return `${d.charAt(0).toUpperCase()+d.slice(1)}: ${cov.counts[d]} (min ${t.min}${cov.prefer3 && cov.prefer3[d] ? `, prefer ${t.preferred}` : ''})`;
+        }).join('<br>');
         covItem.innerHTML = `<strong>988/CRISIS Coverage (week):</strong><br>${rows}`;
         list.appendChild(covItem);
       }
@@ -2270,6 +2515,7 @@ if (isAdminLoggedIn) {
         items.forEach(s => {
             const li = document.createElement('li');
             li.className = 'list-group-item d-flex justify-content-between align-items-start';
+            li.dataset.suggestionId = s.id;
             const left = document.createElement('div');
             const when = (s.day_key && s.start_time) ? `${s.day_key.charAt(0).toUpperCase() + s.day_key.slice(1)} ${s.start_time}-${s.end_time}` : '';
             left.innerHTML = `<strong>[${s.type}] ${s.title}</strong><br>` +
@@ -2306,7 +2552,11 @@ if (isAdminLoggedIn) {
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify({ status })
         }).then(r => r.json())
-            .then(() => loadSuggestions());
+            .then(data => {
+                // e.g. the employee picked up a shift or another task since the suggestion was made
+                if (data && data.error) alert(data.error);
+                loadSuggestions();
+            });
     }
 
     const genBtn = document.getElementById('btnGenSuggestions');
@@ -2318,6 +2568,11 @@ if (isAdminLoggedIn) {
         });
     }
 
+    const refreshInsightsBtn = document.getElementById('btnRefreshInsights');
+    if (refreshInsightsBtn) {
+        refreshInsightsBtn.addEventListener('click', () => window.loadPredictiveInsights(true));
+    }
+
     const emailBtn = document.getElementById('btnEmailInsights');
     if (emailBtn) {
         emailBtn.addEventListener('click', () => {
@@ -2344,6 +2599,90 @@ if (isAdminLoggedIn) {
             if (isAdminLoggedIn) loadSuggestions();
         });
     }
+
+    // Live updates: drop decided suggestions in place, fetch only when new ones were generated
+    document.addEventListener('shiftline:suggestion', ev => {
+        const d = ev.detail || {};
+        const ul = document.getElementById('suggestionsList');
+        if (!ul || !isAdminLoggedIn) return;
+        if (d.action === 'updated' && d.suggestion && d.suggestion.status !== 'pending') {
+            const li = ul.querySelector(`li[data-suggestion-id="${d.suggestion.id}"]`);
+            if (li) li.remove();
+        } else if (d.action === 'generated') {
+            loadSuggestions();
+        }
+    });
 })();
 
+    // --- Live updates: apply server-sent change deltas instead of refetching whole lists ---
+    (function setupLiveUpdates(){
+        if (!window.EventSource) return;
+        let fullReloadTimer = null;
+        const scheduleFullReload = () => {
+            clearTimeout(fullReloadTimer);
+            fullReloadTimer = setTimeout(loadSchedule, 300);
+        };
+        // EventSource cannot send headers; the site goes in the query string
+        const source = new EventSource(SHIFTLINE_SITE ? `/api/events?site=${encodeURIComponent(SHIFTLINE_SITE)}` : '/api/events');
+        const on = (kind, handler) => source.addEventListener(kind, ev => {
+            let data = {};
+            try {
+                data = JSON.parse(ev.data || '{}');
+            } catch (err) {
+                return;
+            }
+            if (handler) handler(data);
+            // Let other panels react without opening their own connections
+            document.dispatchEvent(new CustomEvent(`shiftline:${kind}`, { detail: data }));
+        });
+
+        on('schedule', d => {
+            if (Array.isArray(d.changes)) {
+                d.changes.forEach(c => applyShiftDelta(c.employee_id, c.day, c.shift));
+            } else {
+                applyShiftDelta(d.employee_id, d.day, d.shift);
+            }
+        });
+        on('employee', d => {
+            if (d.action === 'deleted') {
+                removeScheduleEmployee(d.employee_id);
+                const opt = employeeSelect.querySelector(`option[value="${d.employee_id}"]`);
+                if (opt) opt.remove();
+                return;
+            }
+            const emp = d.employee || {};
+            if (d.action === 'updated' && updateScheduleEmployee(emp)) {
+                return;
+            }
+            // New rows or department moves change grouping; rebuild once for a burst of events
+            scheduleFullReload();
+            loadEmployees();
+        });
+        on('task', d => {
+            if (d.action === 'created') {
+                addAssignedTask(d.task);
+            } else if (d.action === 'bulk_created' && Array.isArray(d.tasks)) {
+                d.tasks.forEach(addAssignedTask);
+            } else if (d.action === 'deleted') {
+                removeAssignedTask(d.task_id);
+            }
+        });
+        on('timeoff', d => upsertTimeoffItem(d.request));
+        on('suggestion');
+        on('columns', () => loadScheduleMeta().then(refreshScheduleView));
+        on('roster', () => {
+            scheduleFullReload();
+            loadEmployees();
+            loadDepartments();
+            loadPositions();
+        });
+        // Server could not replay what we missed: fall back to a full refresh
+        source.addEventListener('resync', () => {
+            loadScheduleMeta().then(refreshScheduleView);
+            loadTasks();
+            const timeoffList = document.getElementById('timeoffRequestList');
+            if (timeoffList && timeoffList.dataset.loaded) loadTimeOffRequests();
+        });
+    })();
+
     });
@@ -0,0 +1,108 @@
+"""Overlap checks for task assignments.
+
+Tasks store parsed minute bounds (start_min, end_min) next to their time
+strings and are indexed on (employee_id, day_of_week, start_min). The tasks of
+one employee on one day are kept disjoint, so ordering them by start also
+orders them by end. The only existing task that can overlap a new [start, end)
+is the one with the greatest start before the new end. A single insert finds
+it with one index seek (``task_conflict``). A batch loads each employee's tasks
+once and bisects in memory (``TaskIntervals``), which also catches overlaps
+between items of the same batch.
+
+A task may also be required to fall outside the employee's shift (coverage
+backfills are given to people who are off), checked against the roster
+snapshot.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+
+from extensions import db
+from models import Task
+from roster_snapshot import DAY_KEYS, RosterEntry
+
+TASK_DAYS = tuple(day.capitalize() for day in DAY_KEYS)
+
+
+def normalize_task_day(value) -> Optional[str]:
+    """'monday', 'Monday' -> 'Monday' (the stored form); None when not a weekday name."""
+    day = str(value or '').strip().capitalize()
+    return day if day in TASK_DAYS else None
+
+
+def task_conflict(employee_id: int, day: str, start_min: int, end_min: int) -> Optional[Task]:
+    """The employee's task on day overlapping [start_min, end_min), if any, in one index seek."""
+    q = (select(Task)
+         .where(Task.employee_id == employee_id, Task.day_of_week == day, Task.start_min < end_min)
+         .order_by(Task.start_min.desc())
+         .limit(1))
+    task = db.session.execute(q).scalar()
+    if task is not None and task.end_min is not None and task.end_min > start_min:
+        return task
+    return None
+
+
+def shift_overlap(entry: Optional[RosterEntry], day: str, start_min: int, end_min: int) -> Optional[str]:
+    """The employee's shift text on day when it overlaps [start_min, end_min), else None."""
+    if entry is None:
+        return None
+    day_key = day.lower()
+    if any(start_min < e and end_min > s for s, e in entry.parsed_shift(day_key).intervals):
+        return entry.shift(day_key)
+    return None
+
+
+def conflict_dict(task: Task) -> dict:
+    return {'type': 'task', 'task_id': task.id, 'task_name': task.task_name,
+            'start_time': task.start_time, 'end_time': task.end_time}
+
+
+class TaskIntervals:
+    """Sorted, disjoint task intervals per (employee_id, day) for validating a batch in one pass."""
+
+    def __init__(self):
+        self._starts: Dict[Tuple[int, str], List[int]] = {}
+        self._items: Dict[Tuple[int, str], List[tuple]] = {}
+
+    @classmethod
+    def load(cls, keys: Iterable[Tuple[int, str]]) -> 'TaskIntervals':
+        """Existing tasks for the given (employee_id, day) pairs, in one indexed query."""
+        index = cls()
+        keys = set(keys)
+        if not keys:
+            return index
+        employee_ids = sorted({k[0] for k in keys})
+        days = sorted({k[1] for k in keys})
+        q = (select(Task.id, Task.employee_id, Task.day_of_week, Task.start_min, Task.end_min, Task.task_name,
+                    Task.start_time, Task.end_time)
+             .where(Task.employee_id.in_(employee_ids), Task.day_of_week.in_(days), Task.start_min.is_not(None))
+             .order_by(Task.employee_id, Task.day_of_week, Task.start_min))
+        for row in db.session.execute(q):
+            key = (row.employee_id, row.day_of_week)
+            if key in keys:
+                index.add(key, row.start_min, row.end_min,
+                          {'type': 'task', 'task_id': row.id, 'task_name': row.task_name,
+                           'start_time': row.start_time, 'end_time': row.end_time})
+        return index
+
+    def conflict(self, key: Tuple[int, str], start_min: int, end_min: int) -> Optional[dict]:
+        starts = self._starts.get(key)
+        if not starts:
+            return None
+        idx = bisect_left(starts, end_min) - 1
+        if idx >= 0:
+            _, other_end, info = self._items[key][idx]
+            if other_end > start_min:
+                return info
+        return None
+
+    def add(self, key: Tuple[int, str], start_min: int, end_min: int, info: dict) -> None:
+        starts = self._starts.setdefault(key, [])
+        items = self._items.setdefault(key, [])
+        idx = bisect_left(starts, start_min)
+        starts.insert(idx, start_min)
+        items.insert(idx, (start_min, end_min, info))